@@ -0,0 +1,59 @@
+"""
+Script to benchmark the extraction time of the information of a house.
+
+Execute it from the root of the repo with
+
+    python -m benchmarks.house_extraction
+"""
+
+import time
+from bs4 import BeautifulSoup
+
+from src.scraping_house import HouseScraping
+from src.utag import UtagHouseScraping
+
+
+HOUSE_PATH = "data/tests/house.html"
+REPEATS = 50
+
+
+def main(repeats: int = REPEATS) -> None:
+    """
+    Prints the mean extraction time per house of the test page. First without the
+    parsing of the html (only the construction of the scraper and the extraction) and
+    then with it, reading the fields from the html or from the utag data.
+
+    Parameters
+    ----------
+    repeats : Number of times the extraction is repeated.
+    """
+
+    with open(HOUSE_PATH, "r", encoding="utf-8") as f:
+        html = f.read()
+
+    for parser in ["lxml", "html.parser"]:
+        soup = BeautifulSoup(html, parser)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            HouseScraping(soup).get_house_information()
+        elapsed = (time.perf_counter() - start) / repeats
+        print(f"{parser:<12} extraction per house: {1000 * elapsed:.2f} ms")
+
+    repeats = max(1, repeats // 5)
+    for parser in ["lxml", "html.parser"]:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            HouseScraping(BeautifulSoup(html, parser)).get_house_information()
+        elapsed_html = (time.perf_counter() - start) / repeats
+        start = time.perf_counter()
+        for _ in range(repeats):
+            UtagHouseScraping(html, parser).get_house_information()
+        elapsed_utag = (time.perf_counter() - start) / repeats
+        print(
+            f"{parser:<12} parsing and extraction per house: "
+            f"{1000 * elapsed_html:.2f} ms (html), {1000 * elapsed_utag:.2f} ms (utag)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Script to benchmark the parsers of the html.
+
+Execute it from the root of the repo with
+
+    python -m benchmarks.parsers
+"""
+
+import time
+
+from src.parsers import PARSERS, parse_html
+from src.scraping_house import HouseScraping
+from src.utag import DOM_CLASSES
+
+
+HOUSE_PATH = "data/tests/house.html"
+REPEATS = 10
+
+
+def main(repeats: int = REPEATS) -> None:
+    """
+    Prints, for each parser, the mean time to parse the test page (the whole page and
+    only the subtrees with the fields not in the utag data) and to extract the
+    information of the house.
+
+    Parameters
+    ----------
+    repeats : Number of times each measure is repeated.
+    """
+
+    with open(HOUSE_PATH, "r", encoding="utf-8") as f:
+        html = f.read()
+
+    for parser in PARSERS:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            soup = parse_html(html, parser)
+        elapsed_parse = (time.perf_counter() - start) / repeats
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            parse_html(html, parser, DOM_CLASSES)
+        elapsed_subtrees = (time.perf_counter() - start) / repeats
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            HouseScraping(soup).get_house_information()
+        elapsed_extraction = (time.perf_counter() - start) / repeats
+
+        print(
+            f"{parser:<12} parse: {1000 * elapsed_parse:6.2f} ms, "
+            f"parse subtrees: {1000 * elapsed_subtrees:6.2f} ms, "
+            f"extraction: {1000 * elapsed_extraction:6.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
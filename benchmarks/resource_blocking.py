@@ -0,0 +1,106 @@
+"""
+Script to benchmark the bytes downloaded and the load time per page with and without
+blocking the resources that the extraction does not use (BLOCKED_URL_PATTERNS). It
+loads live pages, so it needs Chrome and internet.
+
+Execute it from the root of the repo with
+
+    python -m benchmarks.resource_blocking
+"""
+
+import json
+import time
+import undetected_chromedriver as uc
+
+from src.fetchers import make_browser
+
+
+URLS = [
+    "https://www.idealista.com/venta-viviendas/toledo/buenavista-valparaiso-la-legua/",
+    "https://www.idealista.com/inmueble/104824591/",
+]
+REPEATS = 3
+
+
+def downloaded_bytes(browser: uc.Chrome) -> int:
+    """
+    Gets the bytes downloaded by a browser since the last call, from its performance
+    log.
+
+    Parameters
+    ----------
+    browser : Browser started with log_network=True.
+
+    Returns
+    -------
+    Bytes received, with the headers and before decompressing.
+    """
+
+    total = 0
+    for entry in browser.get_log("performance"):
+        message = json.loads(entry["message"])["message"]
+        if message["method"] == "Network.loadingFinished":
+            total += message["params"]["encodedDataLength"]
+    return total
+
+
+def measure(urls: list[str], block: bool, repeats: int) -> tuple[float, float]:
+    """
+    Loads some pages with an empty cache and measures them.
+
+    Parameters
+    ----------
+    urls    : Urls of the pages.
+    block   : If True, the resources of BLOCKED_URL_PATTERNS are blocked.
+    repeats : Number of times each page is loaded.
+
+    Returns
+    -------
+    Mean bytes downloaded and mean seconds until the load event per page.
+    """
+
+    browser = make_browser("normal", block=block, log_network=True)
+    sizes, times = [], []
+    try:
+        for _ in range(repeats):
+            for url in urls:
+                browser.execute_cdp_cmd("Network.clearBrowserCache", {})
+                downloaded_bytes(browser)  # drops the events of the previous page
+                start = time.perf_counter()
+                browser.get(url)
+                times.append(time.perf_counter() - start)
+                sizes.append(downloaded_bytes(browser))
+    finally:
+        browser.quit()
+
+    return sum(sizes) / len(sizes), sum(times) / len(times)
+
+
+def main(urls: list[str] | None = None, repeats: int = REPEATS) -> None:
+    """
+    Prints the mean bytes downloaded and load time per page with and without blocking
+    the resources, and what is saved by blocking them.
+
+    Parameters
+    ----------
+    urls    : Urls of the pages. By default, URLS.
+    repeats : Number of times each page is loaded.
+    """
+
+    urls = URLS if urls is None else urls
+    results = {block: measure(urls, block, repeats) for block in [False, True]}
+
+    for block, (size, elapsed) in results.items():
+        name = "blocking" if block else "not blocking"
+        print(f"{name:<13} per page: {size / 1024:8.1f} KB, {elapsed:.2f} s")
+
+    saved_size = results[False][0] - results[True][0]
+    saved_time = results[False][1] - results[True][1]
+    print(
+        f"{'saved':<13} per page: {saved_size / 1024:8.1f} KB "
+        f"({100 * saved_size / results[False][0]:.0f} %), {saved_time:.2f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
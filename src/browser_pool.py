@@ -0,0 +1,374 @@
+"""
+Script for a pool of warm browsers shared by all the fetchers of a run, so that Chrome
+is not started again for each phase of the run. The browsers are checked before being
+used, recycled after some pages or when they use too much memory, and started again
+when they crash.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+import undetected_chromedriver as uc
+from selenium.common.exceptions import WebDriverException
+
+from src.fetchers import BrowserFetcher, make_browser
+from src.rate_limiter import RateLimiter
+
+
+def browser_memory(browser: uc.Chrome) -> float | None:
+    """
+    Gets the memory used by a browser and all its processes (renderers, gpu...). It
+    reads /proc, so it only works in Linux.
+
+    Parameters
+    ----------
+    browser : Browser.
+
+    Returns
+    -------
+    Resident memory in MB or None if it can not be read.
+    """
+
+    pid = getattr(browser, "browser_pid", None)
+    if pid is None or not os.path.isdir("/proc"):
+        return None
+
+    children: dict[int, list[int]] = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat", "r", encoding="utf-8") as f:
+                    parent = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):  # the process ended
+                continue
+            children.setdefault(parent, []).append(int(entry))
+
+    memory = 0
+    processes = [pid]
+    while processes:
+        process = processes.pop()
+        try:
+            with open(f"/proc/{process}/statm", "r", encoding="utf-8") as f:
+                memory += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except OSError:
+            continue
+        processes.extend(children.get(process, []))
+
+    return memory / 2**20
+
+
+class _Session:
+    """
+    Class for a browser of the pool, its profile and the number of pages it fetched.
+    """
+
+    def __init__(self, browser: uc.Chrome, profile: int) -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        browser : Browser.
+        profile : Index of the profile of the browser.
+        """
+
+        self.browser = browser
+        self.profile = profile
+        self.pages = 0
+
+
+class BrowserPool:
+    """
+    Class for a pool of browsers that are lent to the fetchers and given back after
+    each use, so that they stay warm between pages and between the phases of a run.
+    The browsers are started when they are needed, up to the size of the pool.
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        max_pages: int = 200,
+        max_memory: float | None = 2048.0,
+        profiles_directory: str | None = None,
+        browser_factory: Callable[[str | None], uc.Chrome] | None = None,
+        memory: Callable[[uc.Chrome], float | None] = browser_memory,
+        crash_exceptions: tuple[type[BaseException], ...] = (WebDriverException,),
+    ) -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        size               : Maximum number of browsers at the same time.
+        max_pages          : Number of uses of a browser after which it is quit and
+                             replaced by a new one.
+        max_memory         : Memory in MB of a browser above which it is quit and
+                             replaced by a new one. If None, the memory is not checked.
+        profiles_directory : If given, each place of the pool has a persistent profile
+                             in a subdirectory, that is used by all the browsers
+                             started in it. So the new browsers have the cookies and
+                             the cache of the previous ones.
+        browser_factory    : Function that starts a browser given the directory of its
+                             profile (None for a temporary one). By default,
+                             make_browser.
+        memory             : Function that gives the memory in MB of a browser.
+        crash_exceptions   : Exceptions of the browsers that mean that they crashed.
+        """
+
+        if size < 1:
+            raise ValueError(f"Expected at least 1 browser, got {size}.")
+
+        self.size = size
+        self.max_pages = max_pages
+        self.max_memory = max_memory
+        self.profiles_directory = profiles_directory
+        self.browser_factory = browser_factory or (
+            lambda profile_dir: make_browser(profile_dir=profile_dir)
+        )
+        self.memory = memory
+        self.crash_exceptions = crash_exceptions
+
+        self.idle: list[_Session] = []
+        self.free_profiles = list(range(size - 1, -1, -1))  # of the places not used
+        self.condition = threading.Condition()
+        self.closed = False
+        self.started = 0
+        self.recycled = 0
+        self.restarted = 0  # browsers that crashed or failed the health check
+
+    def _healthy(self, browser: uc.Chrome) -> bool:
+        """
+        Checks that a browser still answers.
+
+        Parameters
+        ----------
+        browser : Browser.
+
+        Returns
+        -------
+        Boolean indicator.
+        """
+
+        try:
+            browser.execute_script("return 1;")
+            return True
+        except Exception:
+            return False
+
+    def _quit(self, browser: uc.Chrome) -> None:
+        """
+        Quits a browser, ignoring the errors of the browsers that crashed.
+
+        Parameters
+        ----------
+        browser : Browser.
+        """
+
+        try:
+            browser.quit()
+        except Exception as e:
+            print(f"Could not quit a browser: {e}.")
+
+    def _discard(self, session: _Session) -> None:
+        """
+        Quits the browser of a session and frees its place in the pool.
+
+        Parameters
+        ----------
+        session : Session to discard.
+        """
+
+        self._quit(session.browser)
+        with self.condition:
+            self.free_profiles.append(session.profile)
+            self.condition.notify()
+
+    def acquire(self) -> _Session:
+        """
+        Gets a browser, the last one used if there is an idle one. It waits if all the
+        browsers are in use.
+
+        Returns
+        -------
+        Session with the browser.
+        """
+
+        session: _Session | None = None
+        with self.condition:
+            while True:
+                if self.closed:
+                    raise RuntimeError("The pool of browsers is closed.")
+                if self.idle:
+                    session = self.idle.pop()
+                    profile = session.profile
+                    break
+                if self.free_profiles:
+                    profile = self.free_profiles.pop()
+                    break
+                self.condition.wait()
+
+        if session is not None and not self._healthy(session.browser):
+            self._quit(session.browser)  # a new one is started with its profile
+            session = None
+            with self.condition:
+                self.restarted += 1
+
+        if session is None:  # the browser is started outside the lock
+            profile_dir = None
+            if self.profiles_directory is not None:
+                profile_dir = os.path.join(
+                    self.profiles_directory, f"browser_{profile}"
+                )
+            try:
+                session = _Session(self.browser_factory(profile_dir), profile)
+            except BaseException:
+                with self.condition:
+                    self.free_profiles.append(profile)
+                    self.condition.notify()
+                raise
+            with self.condition:
+                self.started += 1
+
+        return session
+
+    def release(self, session: _Session, crashed: bool = False) -> None:
+        """
+        Gives back a browser after one use. It is quit if it crashed, if it reached the
+        maximum number of pages or memory or if the pool is closed.
+
+        Parameters
+        ----------
+        session : Session with the browser.
+        crashed : If True, the browser crashed while it was used.
+        """
+
+        session.pages += 1
+        if crashed:
+            with self.condition:
+                self.restarted += 1
+            self._discard(session)
+            return
+
+        if session.pages >= self.max_pages or (
+            self.max_memory is not None
+            and (memory := self.memory(session.browser)) is not None
+            and memory > self.max_memory
+        ):
+            with self.condition:
+                self.recycled += 1
+            self._discard(session)
+            return
+
+        with self.condition:
+            if not self.closed:
+                self.idle.append(session)
+                self.condition.notify()
+                return
+        self._discard(session)
+
+    @contextmanager
+    def session(self) -> Iterator[uc.Chrome]:
+        """
+        Lends a browser for one use.
+
+        Returns
+        -------
+        Context manager with the browser.
+        """
+
+        session = self.acquire()
+        crashed = False
+        try:
+            yield session.browser
+        except self.crash_exceptions:
+            crashed = True
+            raise
+        finally:
+            self.release(session, crashed)
+
+    def report(self) -> str:
+        """
+        Summarises the browsers of the run.
+
+        Returns
+        -------
+        Line with the number of browsers started, recycled and restarted.
+        """
+
+        return (
+            f"Browsers started: {self.started}, recycled: {self.recycled}, restarted "
+            f"after a crash: {self.restarted}"
+        )
+
+    def close(self) -> None:
+        """
+        Quits the idle browsers. The browsers in use are quit when they are given back.
+        """
+
+        with self.condition:
+            self.closed = True
+            idle, self.idle = self.idle, []
+            self.condition.notify_all()
+        for session in idle:
+            self._discard(session)
+
+    def __enter__(self) -> "BrowserPool":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+class PooledFetcher:
+    """
+    Class to get the html of the pages with the browsers of a pool. If a browser
+    crashes, the page is fetched again with a new one, so the run goes on.
+    """
+
+    def __init__(
+        self, pool: BrowserPool, limiter: RateLimiter | None = None, retries: int = 1
+    ) -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        pool    : Pool of browsers, that can be shared with other fetchers.
+        limiter : Rate limiter of the requests, that can be shared with other fetchers.
+                  If None, the fetcher waits a random time after each page.
+        retries : Number of times a page is fetched again after a crash of the browser.
+        """
+
+        self.pool = pool
+        self.limiter = limiter
+        self.retries = retries
+
+    def fetch(self, url: str) -> str:
+        """
+        Gets the html of a url with a browser of the pool.
+
+        Parameters
+        ----------
+        url : Url of the page.
+
+        Returns
+        -------
+        Html of the page.
+        """
+
+        attempt = 0
+        while True:
+            try:
+                with self.pool.session() as browser:
+                    return BrowserFetcher(browser, self.limiter).fetch(url)
+            except self.pool.crash_exceptions:
+                attempt += 1
+                if attempt > self.retries:
+                    raise
+
+    def close(self) -> None:
+        """
+        Does nothing, the browsers belong to the pool.
+        """
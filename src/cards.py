@@ -0,0 +1,156 @@
+"""
+Script for reading the information shown in the cards of the advertisements of a page
+of a zone, without loading the page of each advertisement.
+"""
+
+import hashlib
+import json
+import re
+from bs4 import Tag
+
+from src.characteristics import CharacteristicRule, parse_characteristics, parse_floor
+from src.parsers import Document, LxmlElement
+from src.scraping_house import HouseValue
+
+
+# Rules for the details of a card, for example "3 hab.", "120 m²" or "Planta 1ª
+# exterior con ascensor"
+CARD_RULES = [
+    CharacteristicRule(
+        "n_rooms", re.compile(r"hab\."), lambda text, _: int(text.split(" ")[0])
+    ),
+    CharacteristicRule(
+        "m2", re.compile("m²"), lambda text, _: int(text.split(" ")[0].replace(".", ""))
+    ),
+    CharacteristicRule("floor", re.compile("planta"), parse_floor),
+    CharacteristicRule(
+        "elevator",
+        re.compile("con ascensor|sin ascensor"),
+        lambda _, lower: "con ascensor" in lower,
+    ),
+]
+
+# Fields of the house given by the multimedia buttons of a card
+CARD_BUTTONS = {
+    "virtual_tour": "VIRTUAL_TOUR_360",
+    "homestaging": "HOME_STAGING",
+    "plane": "PLAN",
+}
+
+# Fields of a card, all of them with the same meaning as in HouseScraping except the
+# title, that is the one of the card
+CARD_FIELDS = (
+    ["title", "type", "price"]
+    + [rule.field for rule in CARD_RULES]
+    + ["n_photos"]
+    + list(CARD_BUTTONS)
+)
+
+# Fields of a card that change when the advertisement is edited
+FINGERPRINT_FIELDS = ["price", "title", "n_photos"]
+
+
+def _get_text(element: Tag | LxmlElement | None) -> str | None:
+    """
+    Gets the text of an element without repeated spaces.
+
+    Parameters
+    ----------
+    element : Element of the card.
+
+    Returns
+    -------
+    Text of the element or None if there is not element.
+    """
+
+    if element is None:
+        return None
+    return re.sub(r"\s+", " ", element.text).strip()
+
+
+def parse_card(article: Tag | LxmlElement) -> dict[str, HouseValue]:
+    """
+    Gets the information of a house shown in its card.
+
+    Parameters
+    ----------
+    article : Article of the card.
+
+    Returns
+    -------
+    Dict with the fields of CARD_FIELDS. The fields not shown in the card are None.
+    """
+
+    card: dict[str, HouseValue] = {}
+
+    title = _get_text(article.find("a", {"class": "item-link"}))
+    card["title"] = title
+    card["type"] = (
+        None if title is None else "flat" if "piso" in title.lower() else "house"
+    )
+
+    price = _get_text(article.find("span", {"class": "item-price"}))
+    digits = None if price is None else re.sub(r"[^0-9]", "", price)
+    card["price"] = int(digits) if digits else None
+
+    details = [
+        text
+        for span in article.find_all("span", {"class": "item-detail"})
+        if (text := _get_text(span))
+    ]
+    card.update(parse_characteristics(details, CARD_RULES))
+
+    pictures = article.find("div", {"class": "item-multimedia-pictures"})
+    spans = [] if pictures is None else pictures.find_all("span")
+    card["n_photos"] = int(spans[-1].text) if spans else None
+
+    buttons = {
+        button.get("data-button-type")
+        for button in article.find_all("button", {"class": "multimedia-shortcut"})
+    }
+    for field, button_type in CARD_BUTTONS.items():
+        card[field] = button_type in buttons
+
+    return card
+
+
+def get_cards(soup: Document) -> list[dict[str, HouseValue]]:
+    """
+    Gets the information of the cards of a page of a zone.
+
+    Parameters
+    ----------
+    soup : Soup of the page.
+
+    Returns
+    -------
+    List with a dict per card with an advertisement, with its id ("id") and the fields
+    of CARD_FIELDS.
+    """
+
+    cards = []
+    for article in soup.find("main", {"class": "listing-items"}).find_all("article"):
+        id_ = article.get("data-element-id")
+        if id_ is not None:
+            cards.append({"id": int(str(id_)), **parse_card(article)})
+
+    return cards
+
+
+def card_fingerprint(card: dict[str, HouseValue]) -> int:
+    """
+    Gets a fingerprint of a card, so that the advertisements that changed since the
+    last run can be found without loading their pages.
+
+    Parameters
+    ----------
+    card : Dict with the fields of the card.
+
+    Returns
+    -------
+    64 bit hash of the fields of FINGERPRINT_FIELDS.
+    """
+
+    data = json.dumps([card.get(field) for field in FINGERPRINT_FIELDS]).encode()
+    digest = hashlib.blake2b(data, digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
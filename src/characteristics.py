@@ -0,0 +1,128 @@
+"""
+Script for parsing the list of basic characteristics of a house in a single pass.
+"""
+
+import re
+from typing import Callable, Iterable, NamedTuple
+
+
+CharacteristicValue = int | str | bool | None
+
+
+class CharacteristicRule(NamedTuple):
+    """
+    Rule to fill a field from the characteristics list. The first characteristic that
+    matches the pattern (searched in lower case) and for which the parser does not
+    return None gives the value of the field.
+    """
+
+    field: str
+    pattern: re.Pattern[str]
+    parse: Callable[[str, str], CharacteristicValue]
+
+
+def _parse_m2(text: str, _: str) -> int:
+    """
+    Parses the constructed m2 of a characteristic.
+
+    Parameters
+    ----------
+    text : Text of the characteristic.
+    _    : Text of the characteristic in lower case.
+
+    Returns
+    -------
+    The m2 of the house.
+    """
+
+    words = text.split(" ")
+    if "útiles" in text:
+        return int(words[-3].replace(".", ""))
+    return int(words[0].replace(".", ""))
+
+
+def parse_floor(_: str, lower: str) -> int | None:
+    """
+    Parses the floor of a characteristic.
+
+    Parameters
+    ----------
+    _     : Text of the characteristic.
+    lower : Text of the characteristic in lower case.
+
+    Returns
+    -------
+    First digit of the characteristic or None if there is not any.
+    """
+
+    for letter in lower:
+        if letter in "0123456789":
+            return int(letter)
+    return None
+
+
+CHARACTERISTIC_RULES = [
+    CharacteristicRule("m2", re.compile("construidos"), _parse_m2),
+    CharacteristicRule("status", re.compile("segunda mano"), lambda text, _: text),
+    CharacteristicRule("floor", re.compile("planta"), parse_floor),
+    CharacteristicRule(
+        "n_rooms", re.compile("habitaciones|habitación"), lambda text, _: int(text[0])
+    ),
+    CharacteristicRule("n_bathrooms", re.compile("baño"), lambda text, _: int(text[0])),
+    CharacteristicRule("heating", re.compile("calefacción"), lambda text, _: text),
+    CharacteristicRule(
+        "elevator",
+        re.compile("con ascensor|sin ascensor"),
+        lambda _, lower: "con ascensor" in lower,
+    ),
+    CharacteristicRule(
+        "furnished",
+        re.compile("amueblado|sin amueblar"),
+        lambda _, lower: "amueblado" in lower,
+    ),
+    CharacteristicRule("terrace", re.compile("terraza|balcón"), lambda text, _: text),
+]
+
+# Characteristics that do not match any rule are discarded with a single search
+_ANY_RULE = re.compile("|".join(rule.pattern.pattern for rule in CHARACTERISTIC_RULES))
+
+
+def parse_characteristics(
+    texts: Iterable[str], rules: list[CharacteristicRule] | None = None
+) -> dict[str, CharacteristicValue]:
+    """
+    Fills the fields of the rules walking the characteristics only once.
+
+    Parameters
+    ----------
+    texts : Texts of the characteristics, in the order of the advertisement.
+    rules : Rules to apply. By default all the rules of CHARACTERISTIC_RULES.
+
+    Returns
+    -------
+    Dict with the value of each field (None if no characteristic matches).
+    """
+
+    if rules is None:
+        rules = CHARACTERISTIC_RULES
+        any_rule = _ANY_RULE
+    else:
+        any_rule = re.compile("|".join(rule.pattern.pattern for rule in rules))
+
+    values: dict[str, CharacteristicValue] = {rule.field: None for rule in rules}
+    pending = list(rules)
+
+    for text in texts:
+        lower = text.lower()
+        if not any_rule.search(lower):
+            continue
+        for rule in list(pending):
+            if rule.pattern.search(lower):
+                value = rule.parse(text, lower)
+                if value is not None:
+                    values[rule.field] = value
+                    pending.remove(rule)
+        if not pending:
+            break
+
+    return values
@@ -0,0 +1,126 @@
+"""
+Script for indexing the elements of a document so that they can be looked up without
+scanning the whole tree each time.
+"""
+
+from bs4 import Tag
+
+from src.parsers import Document, LxmlElement
+
+
+Element = Tag | LxmlElement
+
+
+class DocumentIndex:
+    """
+    Class to index all the elements of a soup in a single pass. Elements can then be
+    looked up by class, by id or by tag and class. The lookups follow the same matching
+    rules as BeautifulSoup (a class matches any of the classes of the element or the
+    full class string) and keep the document order.
+    """
+
+    def __init__(self, soup: Document) -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        soup : Soup to index, of any of the parsers.
+        """
+
+        self.by_class: dict[str, list[Element]] = {}
+        self.by_id: dict[str, Element] = {}
+        self.by_tag_class: dict[tuple[str, str], list[Element]] = {}
+
+        for element in soup.find_all(True):
+            id_ = element.get("id")
+            if isinstance(id_, str):
+                self.by_id.setdefault(id_, element)
+
+            class_value = element.get("class")
+            if not class_value:
+                continue
+            if isinstance(class_value, str):
+                classes = class_value.split()
+            else:
+                classes = list(class_value)
+            keys = list(dict.fromkeys(classes))
+            if len(classes) > 1:
+                keys.append(" ".join(classes))
+            for key in keys:
+                self.by_class.setdefault(key, []).append(element)
+                self.by_tag_class.setdefault((element.name, key), []).append(element)
+
+    def find(self, tag: str, class_: str) -> Element | None:
+        """
+        Gets the first element with the given tag and class.
+
+        Parameters
+        ----------
+        tag    : Name of the tag.
+        class_ : Class of the element.
+
+        Returns
+        -------
+        First element found or None if there is not any.
+        """
+
+        elements = self.by_tag_class.get((tag, class_))
+        if elements:
+            return elements[0]
+        return None
+
+    def find_all(self, tag: str, class_: str) -> list[Element]:
+        """
+        Gets all the elements with the given tag and class.
+
+        Parameters
+        ----------
+        tag    : Name of the tag.
+        class_ : Class of the elements.
+
+        Returns
+        -------
+        Elements found, in document order.
+        """
+
+        return self.by_tag_class.get((tag, class_), [])
+
+    def find_by_id(self, id_: str) -> Element | None:
+        """
+        Gets the element with the given id.
+
+        Parameters
+        ----------
+        id_ : Id of the element.
+
+        Returns
+        -------
+        First element with that id or None if there is not any.
+        """
+
+        return self.by_id.get(id_)
+
+    def find_by_class(self, class_: str) -> list[Element]:
+        """
+        Gets all the elements with the given class, whatever their tag.
+
+        Parameters
+        ----------
+        class_ : Class of the elements.
+
+        Returns
+        -------
+        Elements found, in document order.
+        """
+
+        return self.by_class.get(class_, [])
+
+    def clear(self) -> None:
+        """
+        Drops the references to the elements, so that the tree can be freed.
+        """
+
+        self.by_class.clear()
+        self.by_id.clear()
+        self.by_tag_class.clear()
@@ -0,0 +1,511 @@
+"""
+Script for the fetchers, the objects that obtain the html of a url.
+"""
+
+import os
+import threading
+from typing import Callable, Protocol
+import urllib3
+import undetected_chromedriver as uc
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.wait import WebDriverWait
+
+from src.html_cache import HtmlCache
+from src.rate_limiter import RateLimiter
+from src.utils import MAX_TIME_REQUEST, wait
+
+
+class Fetcher(Protocol):
+    """
+    Interface of the fetchers.
+    """
+
+    def fetch(self, url: str) -> str:
+        """
+        Gets the html of a url.
+
+        Parameters
+        ----------
+        url : Url of the page.
+
+        Returns
+        -------
+        Html of the page.
+        """
+
+    def close(self) -> None:
+        """
+        Releases the resources of the fetcher.
+        """
+
+
+# "none" is not accepted: the load returns before the navigation starts, so the ready
+# selector could be found in the previous page of a reused browser
+PAGE_LOAD_STRATEGIES = ["normal", "eager"]
+
+# Css selectors of the elements that show that a page can be read
+HOUSE_READY_SELECTOR = ".main-info__title-main"
+LISTING_READY_SELECTOR = "main.listing-items"
+READY_TIMEOUT = 10.0
+
+# Cookie kept by the consent banner once the cookies are accepted or rejected
+CONSENT_COOKIE = "didomi_token"
+CONSENT_BUTTON_ID = "didomi-notice-disagree-button"
+
+# Resources that the extraction does not use: images (the photos are only counted),
+# fonts, videos and the ads, tracking and virtual tours of third parties. The scripts of
+# the anti-bot protection (dd.idealista.com) and of the cookies are not blocked.
+BLOCKED_EXTENSIONS = [
+    "jpg",
+    "jpeg",
+    "png",
+    "gif",
+    "webp",
+    "avif",
+    "svg",
+    "ico",
+    "woff",
+    "woff2",
+    "ttf",
+    "otf",
+    "mp4",
+    "webm",
+    "m3u8",
+]
+BLOCKED_HOSTS = [
+    "img*.idealista.com",
+    "*googletagmanager.com",
+    "*google-analytics.com",
+    "*doubleclick.net",
+    "*googlesyndication.com",
+    "*facebook.com",
+    "*facebook.net",
+    "*criteo.com",
+    "*criteo.net",
+    "*taboola.com",
+    "*outbrain.com",
+    "*openx.net",
+    "*creativecdn.com",
+    "*aticdn.net",
+    "*tiqcdn.com",
+    "*hotjar.com",
+    "*matterport.com",
+    "*youtube.com",
+]
+BLOCKED_URL_PATTERNS = (
+    [f"*.{extension}" for extension in BLOCKED_EXTENSIONS]
+    + [f"*.{extension}?*" for extension in BLOCKED_EXTENSIONS]
+    + [f"*://{host}/*" for host in BLOCKED_HOSTS]
+)
+
+
+def block_resources(browser: uc.Chrome, patterns: list[str] | None = None) -> None:
+    """
+    Makes a browser not download the resources whose url matches some patterns, with
+    the network domain of the Chrome DevTools Protocol.
+
+    Parameters
+    ----------
+    browser  : Browser.
+    patterns : Patterns of the urls, where "*" is any text. By default,
+               BLOCKED_URL_PATTERNS.
+    """
+
+    patterns = BLOCKED_URL_PATTERNS if patterns is None else patterns
+    browser.execute_cdp_cmd("Network.enable", {})
+    browser.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+
+
+def make_browser(
+    page_load_strategy: str = "eager",
+    block: bool = True,
+    log_network: bool = False,
+    profile_dir: str | None = None,
+) -> uc.Chrome:
+    """
+    Starts a Chrome browser.
+
+    Parameters
+    ----------
+    page_load_strategy : When the loads of the pages return, one of
+                         PAGE_LOAD_STRATEGIES: "normal" waits for all the resources
+                         and "eager" for the html to be parsed.
+    block              : If True, the resources of BLOCKED_URL_PATTERNS are not
+                         downloaded.
+    log_network        : If True, the events of the network are kept in the
+                         "performance" log of the browser, to measure the bytes
+                         downloaded.
+    profile_dir        : Directory of the profile of the browser, kept after it is
+                         quit, so that the cookies (the answer to the consent banner)
+                         and the cache of the static files are reused by the next
+                         browsers with the same directory. A directory can only be used
+                         by one browser at the same time. By default, a new temporary
+                         profile.
+
+    Returns
+    -------
+    Browser.
+    """
+
+    if page_load_strategy not in PAGE_LOAD_STRATEGIES:
+        raise ValueError(
+            f"Unknown page load strategy {page_load_strategy}, expected one of "
+            f"{PAGE_LOAD_STRATEGIES}."
+        )
+
+    options = uc.ChromeOptions()
+    options.page_load_strategy = page_load_strategy
+    if log_network:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    if profile_dir is not None:
+        profile_dir = os.path.abspath(profile_dir)
+        os.makedirs(profile_dir, exist_ok=True)
+    browser = uc.Chrome(options=options, user_data_dir=profile_dir)
+    if block:
+        block_resources(browser)
+    return browser
+
+
+def get_ready_selector(url: str) -> str:
+    """
+    Gets the css selector of the element that shows that a page can be read.
+
+    Parameters
+    ----------
+    url : Url of the page.
+
+    Returns
+    -------
+    Selector of the title for the pages of the houses and of the list of
+    advertisements for the pages of the zones.
+    """
+
+    return HOUSE_READY_SELECTOR if "/inmueble/" in url else LISTING_READY_SELECTOR
+
+
+class BrowserFetcher:
+    """
+    Class to get the html of the pages with a Chrome browser. After each load, the
+    fetcher waits until the page can be read instead of a fixed time.
+    """
+
+    def __init__(
+        self,
+        browser: uc.Chrome | None = None,
+        limiter: RateLimiter | None = None,
+        ready_timeout: float = READY_TIMEOUT,
+    ) -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        browser       : Browser. By default a new one is started with make_browser.
+        limiter       : Rate limiter of the requests, that can be shared with other
+                        fetchers. If None, the fetcher waits a random time after each
+                        page.
+        ready_timeout : Maximum time in seconds waiting for a page to be ready.
+        """
+
+        self.browser = make_browser() if browser is None else browser
+        self.limiter = limiter
+        self.ready_timeout = ready_timeout
+        self.consent_given = False
+
+    def _wait_ready(self, url: str) -> None:
+        """
+        Waits until the element of get_ready_selector is in the page or the page is
+        completely loaded without it (for example a blocked page). After the timeout
+        the page is read as it is.
+
+        Parameters
+        ----------
+        url : Url of the page.
+        """
+
+        selector = get_ready_selector(url)
+        try:
+            WebDriverWait(self.browser, self.ready_timeout, poll_frequency=0.1).until(
+                lambda browser: browser.find_elements(By.CSS_SELECTOR, selector)
+                or browser.execute_script("return document.readyState;") == "complete"
+            )
+        except TimeoutException:
+            pass
+
+    def _disagree_cookies(self) -> None:
+        """
+        Disagrees with the cookies if the banner is in the page. The banner is only
+        looked for until the consent cookie is in the browser, which is kept in its
+        profile.
+        """
+
+        if self.consent_given:
+            return
+        if self.browser.get_cookie(CONSENT_COOKIE) is not None:
+            self.consent_given = True
+            return
+
+        try:
+            self.browser.find_element(By.ID, CONSENT_BUTTON_ID).click()
+        except NoSuchElementException:
+            pass
+
+    def fetch(self, url: str) -> str:
+        """
+        Gets the html of a url, disagreeing with the cookies if they are asked.
+
+        Parameters
+        ----------
+        url : Url of the page.
+
+        Returns
+        -------
+        Html of the page.
+        """
+
+        if self.limiter is None:
+            self.browser.get(url)
+            self._wait_ready(url)
+            wait()  # the only pacing of the requests without a limiter
+        else:
+            self.limiter.acquire(url)
+            try:
+                self.browser.get(url)
+                self._wait_ready(url)
+            except Exception:
+                self.limiter.failure(url)
+                raise
+
+        self._disagree_cookies()
+
+        html = self.browser.page_source
+        if self.limiter is not None:
+            if looks_blocked(200, html):
+                self.limiter.failure(url)
+            else:
+                self.limiter.success(url)
+
+        return html
+
+    def close(self) -> None:
+        """
+        Quits the browser.
+        """
+
+        self.browser.quit()
+
+
+BLOCKED_STATUSES = {403, 429, 503}
+
+# Markers of the pages of the anti-bot protection (the word "captcha" alone is also in
+# the contact form of the advertisements)
+BLOCKED_MARKERS = ["captcha-delivery.com", "geo.captcha-delivery", "dd_captcha"]
+
+HTTP_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like "
+        "Gecko) Chrome/131.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "es-ES,es;q=0.9",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+
+def make_connection_pool(max_connections: int = 10) -> urllib3.PoolManager:
+    """
+    Creates a pool of keep-alive connections to share between HTTP fetchers.
+
+    Parameters
+    ----------
+    max_connections : Maximum number of open connections per host. The requests wait
+                      for a free connection when all of them are in use.
+
+    Returns
+    -------
+    Pool of connections.
+    """
+
+    return urllib3.PoolManager(
+        maxsize=max_connections,
+        block=True,
+        retries=urllib3.Retry(total=3, backoff_factor=0.5, redirect=5),
+    )
+
+
+def _get_charset(content_type: str) -> str:
+    """
+    Gets the charset of a Content-Type header.
+
+    Parameters
+    ----------
+    content_type : Value of the header.
+
+    Returns
+    -------
+    Charset of the header, utf-8 if it does not have one.
+    """
+
+    for parameter in content_type.split(";")[1:]:
+        name, _, value = parameter.strip().partition("=")
+        if name.lower() == "charset" and value:
+            return value.strip('"')
+    return "utf-8"
+
+
+def looks_blocked(status: int, html: str) -> bool:
+    """
+    Checks if a page looks like a page of the anti-bot protection instead of the
+    requested one.
+
+    Parameters
+    ----------
+    status : Status code of the response.
+    html   : Html of the response.
+
+    Returns
+    -------
+    Boolean indicator.
+    """
+
+    if status in BLOCKED_STATUSES:
+        return True
+    if any(marker in html for marker in BLOCKED_MARKERS):
+        return True
+    return "utag_data" not in html
+
+
+class HttpFetcher:
+    """
+    Class to get the html of the pages with plain HTTP requests, without a browser. The
+    connections are kept alive and shared by all the fetchers created with the same
+    pool of connections. If a page looks blocked, it is fetched again with the fallback
+    fetcher (for example a browser).
+    """
+
+    def __init__(
+        self,
+        http: urllib3.PoolManager | None = None,
+        fallback_factory: Callable[[], Fetcher] | None = None,
+        timeout: float = MAX_TIME_REQUEST,
+        limiter: RateLimiter | None = None,
+    ) -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        http             : Pool of connections. By default a new one is created.
+        fallback_factory : Function that creates the fetcher used for the blocked pages.
+                           If None, the blocked pages are returned as they are.
+        timeout          : Maximum time in seconds of a request.
+        limiter          : Rate limiter of the requests, that can be shared with other
+                           fetchers.
+        """
+
+        self.http = make_connection_pool() if http is None else http
+        self.fallback_factory = fallback_factory
+        self.fallback: Fetcher | None = None
+        self.fallback_lock = threading.Lock()  # a browser is not thread safe
+        self.timeout = timeout
+        self.n_fallbacks = 0  # pages fetched again with the fallback fetcher
+        self.limiter = limiter
+
+    def fetch(self, url: str) -> str:
+        """
+        Gets the html of a url.
+
+        Parameters
+        ----------
+        url : Url of the page.
+
+        Returns
+        -------
+        Html of the page.
+        """
+
+        if self.limiter is not None:
+            self.limiter.acquire(url)
+        try:
+            response = self.http.request(
+                "GET", url, headers=HTTP_HEADERS, timeout=self.timeout
+            )
+        except Exception:
+            if self.limiter is not None:
+                self.limiter.failure(url)
+            raise
+        html = response.data.decode(
+            _get_charset(response.headers.get("Content-Type", "")), errors="replace"
+        )
+
+        blocked = looks_blocked(response.status, html)
+        if self.limiter is not None:
+            if blocked:
+                self.limiter.failure(url)
+            else:
+                self.limiter.success(url)
+
+        if self.fallback_factory is not None and blocked:
+            with self.fallback_lock:
+                if self.fallback is None:
+                    self.fallback = self.fallback_factory()
+                self.n_fallbacks += 1
+                return self.fallback.fetch(url)
+
+        return html
+
+    def close(self) -> None:
+        """
+        Closes the fallback fetcher. The pool of connections is kept, as it can be
+        shared with other fetchers.
+        """
+
+        with self.fallback_lock:
+            if self.fallback is not None:
+                self.fallback.close()
+                self.fallback = None
+
+
+class CachingFetcher:
+    """
+    Class to keep in a cache the html of all the pages got by another fetcher.
+    """
+
+    def __init__(self, fetcher: Fetcher, cache: HtmlCache) -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        fetcher : Fetcher of the pages.
+        cache   : Cache where the pages are stored. It can be shared by many fetchers.
+        """
+
+        self.fetcher = fetcher
+        self.cache = cache
+
+    def fetch(self, url: str) -> str:
+        """
+        Gets the html of a url and stores it in the cache.
+
+        Parameters
+        ----------
+        url : Url of the page.
+
+        Returns
+        -------
+        Html of the page.
+        """
+
+        html = self.fetcher.fetch(url)
+        self.cache.put(url, html)
+        return html
+
+    def close(self) -> None:
+        """
+        Closes the fetcher of the pages. The cache is kept, as it can be shared with
+        other fetchers.
+        """
+
+        self.fetcher.close()
@@ -0,0 +1,222 @@
+"""
+Script for keeping the raw html of the pages fetched, so that the information can be
+extracted again without fetching them. The pages are compressed and stored by the
+hash of their content, and an index gives the pages of each url and crawl time.
+"""
+
+import hashlib
+import lzma
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+
+CODECS = ["lzma", "zlib"]
+LZMA_MAGIC = b"\xfd7zXZ\x00"
+
+
+def compress(data: bytes, codec: str = "lzma") -> bytes:
+    """
+    Compresses a page.
+
+    Parameters
+    ----------
+    data  : Bytes of the page.
+    codec : Compression used, one of CODECS. lzma gives smaller pages (its window
+            covers the whole page, which is very repetitive), zlib is faster.
+
+    Returns
+    -------
+    Compressed bytes.
+    """
+
+    if codec == "lzma":
+        return lzma.compress(data, preset=1)
+    if codec == "zlib":
+        return zlib.compress(data, 6)
+    raise ValueError(f"Unknown codec {codec}, expected one of {CODECS}.")
+
+
+def decompress(data: bytes) -> bytes:
+    """
+    Decompresses a page, detecting the codec used.
+
+    Parameters
+    ----------
+    data : Compressed bytes.
+
+    Returns
+    -------
+    Bytes of the page.
+    """
+
+    if data.startswith(LZMA_MAGIC):
+        return lzma.decompress(data)
+    return zlib.decompress(data)
+
+
+class HtmlCache:
+    """
+    Class for a cache of raw html pages in a directory. Each page is compressed in a
+    file named by the sha256 of its content, so a page fetched twice without changes is
+    stored once, and a sqlite index keeps the url, the crawl time and the hash of each
+    page fetched. It can be shared by the threads of a process and read by several
+    processes at the same time.
+    """
+
+    def __init__(self, directory: str, codec: str = "lzma") -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        directory : Directory of the cache. It is created if it does not exist.
+        codec     : Compression of the new pages, one of CODECS.
+        """
+
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec {codec}, expected one of {CODECS}.")
+
+        self.directory = directory
+        self.codec = codec
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(
+            os.path.join(directory, "index.sqlite"), check_same_thread=False
+        )
+        with self.lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS pages "
+                "(url TEXT NOT NULL, fetched_at REAL NOT NULL, digest TEXT NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS pages_url ON pages (url, fetched_at)"
+            )
+
+    def _path(self, digest: str) -> str:
+        """
+        Gets the path of the file of a page.
+
+        Parameters
+        ----------
+        digest : Hash of the page.
+
+        Returns
+        -------
+        Path of the file.
+        """
+
+        return os.path.join(self.directory, "objects", digest[:2], digest)
+
+    def put(self, url: str, html: str, fetched_at: float | None = None) -> str:
+        """
+        Stores a page.
+
+        Parameters
+        ----------
+        url        : Url of the page.
+        html       : Html of the page.
+        fetched_at : Unix time of the crawl. By default, the current time.
+
+        Returns
+        -------
+        Hash of the page.
+        """
+
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(compress(data, self.codec))
+            os.replace(tmp_path, path)  # readers never see a partial file
+
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO pages VALUES (?, ?, ?)", (url, fetched_at, digest)
+            )
+
+        return digest
+
+    def get(self, digest: str) -> str:
+        """
+        Gets a page by its hash.
+
+        Parameters
+        ----------
+        digest : Hash of the page.
+
+        Returns
+        -------
+        Html of the page.
+        """
+
+        with open(self._path(digest), "rb") as f:
+            return decompress(f.read()).decode("utf-8")
+
+    def latest(self, url: str) -> str | None:
+        """
+        Gets the last page fetched of a url.
+
+        Parameters
+        ----------
+        url : Url of the page.
+
+        Returns
+        -------
+        Html of the page or None if the url is not in the cache.
+        """
+
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT digest FROM pages WHERE url = ? "
+                "ORDER BY fetched_at DESC LIMIT 1",
+                (url,),
+            ).fetchone()
+
+        return None if row is None else self.get(row[0])
+
+    def entries(self, latest_only: bool = True) -> list[tuple[str, float, str]]:
+        """
+        Gets the pages of the cache.
+
+        Parameters
+        ----------
+        latest_only : If True, only the last page fetched of each url is given.
+
+        Returns
+        -------
+        List with the url, the crawl time and the hash of each page, sorted by url and
+        crawl time.
+        """
+
+        if latest_only:
+            query = (
+                "SELECT url, MAX(fetched_at), digest FROM pages "
+                "GROUP BY url ORDER BY url"
+            )
+        else:
+            query = "SELECT url, fetched_at, digest FROM pages ORDER BY url, fetched_at"
+        with self.lock:
+            return self.connection.execute(query).fetchall()
+
+    def close(self) -> None:
+        """
+        Closes the index.
+        """
+
+        with self.lock:
+            self.connection.close()
+
+    def __enter__(self) -> "HtmlCache":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
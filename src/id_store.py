@@ -0,0 +1,414 @@
+"""
+Script for keeping on disk the ids of the houses already scraped, so that a run can
+resume where the previous one stopped without fetching them again, and the
+fingerprints of their cards, so that only the houses that changed are fetched again.
+"""
+
+import os
+from typing import BinaryIO, Iterable
+
+import numpy as np
+
+from src.writer import fsync_dir
+
+
+ID_DTYPE = np.dtype("<i8")
+FINGERPRINT_DTYPE = np.dtype([("id", "<i8"), ("fingerprint", "<i8")])
+
+
+def _load_array(path: str, dtype: np.dtype) -> np.ndarray:
+    """
+    Loads a sorted array of a store, memory-mapped.
+
+    Parameters
+    ----------
+    path  : Path of the array.
+    dtype : Type of the elements of the array.
+
+    Returns
+    -------
+    Array, empty if the file does not exist.
+    """
+
+    if not os.path.exists(path):
+        return np.array([], dtype=dtype)
+    return np.load(path, mmap_mode="r")
+
+
+def _load_log(path: str, dtype: np.dtype) -> np.ndarray:
+    """
+    Loads the elements of the log of a store. A last element cut by a crash is ignored.
+
+    Parameters
+    ----------
+    path  : Path of the log.
+    dtype : Type of the elements of the log.
+
+    Returns
+    -------
+    Array with the elements in the order they were added.
+    """
+
+    if not os.path.exists(path):
+        return np.array([], dtype=dtype)
+    count = os.path.getsize(path) // dtype.itemsize
+    return np.fromfile(path, dtype=dtype, count=count)
+
+
+def _open_log(path: str, dtype: np.dtype) -> BinaryIO:
+    """
+    Opens the log of a store to append elements. A last element cut by a crash is
+    removed first, so that the elements appended after it are read back aligned.
+
+    Parameters
+    ----------
+    path  : Path of the log.
+    dtype : Type of the elements of the log.
+
+    Returns
+    -------
+    Log opened in append mode.
+    """
+
+    if os.path.exists(path):
+        size = os.path.getsize(path)
+        if size % dtype.itemsize:
+            os.truncate(path, size // dtype.itemsize * dtype.itemsize)
+    return open(path, "ab")
+
+
+def _save_array(path: str, array: np.ndarray) -> None:
+    """
+    Saves the sorted array of a store, replacing the old one atomically.
+
+    Parameters
+    ----------
+    path  : Path of the array.
+    array : Array to save.
+    """
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_dir(path)
+
+
+class IdStore:
+    """
+    Class for a persistent set of ids. The ids are kept in a sorted int64 array on disk
+    that is memory-mapped, so a lookup is a binary search that only reads a few pages
+    of the file, and in a log with the ids added since the array was last rewritten.
+    When the log grows, it is merged into the array.
+    """
+
+    def __init__(self, path: str, merge_every: int = 100_000) -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        path        : Path of the store, without extension. The array is saved in
+                      "{path}.npy" and the log in "{path}.log".
+        merge_every : Number of ids in the log that triggers a merge into the array.
+        """
+
+        self.array_path = f"{path}.npy"
+        self.log_path = f"{path}.log"
+        self.merge_every = merge_every
+
+        self.ids = _load_array(self.array_path, ID_DTYPE)
+        self.new_ids: set[int] = {
+            id_
+            for id_ in map(int, _load_log(self.log_path, ID_DTYPE).tolist())
+            if not self._in_array(id_)
+        }
+        self.pending: list[int] = []  # ids added but not written to the log
+        self.log = _open_log(self.log_path, ID_DTYPE)
+
+    def _in_array(self, id_: int) -> bool:
+        """
+        Checks if an id is in the array.
+
+        Parameters
+        ----------
+        id_ : Id.
+
+        Returns
+        -------
+        Boolean indicator.
+        """
+
+        position = np.searchsorted(self.ids, id_)
+        return bool(position < len(self.ids) and self.ids[position] == id_)
+
+    def __contains__(self, id_: object) -> bool:
+        """
+        Checks if an id is in the store.
+        """
+
+        if not isinstance(id_, (int, np.integer)):
+            return False
+        return int(id_) in self.new_ids or self._in_array(int(id_))
+
+    def __len__(self) -> int:
+        """
+        Number of ids in the store.
+        """
+
+        return len(self.ids) + len(self.new_ids)
+
+    def contains_many(self, ids: Iterable[int]) -> np.ndarray:
+        """
+        Checks which ids are in the store.
+
+        Parameters
+        ----------
+        ids : Ids to check.
+
+        Returns
+        -------
+        Boolean array, True for the ids in the store.
+        """
+
+        values = np.fromiter(ids, dtype=ID_DTYPE)
+        positions = np.searchsorted(self.ids, values)
+        found = np.zeros(len(values), dtype=bool)
+        inside = positions < len(self.ids)
+        found[inside] = self.ids[positions[inside]] == values[inside]
+        if self.new_ids:
+            found |= np.isin(values, np.fromiter(self.new_ids, dtype=ID_DTYPE))
+
+        return found
+
+    def filter_new(self, ids: Iterable[int]) -> list[int]:
+        """
+        Keeps the ids that are not in the store.
+
+        Parameters
+        ----------
+        ids : Ids.
+
+        Returns
+        -------
+        Ids not in the store, in the same order.
+        """
+
+        ids_list = list(ids)
+        found = self.contains_many(ids_list)
+        return [id_ for id_, seen in zip(ids_list, found) if not seen]
+
+    def add(self, id_: int) -> None:
+        """
+        Adds an id to the store. It is written to disk in the next flush.
+
+        Parameters
+        ----------
+        id_ : Id.
+        """
+
+        if id_ in self:
+            return
+        self.new_ids.add(int(id_))
+        self.pending.append(int(id_))
+
+    def flush(self) -> None:
+        """
+        Writes to disk the ids added, merging the log into the array if it is too big.
+        """
+
+        if self.pending:
+            self.log.write(np.array(self.pending, dtype=ID_DTYPE).tobytes())
+            self.log.flush()
+            os.fsync(self.log.fileno())
+            self.pending = []
+
+        if len(self.new_ids) >= self.merge_every:
+            self.merge()
+
+    def merge(self) -> None:
+        """
+        Rewrites the array with the ids of the log and empties the log. The array is
+        replaced atomically, so a crash leaves either the old or the new array, and the
+        log is only emptied after it.
+        """
+
+        new_ids = np.fromiter(self.new_ids, dtype=ID_DTYPE)
+        ids = np.union1d(self.ids, new_ids).astype(ID_DTYPE)
+
+        self.ids = ids  # the old array is not mapped while it is replaced
+        _save_array(self.array_path, ids)
+
+        self.log.close()
+        self.log = open(self.log_path, "wb")
+        self.new_ids = set()
+        self.pending = []  # they are already in the array
+        self.ids = _load_array(self.array_path, ID_DTYPE)
+
+    def clear(self) -> None:
+        """
+        Removes all the ids of the store.
+        """
+
+        self.log.close()
+        for path in [self.array_path, self.log_path]:
+            if os.path.exists(path):
+                os.remove(path)
+        self.ids = np.array([], dtype=ID_DTYPE)
+        self.new_ids = set()
+        self.pending = []
+        self.log = open(self.log_path, "ab")
+
+    def close(self) -> None:
+        """
+        Writes to disk the ids added and closes the log.
+        """
+
+        if not self.log.closed:
+            self.flush()
+            self.log.close()
+
+    def __enter__(self) -> "IdStore":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+class FingerprintStore:
+    """
+    Class for a persistent map from ids to fingerprints (hashes of the information of
+    the houses), with the same layout as IdStore: a memory-mapped array of records
+    sorted by id and a log with the records set since the array was last rewritten.
+    """
+
+    def __init__(self, path: str, merge_every: int = 100_000) -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        path        : Path of the store, without extension. The array is saved in
+                      "{path}.npy" and the log in "{path}.log".
+        merge_every : Number of records in the log that triggers a merge into the array.
+        """
+
+        self.array_path = f"{path}.npy"
+        self.log_path = f"{path}.log"
+        self.merge_every = merge_every
+
+        self.records = _load_array(self.array_path, FINGERPRINT_DTYPE)
+        log = _load_log(self.log_path, FINGERPRINT_DTYPE)
+        self.new_records = dict(zip(log["id"].tolist(), log["fingerprint"].tolist()))
+        self.pending: list[tuple[int, int]] = []  # records not written to the log
+        self.log = _open_log(self.log_path, FINGERPRINT_DTYPE)
+
+    def get(self, id_: int) -> int | None:
+        """
+        Gets the fingerprint of an id.
+
+        Parameters
+        ----------
+        id_ : Id.
+
+        Returns
+        -------
+        Fingerprint or None if the id is not in the store.
+        """
+
+        if id_ in self.new_records:
+            return self.new_records[id_]
+
+        ids = self.records["id"]
+        position = np.searchsorted(ids, id_)
+        if position < len(ids) and ids[position] == id_:
+            return int(self.records["fingerprint"][position])
+        return None
+
+    def __len__(self) -> int:
+        """
+        Number of ids in the store.
+        """
+
+        new_ids = np.fromiter(self.new_records, dtype=ID_DTYPE)
+        return len(self.records) + int((~np.isin(new_ids, self.records["id"])).sum())
+
+    def set(self, id_: int, fingerprint: int) -> None:
+        """
+        Sets the fingerprint of an id. It is written to disk in the next flush.
+
+        Parameters
+        ----------
+        id_         : Id.
+        fingerprint : Fingerprint.
+        """
+
+        if self.get(id_) == fingerprint:
+            return
+        self.new_records[int(id_)] = int(fingerprint)
+        self.pending.append((int(id_), int(fingerprint)))
+
+    def flush(self) -> None:
+        """
+        Writes to disk the records set, merging the log into the array if it is too big.
+        """
+
+        if self.pending:
+            self.log.write(np.array(self.pending, dtype=FINGERPRINT_DTYPE).tobytes())
+            self.log.flush()
+            os.fsync(self.log.fileno())
+            self.pending = []
+
+        if len(self.new_records) >= self.merge_every:
+            self.merge()
+
+    def merge(self) -> None:
+        """
+        Rewrites the array with the records of the log and empties the log. The array
+        is replaced atomically and the log is only emptied after it.
+        """
+
+        new_records = np.array(list(self.new_records.items()), dtype=FINGERPRINT_DTYPE)
+        kept = self.records[~np.isin(self.records["id"], new_records["id"])]
+        records = np.concatenate([kept, new_records])
+        records.sort(order="id")
+
+        self.records = records  # the old array is not mapped while it is replaced
+        _save_array(self.array_path, records)
+
+        self.log.close()
+        self.log = open(self.log_path, "wb")
+        self.new_records = {}
+        self.pending = []  # they are already in the array
+        self.records = _load_array(self.array_path, FINGERPRINT_DTYPE)
+
+    def clear(self) -> None:
+        """
+        Removes all the records of the store.
+        """
+
+        self.log.close()
+        for path in [self.array_path, self.log_path]:
+            if os.path.exists(path):
+                os.remove(path)
+        self.records = np.array([], dtype=FINGERPRINT_DTYPE)
+        self.new_records = {}
+        self.pending = []
+        self.log = open(self.log_path, "ab")
+
+    def close(self) -> None:
+        """
+        Writes to disk the records set and closes the log.
+        """
+
+        if not self.log.closed:
+            self.flush()
+            self.log.close()
+
+    def __enter__(self) -> "FingerprintStore":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
@@ -2,106 +2,380 @@
 Script to obtain the information of all the houses of a particular zone.
 """
 
+import os
+from typing import Iterator, cast
+
 import pandas as pd
-from bs4 import BeautifulSoup
-import undetected_chromedriver as uc
-from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import WebDriverException
+from urllib3.exceptions import HTTPError
 
+from src.browser_pool import BrowserPool, PooledFetcher
+from src.cards import card_fingerprint
+from src.fetchers import (
+    CachingFetcher,
+    Fetcher,
+    HttpFetcher,
+    make_connection_pool,
+)
+from src.html_cache import HtmlCache
+from src.id_store import FingerprintStore, IdStore
+from src.memory import MemoryTracker
+from src.page_status import CircuitBreaker
+from src.pipeline import Pipeline
+from src.pool import FetchPool
+from src.rate_limiter import RateLimiter
+from src.schema import HOUSE_SCHEMA
 from src.scraping_ids import IdsScraping
-from src.scraping_house import HouseScraping
-from src.utils import wait
+from src.writer import OUTPUT_FORMATS, IncrementalWriter, compact, read_journal
 
 
 IDS_PATH = "data/results/house_ids.csv"
-HOUSES_PATH = "data/results/houses_df.csv"
+IDS_CHECKPOINT_PATH = "data/results/house_ids.jsonl"
+SCRAPED_IDS_PATH = "data/results/scraped_ids"
+FINGERPRINTS_PATH = "data/results/fingerprints"
+HOUSES_PATH = "data/results/houses_df"  # with the extension of the output format
+HOUSES_JOURNAL_PATH = "data/results/houses.jsonl"
+HTML_CACHE_PATH = "data/cache"
+BROWSER_PROFILES_PATH = "data/profiles"
+CARDS_PATH = "data/results/cards_df.csv"
+CARDS_JOURNAL_PATH = "data/results/cards.jsonl"
+FETCH_MODES = ["browser", "http"]
 
 
-def _save_df(house_dfs: list[pd.DataFrame]) -> None:
+def _get_house_url(house_id: int) -> str:
     """
-    Saves the list of dfs to a unified df.
+    Gets the url of a given house.
 
     Parameters
     ----------
-    house_dfs : List with the df of each house.
+    house_id : Id of the house.
+
+    Returns
+    -------
+    Url of the advertisement.
     """
 
-    df = pd.DataFrame(house_dfs)
-    cols = ["id"] + [col for col in df.columns if col != "id"]
-    df = df[cols]
-    df.to_csv(HOUSES_PATH, index=False)
+    return f"https://www.idealista.com/inmueble/{house_id}/"
 
 
-def _get_soup(browser: uc.Chrome, url: str) -> BeautifulSoup:
+def skip_house(
+    house_id: int,
+    fingerprint: int | None,
+    scraped_ids: IdStore,
+    fingerprints: FingerprintStore,
+    done_ids: set[int] | None = None,
+) -> bool:
     """
-    Gets the soup of a given house.
+    Decides if a house of the zone is not scraped in this run.
 
     Parameters
     ----------
-    browser : Browser.
-    url     : Url of the house.
+    house_id     : Id of the house.
+    fingerprint  : Fingerprint of the card of the house, None if the cards are not read.
+    scraped_ids  : Houses already scraped by the full runs.
+    fingerprints : Fingerprints of the cards of the houses scraped by the full runs.
+    done_ids     : Houses already in the results of a run of some fields, None in a
+                   full run. These runs only skip them, since the houses scraped by the
+                   full runs are not in their results.
 
     Returns
     -------
-    Soup with the information.
+    True if the house is skipped.
+    """
+
+    if done_ids is not None:
+        return house_id in done_ids
+    if fingerprint is not None:  # houses whose card did not change are skipped
+        return fingerprints.get(house_id) == fingerprint
+    return house_id in scraped_ids  # houses already scraped are skipped
+
+
+def _save_cards(obtainer: IdsScraping, save_every: int) -> None:
+    """
+    Saves the information of the cards of the advertisements of a zone.
+
+    Parameters
+    ----------
+    obtainer   : Scraper of the pages of the zone, created with read_cards=True.
+    save_every : Number of cards between two flushes to disk.
     """
 
-    wait()
-    browser.get(url)
-    wait()
-    try:  # disagree with cookies
-        browser.find_element(
-            "xpath", "//*[@id='didomi-notice-disagree-button']"
-        ).click()
-    except NoSuchElementException:
-        pass
-    html = browser.page_source
-    soup = BeautifulSoup(html, "lxml")
+    with IncrementalWriter(
+        CARDS_JOURNAL_PATH, fsync_every=save_every, overwrite=True
+    ) as writer:
+        for card in obtainer.iter_cards():
+            writer.write(card)
 
-    return soup
+    compact(CARDS_JOURNAL_PATH, CARDS_PATH)
+    print(f"Obtained the cards of {writer.n_records} houses.")
 
 
-def main(base_url: str, save_every: int = 5) -> None:
+def main(
+    base_url: str,
+    save_every: int = 5,
+    use_utag: bool = False,
+    parser: str = "lxml",
+    n_workers: int = 1,
+    n_processes: int | None = None,
+    fetch_mode: str = "browser",
+    resume: bool = True,
+    cache_html: bool = True,
+    stream_ids: bool = True,
+    listing_only: bool = False,
+    detect_changes: bool = True,
+    newest_only: bool = False,
+    stop_overlap: float = 1.0,
+    output_format: str = "csv",
+    fields: list[str] | None = None,
+    trace_memory: bool = False,
+) -> None:
     """
     Scraping of all houses of a given zone.
 
     Parameters
     ----------
-    base_url    : Url of the zone.
-    print_every : To save the progress of the scraping of the house ids.
+    base_url       : Url of the zone.
+    save_every     : Number of houses between two flushes of the results to disk and
+                     two progress messages.
+    use_utag       : If True, the fields in the utag data of each advertisement are
+                     read from it instead of from the html.
+    parser         : Parser used for the html of the pages, one of PARSERS.
+    n_workers      : Number of browsers scraping the houses at the same time. The rate
+                     of the requests is limited by a rate limiter shared by all of
+                     them.
+    n_processes    : Number of processes extracting the information of the houses. By
+                     default, the number of cores.
+    fetch_mode     : "browser" to get the houses with Chrome or "http" to get them
+                     with plain HTTP requests, using Chrome only for the pages that
+                     look blocked.
+    resume         : If True, the pages of the zone and the houses obtained by previous
+                     runs are not fetched again and the new houses are added to the
+                     results. Otherwise the results of previous runs are removed.
+    cache_html     : If True, the html of the houses is kept in the html cache, so that
+                     their information can be obtained again with src.reextract.
+    stream_ids     : If True, the houses are scraped as soon as their ids are obtained,
+                     while the rest of the pages of the zone are fetched one after the
+                     other. Otherwise all the pages of the zone are fetched first, at
+                     the same time with the pool of workers.
+    listing_only   : If True, only the pages of the zone are fetched and the
+                     information shown in the cards of the advertisements (price,
+                     rooms, m2, floor...) is saved in CARDS_PATH, without loading the
+                     page of each house.
+    detect_changes : If True, the cards of the advertisements are read from the pages
+                     of the zone and only the houses that are new or whose card (price,
+                     title or number of photos) changed since the last run are
+                     scraped. The results of the rest of houses are kept and the csv
+                     has the houses of the zone in this run. Otherwise, with resume,
+                     the houses already scraped are never scraped again.
+    newest_only    : If True, the pages of the zone are sorted by publication date and
+                     they stop at the first page made of houses already scraped, so
+                     only the new houses are obtained. The csv keeps the houses of the
+                     previous runs.
+    stop_overlap   : With newest_only, fraction of the houses of a page that must be
+                     already scraped to stop.
+    output_format  : Format of the results, one of OUTPUT_FORMATS. Both have the types
+                     of HOUSE_SCHEMA, but parquet keeps them in the file and is read
+                     faster and with less memory. It needs pyarrow.
+    fields         : Fields obtained of each house, of HouseScraping.EXTRACTORS, for
+                     example ["price", "m2"] to follow the prices. Only their
+                     extractors are run and the results are saved apart, for example
+                     in houses_df_price_m2.csv. These runs do not mark the houses as
+                     scraped and they do not skip the houses scraped by the full runs.
+                     By default, all of them.
+    trace_memory   : If True, the peak of memory of the scraping, of the extraction of
+                     a page and of the compaction is measured with tracemalloc and
+                     shown at the end. It slows down the run.
     """
 
-    # Obtain house ids
-    obtainer = IdsScraping(base_url)
-    house_ids = obtainer.obtain_ids()
-    house_ids_df = pd.DataFrame({"house_id": house_ids})
-    house_ids_df.to_csv(IDS_PATH, index=False)
+    if fetch_mode not in FETCH_MODES:
+        raise ValueError(
+            f"Unknown fetch mode {fetch_mode}, expected one of {FETCH_MODES}."
+        )
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(
+            f"Unknown output format {output_format}, expected one of {OUTPUT_FORMATS}."
+        )
 
-    browser = uc.Chrome()
+    # All the requests share the same rate limiter, so the rate to Idealista is the
+    # same whatever the number of workers
+    limiter = RateLimiter()
 
-    # Obtain info for each house
-    house_dfs: list[pd.DataFrame] = []
-    for i, house_id in enumerate(house_ids):
-        # Save progress
-        if i % save_every == 0 and i > 0:
-            print(f"Scraped id's: {i}/{len(house_ids)}")
-            _save_df(house_dfs)
+    # Pool of workers for the pages of the zone and for the houses. The browsers are
+    # kept warm in a pool shared by the pages of the zone and the houses, with one
+    # more browser for the pages of the zone when they are streamed. Each place of the
+    # pool keeps its profile between runs, with the cookies and the cache.
+    http = make_connection_pool(n_workers) if fetch_mode == "http" else None
+    cache = HtmlCache(HTML_CACHE_PATH) if cache_html else None
+    browsers = BrowserPool(n_workers + 1, profiles_directory=BROWSER_PROFILES_PATH)
 
-        # Get house url
-        url = f"https://www.idealista.com/inmueble/{house_id}/"
+    def fetcher_factory() -> Fetcher:
+        if http is not None:
+            fetcher: Fetcher = HttpFetcher(
+                http, lambda: PooledFetcher(browsers, limiter), limiter=limiter
+            )
+        else:
+            fetcher = PooledFetcher(browsers, limiter)
+        return fetcher if cache is None else CachingFetcher(fetcher, cache)
 
-        # Get house soup
-        soup = _get_soup(browser, url)
+    # In http mode, an error of the connections also means that the fetcher crashed
+    crash_exceptions: tuple[type[BaseException], ...] = (WebDriverException,)
+    if http is not None:
+        crash_exceptions += (HTTPError,)
+    pool = FetchPool(
+        fetcher_factory, n_workers, pace=lambda: 0.0, crash_exceptions=crash_exceptions
+    )
 
-        # Get house info
-        scraper = HouseScraping(soup)
-        house_info = scraper.get_house_information()
+    if listing_only:
+        obtainer = IdsScraping(
+            base_url,
+            parser,
+            IDS_CHECKPOINT_PATH if resume else None,
+            limiter,
+            pool,
+            read_cards=True,
+            browser=browsers,
+        )
+        with browsers:
+            _save_cards(obtainer, save_every)
+        return
+
+    # Obtain house ids. When they are streamed, the houses are scraped while the pages
+    # of the zone are obtained, so these pages are fetched one after the other by the
+    # obtainer instead of by the pool of workers.
+    # The runs of some fields do not mark the houses as scraped, so that a later full
+    # run does not skip the houses they scraped
+    partial = fields is not None
+    scraped_ids = IdStore(SCRAPED_IDS_PATH)
+    fingerprints = FingerprintStore(FINGERPRINTS_PATH)
+    if not resume and not partial:
+        scraped_ids.clear()
+        fingerprints.clear()
+    obtainer = IdsScraping(
+        base_url,
+        parser,
+        IDS_CHECKPOINT_PATH if resume else None,
+        limiter,
+        None if stream_ids else pool,
+        read_cards=detect_changes,
+        newest_first=newest_only,
+        known_ids=scraped_ids,
+        stop_overlap=stop_overlap,
+        browser=browsers,
+    )
+    house_ids: list[int] = []
+    new_fingerprints: dict[int, int] = {}  # saved only after their houses
+
+    # The runs of some fields have their own journal and results, so that their records
+    # do not replace the full ones. They scrape all the houses of the zone, skipping
+    # only the ones already in their journal when they are resumed.
+    suffix = "" if fields is None else "_" + "_".join(fields)
+    journal_path = f"{os.path.splitext(HOUSES_JOURNAL_PATH)[0]}{suffix}.jsonl"
+    done_ids: set[int] | None = None
+    if partial:
+        done_ids = set()
+        if resume and os.path.exists(journal_path):
+            journal = read_journal(journal_path)
+            if "id" in journal.columns:
+                done_ids = set(journal["id"].astype(int))
+
+    def get_new_ids() -> Iterator[int]:
+        n_skipped = 0
+        listings: Iterator[tuple[int, int | None]]
+        if detect_changes:
+            listings = (
+                (cast(int, card["id"]), card_fingerprint(card))
+                for card in obtainer.iter_cards()
+            )
+        else:
+            listings = ((house_id, None) for house_id in obtainer.iter_ids())
+
+        for house_id, fingerprint in listings:
+            house_ids.append(house_id)
+            if skip_house(house_id, fingerprint, scraped_ids, fingerprints, done_ids):
+                n_skipped += 1
+                continue
+            if fingerprint is not None:
+                new_fingerprints[house_id] = fingerprint
+            yield house_id
+
+        house_ids_df = pd.DataFrame({"house_id": house_ids})
+        house_ids_df.to_csv(IDS_PATH, index=False)
+        if n_skipped:
+            if partial:
+                reason = "already in the results of the fields"
+            else:
+                reason = "unchanged" if detect_changes else "already scraped"
+            print(
+                f"Skipped {n_skipped}/{len(house_ids)} houses {reason}, "
+                f"{n_skipped} page loads saved."
+            )
+
+    # The blocked and malformed pages are fetched again later and all the workers are
+    # paused when too many pages are blocked
+    breaker = CircuitBreaker()
+    pipeline = Pipeline(
+        pool,
+        n_processes,
+        use_utag=use_utag,
+        parser=parser,
+        breaker=breaker,
+        fields=fields,
+        trace_memory=trace_memory,
+    )
+
+    # Obtain info for each house. Each house is appended to a journal as soon as it is
+    # scraped and the journal is compacted to the csv at the end.
+    writer = IncrementalWriter(
+        journal_path, fsync_every=save_every, overwrite=not resume
+    )
+
+    def write(house_id: int, house_info: dict[str, int | str | bool | None]) -> None:
         house_info["id"] = house_id
-        house_dfs.append(house_info)
-    try:
-        browser.quit()
-    except Exception as e:
-        print(f"Scraping was ok, but there was an error when closing the browser: {e}.")
-    _save_df(house_dfs)
+        writer.write(house_info)
+        fingerprint = new_fingerprints.pop(house_id, None)
+        if not partial:
+            scraped_ids.add(house_id)
+            if fingerprint is not None:
+                fingerprints.set(house_id, fingerprint)
+        if writer.pending == 0:  # the ids are only saved after their houses
+            scraped_ids.flush()
+            fingerprints.flush()
+
+        # Show progress
+        if writer.n_records % save_every == 0:
+            print(f"Scraped id's: {writer.n_records}/{len(house_ids)}")
+
+    # The records are written as soon as they are extracted and only a few pages are
+    # kept at the same time, so the memory of the scraping does not grow with the
+    # number of houses
+    memory = MemoryTracker(trace_memory)
+    with memory.stage("scraping"), scraped_ids, fingerprints, writer, browsers:
+        new_ids = get_new_ids() if stream_ids else list(get_new_ids())
+        pipeline.run(new_ids, _get_house_url, write)
+    memory.add("extraction per page", pipeline.stats[1].peak_memory)
+    print(pipeline.report())
+    print(pipeline.pages_report())
+    print(pipeline.extractors_report())
+    print(breaker.report())
+    print(limiter.report())
+    print(browsers.report())
+    if cache is not None:
+        cache.close()
+
+    if pipeline.failed:
+        print(f"{len(pipeline.failed)} houses were not scraped, run again to retry.")
+    # The houses not scraped again keep their last record of the journal. With
+    # newest_only, the pages of the zone obtained do not have all its houses.
+    snapshot = detect_changes and not newest_only
+    with memory.stage("compaction"):
+        compact(
+            journal_path,
+            f"{HOUSES_PATH}{suffix}.{output_format}",
+            keep_ids=house_ids if snapshot else None,
+            schema=HOUSE_SCHEMA,
+        )
+    if trace_memory:
+        print(memory.report())
 
 
 if __name__ == "__main__":
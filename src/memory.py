@@ -0,0 +1,99 @@
+"""
+Script for measuring with tracemalloc the peak of the memory allocated in each stage of
+a run, so that it can be checked that the memory does not grow with the number of
+houses. Only the memory allocated by python is traced, the trees of the "lxml-native"
+parser are allocated by libxml2 and are not counted.
+"""
+
+import tracemalloc
+from contextlib import contextmanager
+from typing import Iterator
+
+
+MB = 1024 * 1024
+
+
+def start_tracing() -> bool:
+    """
+    Starts tracing the memory allocations if they are not traced yet, and starts a new
+    peak.
+
+    Returns
+    -------
+    True if the tracing was started by this call.
+    """
+
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    return started
+
+
+class MemoryTracker:
+    """
+    Class to keep the peak of memory of each stage of a run. The peaks of several
+    measures of the same stage (for example, of each page extracted in another process)
+    are joined keeping the maximum.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        enabled : If False, nothing is traced, since tracing slows down the
+                  allocations.
+        """
+
+        self.enabled = enabled
+        self.peaks: dict[str, float] = {}  # bytes of each stage
+
+    def add(self, name: str, peak: float) -> None:
+        """
+        Adds a peak of memory of a stage measured elsewhere.
+
+        Parameters
+        ----------
+        name : Name of the stage.
+        peak : Peak of memory in bytes.
+        """
+
+        self.peaks[name] = max(self.peaks.get(name, 0.0), peak)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Measures the peak of memory while the block is executed.
+
+        Parameters
+        ----------
+        name : Name of the stage.
+        """
+
+        if not self.enabled:
+            yield
+            return
+
+        started = start_tracing()
+        try:
+            yield
+        finally:
+            self.add(name, tracemalloc.get_traced_memory()[1])
+            if started:
+                tracemalloc.stop()
+
+    def report(self) -> str:
+        """
+        Summarises the peaks of memory.
+
+        Returns
+        -------
+        Line with the peak of memory of each stage.
+        """
+
+        peaks = ", ".join(
+            f"{name}: {peak / MB:.1f} MB" for name, peak in self.peaks.items()
+        )
+        return f"Peak memory {peaks}"
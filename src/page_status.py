@@ -0,0 +1,158 @@
+"""
+Script for classifying the pages of the houses before extracting their information,
+so that a page of the anti-bot protection, a removed advertisement or a page loaded
+by halves does not stop the run, and for pausing the requests when too many pages are
+blocked.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+from src.fetchers import BLOCKED_MARKERS, BLOCKED_STATUSES, HOUSE_READY_SELECTOR
+from src.utag import get_utag_data
+
+
+PAGE_STATUSES = ["ok", "blocked", "gone", "malformed"]
+
+# The pages of the anti-bot protection are small, the pages of the houses are hundreds
+# of KB
+MIN_HOUSE_SIZE = 20_000
+GONE_STATUSES = {"404", "410"}
+GONE_MARKERS = ["ya no está publicado"]
+TITLE_MARKER = HOUSE_READY_SELECTOR.lstrip(".")
+
+
+def classify_house_page(html: str) -> str:
+    """
+    Classifies the page of a house with cheap checks of its size, its markers and the
+    status code of its utag data, without parsing it.
+
+    Parameters
+    ----------
+    html : Html of the page.
+
+    Returns
+    -------
+    One of PAGE_STATUSES: "blocked" for the pages of the anti-bot protection, "gone"
+    for the removed advertisements, "malformed" for the pages without the information
+    of the house and "ok" for the rest.
+    """
+
+    if any(marker in html for marker in BLOCKED_MARKERS):
+        return "blocked"
+
+    utag_data = get_utag_data(html)
+    if utag_data is None:
+        return "blocked" if len(html) < MIN_HOUSE_SIZE else "malformed"
+
+    response = utag_data.get("response")
+    status = str(response.get("statusCode", "")) if isinstance(response, dict) else ""
+    if status in GONE_STATUSES or any(marker in html for marker in GONE_MARKERS):
+        return "gone"
+    if status.isdigit() and int(status) in BLOCKED_STATUSES:
+        return "blocked"
+
+    if len(html) < MIN_HOUSE_SIZE or TITLE_MARKER not in html:
+        return "malformed"
+    return "ok"
+
+
+class CircuitBreaker:
+    """
+    Class to pause all the fetchers when too many of the last pages were blocked. The
+    pause is doubled each time the breaker opens again without a good window of pages
+    in between.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.5,
+        window: int = 20,
+        pause: float = 60.0,
+        max_pause: float = 900.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        threshold : Fraction of blocked pages in the window above which the breaker
+                    opens.
+        window    : Number of last pages considered.
+        pause     : Seconds of the first pause.
+        max_pause : Maximum seconds of a pause.
+        clock     : Function that gives the current time in seconds.
+        sleep     : Function that waits some seconds.
+        """
+
+        if not 0 < threshold < 1:
+            raise ValueError(f"Expected 0 < threshold < 1, got {threshold}.")
+
+        self.threshold = threshold
+        self.window = window
+        self.pause = pause
+        self.max_pause = max_pause
+        self.clock = clock
+        self.sleep = sleep
+
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.next_pause = pause
+        self.open_until = 0.0
+        self.trips = 0
+        self.paused_time = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, blocked: bool) -> None:
+        """
+        Adds the outcome of a page, opening the breaker if the window has too many
+        blocked pages.
+
+        Parameters
+        ----------
+        blocked : If True, the page was blocked.
+        """
+
+        with self.lock:
+            self.outcomes.append(blocked)
+            if len(self.outcomes) < self.window:
+                return
+
+            if sum(self.outcomes) / self.window > self.threshold:
+                self.open_until = self.clock() + self.next_pause
+                self.next_pause = min(self.max_pause, 2 * self.next_pause)
+                self.trips += 1
+                self.outcomes.clear()
+            elif not blocked:
+                self.next_pause = self.pause
+
+    def wait(self) -> float:
+        """
+        Waits while the breaker is open. The fetchers call it before each request.
+
+        Returns
+        -------
+        Seconds waited.
+        """
+
+        with self.lock:
+            wait_time = max(0.0, self.open_until - self.clock())
+            self.paused_time += wait_time
+
+        if wait_time > 0:
+            self.sleep(wait_time)
+        return wait_time
+
+    def report(self) -> str:
+        """
+        Summarises the pauses of the breaker.
+
+        Returns
+        -------
+        Line with the number of pauses and the seconds paused by the fetchers.
+        """
+
+        return f"Circuit breaker pauses: {self.trips}, paused: {self.paused_time:.2f} s"
@@ -0,0 +1,299 @@
+"""
+Script for parsing the html of the pages with different backends. The BeautifulSoup
+backends ("lxml" and "html.parser") build a soup, while the "lxml-native" backend builds
+a lxml tree wrapped so that it can be used as a soup by the scrapers.
+"""
+
+from typing import Any, Iterator
+import lxml.html
+from bs4 import BeautifulSoup, SoupStrainer
+
+
+PARSERS = ["lxml", "html.parser", "lxml-native"]
+
+
+def _match_class(class_value: str | None, class_: str) -> bool:
+    """
+    Checks if a class attribute matches a class with the rules of BeautifulSoup.
+
+    Parameters
+    ----------
+    class_value : Class attribute of the element.
+    class_      : Class to match, one of the classes or the full class string.
+
+    Returns
+    -------
+    Boolean indicator.
+    """
+
+    if class_value is None:
+        return False
+    classes = class_value.split()
+    return class_ in classes or class_ == " ".join(classes)
+
+
+class LxmlElement:
+    """
+    Class to wrap an element of a lxml tree with the part of the interface of the
+    BeautifulSoup tags used by the scrapers.
+    """
+
+    __slots__ = ("element",)
+
+    def __init__(self, element: lxml.html.HtmlElement) -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        element : Element of the lxml tree.
+        """
+
+        self.element = element
+
+    def __eq__(self, other: object) -> bool:
+        """
+        Two wrappers are equal if they wrap the same element.
+        """
+
+        return isinstance(other, LxmlElement) and self.element is other.element
+
+    def __hash__(self) -> int:
+        """
+        Hash of the wrapped element.
+        """
+
+        return hash(self.element)
+
+    @property
+    def name(self) -> str:
+        """
+        Tag of the element.
+        """
+
+        return self.element.tag
+
+    @property
+    def text(self) -> str:
+        """
+        Text of the element and all its descendants.
+        """
+
+        return self.element.text_content()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Gets an attribute of the element.
+
+        Parameters
+        ----------
+        key     : Name of the attribute.
+        default : Value returned if the element does not have the attribute.
+
+        Returns
+        -------
+        Value of the attribute.
+        """
+
+        return self.element.get(key, default)
+
+    def _iter(self) -> Iterator[lxml.html.HtmlElement]:
+        """
+        Iterates over the elements where the searches are done.
+
+        Returns
+        -------
+        Iterator over the descendants of the element.
+        """
+
+        return self.element.iterdescendants()
+
+    def _filter(
+        self, name: str | bool | None, attrs: dict[str, str] | None
+    ) -> Iterator["LxmlElement"]:
+        """
+        Iterates over the elements with the given tag and attributes.
+
+        Parameters
+        ----------
+        name  : Tag of the elements. True or None for any tag.
+        attrs : Attributes of the elements. The class follows the rules of
+                BeautifulSoup.
+
+        Returns
+        -------
+        Iterator over the elements, in document order.
+        """
+
+        for element in self._iter():
+            tag = element.tag
+            if not isinstance(tag, str):  # comments and processing instructions
+                continue
+            if isinstance(name, str) and tag != name:
+                continue
+            if attrs and not all(
+                (
+                    _match_class(element.get("class"), value)
+                    if key == "class"
+                    else element.get(key) == value
+                )
+                for key, value in attrs.items()
+            ):
+                continue
+            yield LxmlElement(element)
+
+    def find(
+        self, name: str | bool | None = None, attrs: dict[str, str] | None = None
+    ) -> "LxmlElement | None":
+        """
+        Gets the first element with the given tag and attributes.
+
+        Parameters
+        ----------
+        name  : Tag of the element. True or None for any tag.
+        attrs : Attributes of the element.
+
+        Returns
+        -------
+        First element found or None if there is not any.
+        """
+
+        return next(self._filter(name, attrs), None)
+
+    def find_all(
+        self, name: str | bool | None = None, attrs: dict[str, str] | None = None
+    ) -> list["LxmlElement"]:
+        """
+        Gets all the elements with the given tag and attributes.
+
+        Parameters
+        ----------
+        name  : Tag of the elements. True or None for any tag.
+        attrs : Attributes of the elements.
+
+        Returns
+        -------
+        Elements found, in document order.
+        """
+
+        return list(self._filter(name, attrs))
+
+
+class LxmlDocument(LxmlElement):
+    """
+    Class to wrap a lxml tree as a document. As in BeautifulSoup, the searches include
+    the root element. The searches can be restricted to some subtrees.
+    """
+
+    __slots__ = ("roots",)
+
+    def __init__(
+        self,
+        element: lxml.html.HtmlElement,
+        roots: list[lxml.html.HtmlElement] | None = None,
+    ) -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        element : Root of the lxml tree.
+        roots   : Subtrees where the searches are done. By default the whole tree.
+        """
+
+        super().__init__(element)
+        self.roots = [element] if roots is None else roots
+
+    def _iter(self) -> Iterator[lxml.html.HtmlElement]:
+        """
+        Iterates over the elements where the searches are done.
+
+        Returns
+        -------
+        Iterator over the elements of the subtrees, in document order.
+        """
+
+        for root in self.roots:
+            yield from root.iter()
+
+
+Document = BeautifulSoup | LxmlDocument
+
+
+def _class_strainer(classes: set[str]) -> SoupStrainer:
+    """
+    Builds a strainer that keeps the elements with any of the given classes.
+
+    Parameters
+    ----------
+    classes : Classes of the elements to keep.
+
+    Returns
+    -------
+    Strainer for BeautifulSoup.
+    """
+
+    def match(class_value: str | None) -> bool:
+        # While parsing, the class attribute is the full string of classes
+        return class_value is not None and not classes.isdisjoint(class_value.split())
+
+    return SoupStrainer(class_=match)
+
+
+def _class_roots(
+    root: lxml.html.HtmlElement, classes: set[str]
+) -> list[lxml.html.HtmlElement]:
+    """
+    Gets the outermost elements of a lxml tree with any of the given classes.
+
+    Parameters
+    ----------
+    root    : Root of the lxml tree.
+    classes : Classes of the elements.
+
+    Returns
+    -------
+    Elements found, in document order, without the ones inside another one.
+    """
+
+    roots: list[lxml.html.HtmlElement] = []
+    for element in root.xpath("//*[@class]"):
+        if classes.isdisjoint(element.get("class").split()):
+            continue
+        if not any(ancestor in roots for ancestor in element.iterancestors()):
+            roots.append(element)
+
+    return roots
+
+
+def parse_html(
+    html: str, parser: str = "lxml", only_classes: set[str] | None = None
+) -> Document:
+    """
+    Parses the html of a page.
+
+    Parameters
+    ----------
+    html         : Html of the page.
+    parser       : Backend used, one of PARSERS.
+    only_classes : If given, only the subtrees of the elements with any of these
+                   classes are kept (BeautifulSoup backends) or searched (lxml-native
+                   backend).
+
+    Returns
+    -------
+    Document that can be used as a soup by the scrapers.
+    """
+
+    if parser not in PARSERS:
+        raise ValueError(f"Unknown parser {parser}, expected one of {PARSERS}.")
+
+    if parser == "lxml-native":
+        root = lxml.html.document_fromstring(html)
+        if only_classes is None:
+            return LxmlDocument(root)
+        return LxmlDocument(root, _class_roots(root, only_classes))
+
+    if only_classes is None:
+        return BeautifulSoup(html, parser)
+    return BeautifulSoup(html, parser, parse_only=_class_strainer(only_classes))
@@ -0,0 +1,622 @@
+"""
+Script for scraping the houses with a pipeline of stages that run at the same time:
+the fetch of the pages (pool of workers), the extraction of the information (pool of
+processes) and the writing of the results.
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import tracemalloc
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Iterable, cast
+
+from src.memory import MB, start_tracing
+from src.page_status import PAGE_STATUSES, CircuitBreaker, classify_house_page
+from src.parsers import parse_html
+from src.pool import FetchPool
+from src.scraping_house import EXTRACTION_ERRORS, HouseScraping, HouseValue
+from src.utag import UtagHouseScraping
+
+
+HouseInformation = dict[str, HouseValue]
+
+_DONE = object()
+
+
+def extract_house_fields(
+    html: str,
+    use_utag: bool = False,
+    parser: str = "lxml",
+    fields: list[str] | None = None,
+) -> tuple[HouseInformation, list[str]]:
+    """
+    Gets the information of a house from its html and the extractors that were run for
+    it.
+
+    Parameters
+    ----------
+    html     : Html of the advertisement.
+    use_utag : If True, the fields in the utag data of the page are read from it and
+               only the rest of the page is parsed.
+    parser   : Parser used for the html, one of PARSERS.
+    fields   : Fields to obtain, of HouseScraping.EXTRACTORS. By default, all of them.
+
+    Returns
+    -------
+    Dict with the information of the house and fields whose extractor was run, in
+    order. With use_utag, the fields read from the utag data are not in them.
+    """
+
+    scraper: HouseScraping | UtagHouseScraping
+    if use_utag:
+        scraper = UtagHouseScraping(html, parser)
+    else:
+        scraper = HouseScraping(parse_html(html, parser))
+    try:
+        return scraper.get_house_information(fields), scraper.extracted
+    finally:  # the tree is freed as soon as the page is extracted
+        scraper.close()
+
+
+def extract_house_information(
+    html: str,
+    use_utag: bool = False,
+    parser: str = "lxml",
+    fields: list[str] | None = None,
+) -> HouseInformation:
+    """
+    Gets the information of a house from its html.
+
+    Parameters
+    ----------
+    html     : Html of the advertisement.
+    use_utag : If True, the fields in the utag data of the page are read from it and
+               only the rest of the page is parsed.
+    parser   : Parser used for the html, one of PARSERS.
+    fields   : Fields to obtain, of HouseScraping.EXTRACTORS. By default, all of them.
+
+    Returns
+    -------
+    Dict with the information of the house.
+    """
+
+    return extract_house_fields(html, use_utag, parser, fields)[0]
+
+
+def _timed_extraction(
+    html: str,
+    use_utag: bool,
+    parser: str,
+    fields: list[str] | None = None,
+    trace_memory: bool = False,
+) -> tuple[HouseInformation, list[str], float, float]:
+    """
+    Gets the information of a house from its html, measuring the time and the memory
+    needed. It is executed in the processes of the extraction stage.
+
+    Parameters
+    ----------
+    html         : Html of the advertisement.
+    use_utag     : If True, the fields in the utag data of the page are used.
+    parser       : Parser used for the html, one of PARSERS.
+    fields       : Fields to obtain. By default, all of them.
+    trace_memory : If True, the peak of memory of the extraction is measured.
+
+    Returns
+    -------
+    Dict with the information of the house, fields whose extractor was run, seconds
+    spent and peak of memory in bytes (0 if it is not measured).
+    """
+
+    if trace_memory:  # the process keeps tracing, only the peak is reset
+        start_tracing()
+    start = time.perf_counter()
+    information, extracted = extract_house_fields(html, use_utag, parser, fields)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if trace_memory else 0.0
+    return information, extracted, elapsed, peak
+
+
+def _put(items: queue.Queue[object], item: object, stop: threading.Event) -> bool:
+    """
+    Puts an item in a bounded queue, waiting while it is full unless the pipeline is
+    stopping.
+
+    Parameters
+    ----------
+    items : Queue.
+    item  : Item to put.
+    stop  : Event set when the pipeline is stopping.
+
+    Returns
+    -------
+    True if the item was put, False if the pipeline is stopping.
+    """
+
+    while not stop.is_set():
+        try:
+            items.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+class _Stopped(Exception):
+    """
+    Exception to stop the fetch stage when the pipeline is stopping.
+    """
+
+
+class StageStats:
+    """
+    Class with the statistics of a stage of the pipeline.
+    """
+
+    def __init__(self, name: str, workers: int) -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        name    : Name of the stage.
+        workers : Number of workers of the stage.
+        """
+
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy_time = 0.0  # seconds doing work, summed over the workers
+        self.blocked_time = 0.0  # seconds waiting for the next stage
+        self.peak_memory = 0.0  # bytes of the item that needed the most memory
+        self.paced_time = 0.0  # seconds waiting between requests, summed
+        self.lock = threading.Lock()
+
+    def add(
+        self, busy_time: float = 0.0, blocked_time: float = 0.0, memory: float = 0.0
+    ) -> None:
+        """
+        Adds an item processed by the stage.
+
+        Parameters
+        ----------
+        busy_time    : Seconds spent processing the item.
+        blocked_time : Seconds waiting for the next stage to accept the item.
+        memory       : Peak of memory in bytes while processing the item, if measured.
+        """
+
+        with self.lock:
+            self.items += 1
+            self.busy_time += busy_time
+            self.blocked_time += blocked_time
+            self.peak_memory = max(self.peak_memory, memory)
+
+    def summary(self, elapsed: float) -> str:
+        """
+        Summarises the statistics of the stage.
+
+        Parameters
+        ----------
+        elapsed : Seconds of the whole run.
+
+        Returns
+        -------
+        Line with the items per second, the fraction of time the workers were busy,
+        the time they were blocked by the next stage, the time they waited between
+        requests and the peak of memory of an item if they were measured.
+        """
+
+        throughput = self.items / elapsed if elapsed > 0 else 0.0
+        utilization = self.busy_time / (elapsed * self.workers) if elapsed > 0 else 0.0
+        summary = (
+            f"{self.name:<8} items: {self.items:>6}, {throughput:7.2f} items/s, "
+            f"busy: {100 * utilization:5.1f}%, blocked: {self.blocked_time:7.2f} s"
+        )
+        if self.paced_time:
+            summary += f", paced: {self.paced_time:7.2f} s"
+        if self.peak_memory:
+            summary += f", peak memory per item: {self.peak_memory / MB:.1f} MB"
+        return summary
+
+
+class Pipeline:
+    """
+    Class to scrape the houses with three stages running at the same time. The fetch
+    workers put the html of the pages in a bounded queue, a pool of processes extracts
+    the information and the results are given to a writer. The queues are bounded, so
+    a slow stage slows down the previous ones instead of filling the memory.
+
+    The pages are classified before the extraction (see classify_house_page). The
+    blocked and malformed pages, and the pages that could not be fetched, are fetched
+    again in later rounds with new fetch workers, waiting more before each round, and
+    the removed advertisements are skipped.
+    """
+
+    def __init__(
+        self,
+        pool: FetchPool,
+        n_processes: int | None = None,
+        max_html: int | None = None,
+        use_utag: bool = False,
+        parser: str = "lxml",
+        max_retries: int = 3,
+        backoff: float = 30.0,
+        breaker: CircuitBreaker | None = None,
+        fields: list[str] | None = None,
+        trace_memory: bool = False,
+    ) -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        pool         : Pool of workers of the fetch stage.
+        n_processes  : Number of processes of the extraction stage. By default, the
+                       number of cores. Each process parses one page at a time and
+                       frees its tree after the extraction, so there are at most
+                       n_processes trees in memory.
+        max_html     : Maximum number of html pages waiting to be extracted. By
+                       default, twice the number of processes.
+        use_utag     : If True, the fields in the utag data of the pages are used.
+        parser       : Parser used for the html, one of PARSERS.
+        max_retries  : Maximum number of times a page that was blocked, malformed or
+                       not fetched is fetched again.
+        backoff      : Seconds waited before the first round of retries. The wait is
+                       doubled before each of the next rounds.
+        breaker      : Circuit breaker that pauses the fetch workers when too many
+                       pages are blocked. If None, they are never paused.
+        fields       : Fields obtained of each house, of HouseScraping.EXTRACTORS. By
+                       default, all of them.
+        trace_memory : If True, the peak of memory of the extraction of each page is
+                       measured with tracemalloc in the processes.
+        """
+
+        unknown = set(fields or []) - set(HouseScraping.EXTRACTORS)
+        if unknown:
+            raise ValueError(
+                f"Unknown fields {sorted(unknown)}, expected some of "
+                f"{list(HouseScraping.EXTRACTORS)}."
+            )
+
+        self.pool = pool
+        self.n_processes = n_processes or os.cpu_count() or 1
+        self.max_html = max_html or 2 * self.n_processes
+        self.use_utag = use_utag
+        self.parser = parser
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker
+        self.fields = fields
+        self.trace_memory = trace_memory
+        self.stats: list[StageStats] = []
+        self.elapsed = 0.0
+        self.statuses = dict.fromkeys(PAGE_STATUSES, 0)  # pages fetched of each status
+        self.retried = 0  # pages fetched again
+        self.unfetched = 0  # pages whose fetch failed
+        self.gone: list[int] = []  # removed advertisements
+        self.failed: dict[int, str] = {}  # pages not scraped after all the retries
+        self.extracted = dict.fromkeys(HouseScraping.EXTRACTORS, 0)  # runs per field
+        self.round_failures: dict[int, str] = {}  # pages to fetch again
+        self.status_lock = threading.Lock()
+
+    def _fail(self, key: int, status: str) -> None:
+        """
+        Marks that a page was not extracted in the current round.
+
+        Parameters
+        ----------
+        key    : Id of the house.
+        status : Status of the page, one of PAGE_STATUSES except "ok".
+        """
+
+        with self.status_lock:
+            self.statuses[status] += 1
+            self.round_failures[key] = status
+
+    def _fetch(
+        self,
+        keys: Iterable[int],
+        get_url: Callable[[int], str],
+        htmls: queue.Queue[object],
+        stop: threading.Event,
+        stats: StageStats,
+        errors: list[BaseException],
+    ) -> None:
+        """
+        Fetch stage: puts the html of each page in the queue of html pages.
+
+        Parameters
+        ----------
+        keys    : Ids of the houses.
+        get_url : Function that gives the url of an id.
+        htmls   : Queue of html pages.
+        stop    : Event set when the pipeline is stopping.
+        stats   : Statistics of the stage.
+        errors  : List where the errors of the stage are added.
+        """
+
+        def get_paused_url(key: int) -> str:
+            if self.breaker is not None:
+                self.breaker.wait()
+            return get_url(key)
+
+        def fail(key: int, error: Exception) -> None:
+            print(f"Page of house {key} not fetched: {error}.")
+            with self.status_lock:
+                self.unfetched += 1
+                self.round_failures[key] = "unfetched"
+            stats.add()
+
+        def put(key: int, html: str) -> None:
+            status = classify_house_page(html)
+            if self.breaker is not None:
+                self.breaker.record(status == "blocked")
+            if status != "ok":
+                self._fail(key, status)
+                stats.add()
+                return
+
+            with self.status_lock:
+                self.statuses["ok"] += 1
+            start = time.perf_counter()
+            if not _put(htmls, (key, html), stop):
+                raise _Stopped()
+            stats.add(blocked_time=time.perf_counter() - start)
+
+        try:
+            for _ in self.pool.imap(keys, get_paused_url, put, fail):
+                pass
+        except _Stopped:
+            pass
+        except Exception as e:
+            errors.append(e)
+        finally:
+            _put(htmls, _DONE, stop)
+
+    def _extract(
+        self,
+        executor: ProcessPoolExecutor,
+        htmls: queue.Queue[object],
+        results: queue.Queue[object],
+        slots: threading.Semaphore,
+        stop: threading.Event,
+        stats: StageStats,
+        errors: list[BaseException],
+    ) -> None:
+        """
+        Extraction stage: sends the html pages to the processes and puts the futures in
+        the queue of results. Each page takes a slot until its result is taken by the
+        writer, so there are at most as many pages being extracted or waiting to be
+        written as processes.
+
+        Parameters
+        ----------
+        executor : Pool of processes.
+        htmls    : Queue of html pages.
+        results  : Queue of results.
+        slots    : Semaphore with a slot per process, released by the writer.
+        stop     : Event set when the pipeline is stopping.
+        stats    : Statistics of the stage.
+        errors   : List where the errors of the stage are added.
+        """
+
+        def done(key: int, future: Future) -> None:
+            results.put((key, future))  # never blocks, there is a place per slot
+
+        try:
+            while not stop.is_set():
+                try:
+                    item = htmls.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    break
+                key, html = cast(tuple[int, str], item)
+                start = time.perf_counter()
+                slots.acquire()
+                with stats.lock:  # the item is counted when it is written
+                    stats.blocked_time += time.perf_counter() - start
+                try:
+                    future = executor.submit(
+                        _timed_extraction,
+                        html,
+                        self.use_utag,
+                        self.parser,
+                        self.fields,
+                        self.trace_memory,
+                    )
+                except Exception:
+                    slots.release()
+                    raise
+                future.add_done_callback(partial(done, key))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            n_acquired = 0
+            while n_acquired < self.n_processes:  # wait for the pending pages
+                if slots.acquire(timeout=0.1):
+                    n_acquired += 1
+                elif stop.is_set():  # the writer stopped taking the results
+                    break
+            _put(results, _DONE, stop)
+
+    def _run_round(
+        self,
+        keys: Iterable[int],
+        get_url: Callable[[int], str],
+        write: Callable[[int, HouseInformation], None],
+    ) -> None:
+        """
+        Scrapes the houses once. The pages that are not extracted are kept in
+        round_failures.
+
+        Parameters
+        ----------
+        keys    : Ids of the houses.
+        get_url : Function that gives the url of an id.
+        write   : Function that writes the information of a house.
+        """
+
+        fetch_stats, extract_stats, write_stats = self.stats
+        htmls: queue.Queue[object] = queue.Queue(maxsize=self.max_html)
+        results: queue.Queue[object] = queue.Queue(maxsize=self.n_processes + 1)
+        slots = threading.Semaphore(self.n_processes)
+        stop = threading.Event()
+        errors: list[BaseException] = []
+
+        # The processes are spawned, forking while the fetch threads run is not safe
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(self.n_processes, mp_context=context) as executor:
+            threads = [
+                threading.Thread(
+                    target=self._fetch,
+                    args=(keys, get_url, htmls, stop, fetch_stats, errors),
+                    daemon=True,
+                ),
+                threading.Thread(
+                    target=self._extract,
+                    args=(
+                        executor,
+                        htmls,
+                        results,
+                        slots,
+                        stop,
+                        extract_stats,
+                        errors,
+                    ),
+                    daemon=True,
+                ),
+            ]
+            for thread in threads:
+                thread.start()
+
+            try:
+                while (item := results.get()) is not _DONE:
+                    slots.release()
+                    key, future = cast(tuple[int, Future], item)
+                    try:
+                        information, extracted, extract_time, memory = future.result()
+                    except EXTRACTION_ERRORS:  # a page without some elements
+                        with self.status_lock:
+                            self.statuses["ok"] -= 1
+                        self._fail(key, "malformed")
+                        continue
+                    extract_stats.add(busy_time=extract_time, memory=memory)
+                    for field in extracted:
+                        self.extracted[field] += 1
+                    write_start = time.perf_counter()
+                    write(key, information)
+                    write_stats.add(busy_time=time.perf_counter() - write_start)
+            finally:
+                stop.set()
+                for thread in threads:
+                    thread.join()
+
+        with fetch_stats.lock:
+            fetch_stats.busy_time += self.pool.fetch_time
+            fetch_stats.paced_time += self.pool.pace_time
+        self.unfetched += len(self.pool.failed)
+        for key in self.pool.failed:  # pages not fetched because the workers crashed
+            self.round_failures[key] = "unfetched"
+        if errors:
+            raise errors[0]
+
+    def run(
+        self,
+        keys: Iterable[int],
+        get_url: Callable[[int], str],
+        write: Callable[[int, HouseInformation], None],
+    ) -> None:
+        """
+        Scrapes the houses. The results are written in the thread of the caller. The
+        blocked and malformed pages, and the pages that could not be fetched, are
+        fetched again in rounds of retries.
+
+        Parameters
+        ----------
+        keys    : Ids of the houses.
+        get_url : Function that gives the url of an id.
+        write   : Function that writes the information of a house.
+        """
+
+        self.stats = [
+            StageStats("fetch", self.pool.n_workers),
+            StageStats("extract", self.n_processes),
+            StageStats("write", 1),
+        ]
+        self.elapsed = 0.0
+        self.statuses = dict.fromkeys(PAGE_STATUSES, 0)
+        self.retried = 0
+        self.unfetched = 0
+        self.gone = []
+        self.failed = {}
+        self.extracted = dict.fromkeys(HouseScraping.EXTRACTORS, 0)
+
+        for attempt in range(self.max_retries + 1):
+            self.round_failures = {}
+            start = time.perf_counter()
+            self._run_round(keys, get_url, write)
+            self.elapsed += time.perf_counter() - start
+
+            retry = []
+            for key, status in self.round_failures.items():
+                if status == "gone":
+                    self.gone.append(key)
+                elif attempt == self.max_retries:
+                    self.failed[key] = status
+                else:
+                    retry.append(key)
+            if not retry:
+                break
+
+            delay = self.backoff * 2**attempt
+            print(f"Fetching again {len(retry)} pages in {delay:.0f} s.")
+            time.sleep(delay)
+            self.retried += len(retry)
+            keys = retry
+
+    def report(self) -> str:
+        """
+        Summarises the statistics of the stages of the last run. The stage with the
+        highest busy percentage is the bottleneck.
+
+        Returns
+        -------
+        One line per stage.
+        """
+
+        return "\n".join(stats.summary(self.elapsed) for stats in self.stats)
+
+    def pages_report(self) -> str:
+        """
+        Summarises the status of the pages fetched in the last run.
+
+        Returns
+        -------
+        Line with the number of pages of each status, the pages not fetched, the pages
+        fetched again and the pages not scraped.
+        """
+
+        statuses = ", ".join(f"{status}: {n}" for status, n in self.statuses.items())
+        return (
+            f"Pages {statuses}. Not fetched: {self.unfetched}, fetched again: "
+            f"{self.retried}, removed: {len(self.gone)}, not scraped: "
+            f"{len(self.failed)}"
+        )
+
+    def extractors_report(self) -> str:
+        """
+        Summarises the extractors run in the last run.
+
+        Returns
+        -------
+        Line with the number of pages each extractor was run for, without the
+        extractors never run.
+        """
+
+        runs = ", ".join(f"{field}: {n}" for field, n in self.extracted.items() if n)
+        return f"Extractors run {runs or 'none'}"
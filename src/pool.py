@@ -0,0 +1,350 @@
+"""
+Script for fetching many pages with a pool of workers. Each worker has its own fetcher
+(for example its own browser) and takes the pages from a shared queue.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Generic, Iterable, Iterator, TypeVar
+from selenium.common.exceptions import WebDriverException
+
+from src.fetchers import Fetcher
+from src.utils import random_wait_time
+
+
+K = TypeVar("K")
+R = TypeVar("R")
+
+
+class _TaskQueue(Generic[K]):
+    """
+    Class for the queue of tasks shared by the workers. Tasks of crashed workers are put
+    back at the end, so that a page that crashes the fetchers does not stop the rest.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor of the class.
+        """
+
+        self.tasks: deque[tuple[int, K]] = deque()
+        self.condition = threading.Condition()
+        self.closed = False  # no more tasks will be added
+        self.aborted = False  # the pool is stopping
+
+    def put(self, task: tuple[int, K]) -> None:
+        """
+        Adds a task to the queue.
+
+        Parameters
+        ----------
+        task : Index and key of the task.
+        """
+
+        with self.condition:
+            self.tasks.append(task)
+            self.condition.notify()
+
+    def get(self) -> tuple[int, K] | None:
+        """
+        Gets the next task, waiting for it if the queue is empty.
+
+        Returns
+        -------
+        Index and key of the task. None if there are no more tasks.
+        """
+
+        with self.condition:
+            while not self.tasks and not self.closed and not self.aborted:
+                self.condition.wait()
+            if self.aborted or not self.tasks:
+                return None
+            return self.tasks.popleft()
+
+    def close(self) -> None:
+        """
+        Marks that no more tasks will be added.
+        """
+
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def abort(self) -> None:
+        """
+        Stops the workers, leaving the remaining tasks in the queue.
+        """
+
+        with self.condition:
+            self.aborted = True
+            self.condition.notify_all()
+
+
+class _Error:
+    """
+    Class to send to the caller an exception raised in a thread of the pool.
+    """
+
+    def __init__(self, error: BaseException) -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        error : Exception raised.
+        """
+
+        self.error = error
+
+
+_WORKER_DONE = object()
+
+
+class FetchPool:
+    """
+    Class to fetch and process many pages with several workers at the same time. Each
+    worker waits between its requests (rate limiting per worker). If the fetcher of a
+    worker crashes, its page is given back to the queue and the worker stops, so that
+    the rest of the workers go on with the run.
+    """
+
+    def __init__(
+        self,
+        fetcher_factory: Callable[[], Fetcher],
+        n_workers: int = 1,
+        pace: Callable[[], float] = random_wait_time,
+        crash_exceptions: tuple[type[BaseException], ...] = (WebDriverException,),
+    ) -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        fetcher_factory  : Function that creates the fetcher of a worker.
+        n_workers        : Number of workers.
+        pace             : Function that gives the minimum time in seconds between the
+                           start of two requests of the same worker.
+        crash_exceptions : Exceptions of the fetchers that mean that they crashed.
+        """
+
+        if n_workers < 1:
+            raise ValueError(f"Expected at least 1 worker, got {n_workers}.")
+
+        self.fetcher_factory = fetcher_factory
+        self.n_workers = n_workers
+        self.pace = pace
+        self.crash_exceptions = crash_exceptions
+        self.failed: list = []  # keys that were not processed in the last run
+        self.stats_lock = threading.Lock()
+        self.crashed = 0  # number of workers that crashed in the last run
+        self.fetch_time = 0.0  # seconds inside the fetchers in the last run
+        self.pace_time = 0.0  # seconds waiting between requests in the last run
+
+    def _feed(
+        self,
+        keys: Iterable[K],
+        tasks: _TaskQueue[K],
+        results: queue.Queue[object],
+    ) -> None:
+        """
+        Puts the keys in the queue of tasks.
+
+        Parameters
+        ----------
+        keys    : Keys of the pages.
+        tasks   : Queue of tasks.
+        results : Queue of results, to send the errors of the keys.
+        """
+
+        try:
+            for index, key in enumerate(keys):
+                if tasks.aborted:
+                    break
+                tasks.put((index, key))
+        except Exception as e:
+            results.put(_Error(e))
+        finally:
+            tasks.close()
+
+    def _work(
+        self,
+        worker_id: int,
+        tasks: _TaskQueue[K],
+        results: queue.Queue[object],
+        get_url: Callable[[K], str],
+        process: Callable[[K, str], R],
+        on_error: Callable[[K, Exception], None] | None,
+    ) -> None:
+        """
+        Loop of a worker: fetches and processes pages until there are no more tasks or
+        its fetcher crashes.
+
+        Parameters
+        ----------
+        worker_id : Id of the worker.
+        tasks     : Queue of tasks.
+        results   : Queue of results.
+        get_url   : Function that gives the url of a key.
+        process   : Function that processes the html of a key.
+        on_error  : Function called with the key and the error of a page that could not
+                    be fetched. If None, the error stops the pool.
+        """
+
+        fetcher = None
+        try:
+            fetcher = self.fetcher_factory()
+            next_time = time.monotonic()
+            while (task := tasks.get()) is not None:
+                pace_time = max(0.0, next_time - time.monotonic())
+                time.sleep(pace_time)
+                start = time.monotonic()
+                next_time = start + self.pace()
+                url = get_url(task[1])
+                try:
+                    html = fetcher.fetch(url)
+                except self.crash_exceptions as e:
+                    tasks.put(task)
+                    raise e
+                except Exception as e:
+                    if on_error is None:
+                        raise e
+                    on_error(task[1], e)
+                    continue
+                with self.stats_lock:
+                    self.fetch_time += time.monotonic() - start
+                    self.pace_time += pace_time
+                results.put((task[0], task[1], process(task[1], html)))
+        except self.crash_exceptions as e:
+            with self.stats_lock:
+                self.crashed += 1
+            print(f"Worker {worker_id} stopped because its fetcher crashed: {e}.")
+        except Exception as e:
+            results.put(_Error(e))
+        finally:
+            if fetcher is not None:
+                try:
+                    fetcher.close()
+                except Exception as e:
+                    print(f"Worker {worker_id} could not close its fetcher: {e}.")
+            results.put(_WORKER_DONE)
+
+    def _run(
+        self,
+        keys: Iterable[K],
+        get_url: Callable[[K], str],
+        process: Callable[[K, str], R],
+        on_error: Callable[[K, Exception], None] | None = None,
+    ) -> Iterator[tuple[int, K, R]]:
+        """
+        Fetches and processes the pages of the keys.
+
+        Parameters
+        ----------
+        keys     : Keys of the pages.
+        get_url  : Function that gives the url of a key.
+        process  : Function that processes the html of a key.
+        on_error : Function called with the key and the error of a page that could not
+                   be fetched. If None, the error stops the pool.
+
+        Returns
+        -------
+        Iterator over the index, the key and the result of each page, in the order
+        they are processed.
+        """
+
+        tasks: _TaskQueue[K] = _TaskQueue()
+        results: queue.Queue[object] = queue.Queue()
+        self.failed = []
+        self.crashed = 0
+        self.fetch_time = 0.0
+        self.pace_time = 0.0
+
+        threads = [
+            threading.Thread(
+                target=self._feed, args=(keys, tasks, results), daemon=True
+            )
+        ] + [
+            threading.Thread(
+                target=self._work,
+                args=(worker_id, tasks, results, get_url, process, on_error),
+                daemon=True,
+            )
+            for worker_id in range(self.n_workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            alive = self.n_workers
+            while alive:
+                result = results.get()
+                if result is _WORKER_DONE:
+                    alive -= 1
+                elif isinstance(result, _Error):
+                    raise result.error
+                else:
+                    yield result  # type: ignore
+        finally:
+            tasks.abort()
+            for thread in threads:
+                thread.join()
+            self.failed = [key for _, key in tasks.tasks]
+
+        if self.crashed == self.n_workers:
+            print(f"All workers crashed, {len(self.failed)} pages were not fetched.")
+
+    def imap(
+        self,
+        keys: Iterable[K],
+        get_url: Callable[[K], str],
+        process: Callable[[K, str], R],
+        on_error: Callable[[K, Exception], None] | None = None,
+    ) -> Iterator[tuple[K, R]]:
+        """
+        Fetches and processes the pages of the keys, giving the results as soon as they
+        are ready.
+
+        Parameters
+        ----------
+        keys     : Keys of the pages. They can be given while the pool is running.
+        get_url  : Function that gives the url of a key.
+        process  : Function that processes the html of a key. It is executed in the
+                   thread of the worker.
+        on_error : Function called with the key and the error of a page that could not
+                   be fetched, in the thread of the worker. If None, the error stops the
+                   pool.
+
+        Returns
+        -------
+        Iterator over the key and the result of each page, in the order they are
+        processed.
+        """
+
+        for _, key, result in self._run(keys, get_url, process, on_error):
+            yield key, result
+
+    def map(
+        self,
+        keys: Iterable[K],
+        get_url: Callable[[K], str],
+        process: Callable[[K, str], R],
+    ) -> list[tuple[K, R]]:
+        """
+        Fetches and processes the pages of the keys.
+
+        Parameters
+        ----------
+        keys    : Keys of the pages.
+        get_url : Function that gives the url of a key.
+        process : Function that processes the html of a key. It is executed in the
+                  thread of the worker.
+
+        Returns
+        -------
+        List with the key and the result of each page, in the order of the keys.
+        """
+
+        results = sorted(self._run(keys, get_url, process), key=lambda x: x[0])
+        return [(key, result) for _, key, result in results]
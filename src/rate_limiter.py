@@ -0,0 +1,241 @@
+"""
+Script for limiting the rate of the requests to each host. The rate adapts to the
+responses: it grows slowly while the pages are fine and it is cut when the pages are
+blocked or the requests fail (AIMD).
+"""
+
+import random
+import threading
+import time
+from typing import Callable
+from urllib.parse import urlsplit
+
+
+class _Bucket:
+    """
+    Class for the token bucket and the statistics of a host.
+    """
+
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        rate  : Requests per second.
+        burst : Maximum number of requests that can be done without waiting.
+        now   : Current time.
+        """
+
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst  # negative when there are requests waiting
+        self.updated = now
+        self.requests = 0
+        self.failures = 0
+        self.sleep_time = 0.0
+
+    def refill(self, now: float) -> None:
+        """
+        Adds the tokens generated since the last update.
+
+        Parameters
+        ----------
+        now : Current time.
+        """
+
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class RateLimiter:
+    """
+    Class to limit the requests to each host with a token bucket shared by all the
+    fetchers. After each response the fetchers report if it was fine or not: each fine
+    response adds a fixed amount to the rate (additive increase) and each blocked page
+    or error multiplies it by a factor (multiplicative decrease).
+    """
+
+    def __init__(
+        self,
+        rate: float = 0.5,
+        min_rate: float = 0.05,
+        max_rate: float = 2.0,
+        increase: float = 0.02,
+        decrease: float = 0.5,
+        burst: float = 1.0,
+        jitter: float = 0.25,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        rate     : Initial requests per second of each host.
+        min_rate : Minimum requests per second.
+        max_rate : Maximum requests per second.
+        increase : Requests per second added after a fine response.
+        decrease : Factor of the rate after a blocked page or an error.
+        burst    : Maximum number of requests to a host that can be done without
+                   waiting.
+        jitter   : Maximum random extra wait, as a fraction of the wait, so that the
+                   requests are not evenly spaced.
+        clock    : Function that gives the current time in seconds.
+        sleep    : Function that waits some seconds.
+        """
+
+        if not 0 < min_rate <= rate <= max_rate:
+            raise ValueError(
+                f"Expected 0 < min_rate <= rate <= max_rate, got {min_rate}, {rate} "
+                f"and {max_rate}."
+            )
+
+        self.initial_rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.burst = burst
+        self.jitter = jitter
+        self.clock = clock
+        self.sleep = sleep
+        self.buckets: dict[str, _Bucket] = {}
+        self.lock = threading.Lock()
+
+    def _bucket(self, url: str) -> _Bucket:
+        """
+        Gets the bucket of the host of a url. It must be called with the lock.
+
+        Parameters
+        ----------
+        url : Url of the request.
+
+        Returns
+        -------
+        Bucket of the host.
+        """
+
+        host = urlsplit(url).netloc
+        if host not in self.buckets:
+            self.buckets[host] = _Bucket(self.initial_rate, self.burst, self.clock())
+        return self.buckets[host]
+
+    def acquire(self, url: str) -> float:
+        """
+        Waits until a request to the host of a url can be done. The waiting requests
+        reserve their token, so they are done in order.
+
+        Parameters
+        ----------
+        url : Url of the request.
+
+        Returns
+        -------
+        Seconds waited.
+        """
+
+        with self.lock:
+            bucket = self._bucket(url)
+            bucket.refill(self.clock())
+            bucket.tokens -= 1
+            bucket.requests += 1
+            wait_time = max(0.0, -bucket.tokens / bucket.rate)
+            wait_time *= 1 + self.jitter * random.random()
+            bucket.sleep_time += wait_time
+
+        if wait_time > 0:
+            self.sleep(wait_time)
+        return wait_time
+
+    def success(self, url: str) -> None:
+        """
+        Reports a fine response, increasing the rate of its host.
+
+        Parameters
+        ----------
+        url : Url of the request.
+        """
+
+        with self.lock:
+            bucket = self._bucket(url)
+            bucket.refill(self.clock())
+            bucket.rate = min(self.max_rate, bucket.rate + self.increase)
+
+    def failure(self, url: str) -> None:
+        """
+        Reports a blocked page or an error, decreasing the rate of its host.
+
+        Parameters
+        ----------
+        url : Url of the request.
+        """
+
+        with self.lock:
+            bucket = self._bucket(url)
+            bucket.refill(self.clock())
+            bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+            bucket.failures += 1
+
+    def rate(self, url: str) -> float:
+        """
+        Gets the current rate of the host of a url.
+
+        Parameters
+        ----------
+        url : Url of the host.
+
+        Returns
+        -------
+        Requests per second.
+        """
+
+        with self.lock:
+            return self._bucket(url).rate
+
+    @property
+    def sleep_time(self) -> float:
+        """
+        Seconds waited by all the requests.
+        """
+
+        with self.lock:
+            return sum(bucket.sleep_time for bucket in self.buckets.values())
+
+    def metrics(self) -> dict[str, dict[str, float]]:
+        """
+        Gets the statistics of each host.
+
+        Returns
+        -------
+        Dict with, for each host, the current rate ("rate"), the number of requests
+        ("requests") and failures ("failures") and the seconds waited ("sleep_time").
+        """
+
+        with self.lock:
+            return {
+                host: {
+                    "rate": bucket.rate,
+                    "requests": bucket.requests,
+                    "failures": bucket.failures,
+                    "sleep_time": bucket.sleep_time,
+                }
+                for host, bucket in self.buckets.items()
+            }
+
+    def report(self) -> str:
+        """
+        Summarises the statistics of each host.
+
+        Returns
+        -------
+        One line per host.
+        """
+
+        return "\n".join(
+            f"{host} rate: {stats['rate']:5.2f} requests/s, requests: "
+            f"{stats['requests']:>6}, failures: {stats['failures']:>4}, "
+            f"waited: {stats['sleep_time']:8.2f} s"
+            for host, stats in self.metrics().items()
+        )
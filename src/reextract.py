@@ -0,0 +1,169 @@
+"""
+Script to obtain again the information of the houses from the html cache, without
+fetching any page. The extraction is done in parallel in all the cores. Execute it from
+the root of the repo with
+
+    python -m src.reextract --cache data/cache --output data/results/houses_df.csv
+"""
+
+import argparse
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from src.html_cache import HtmlCache
+from src.parsers import PARSERS
+from src.page_status import classify_house_page
+from src.pipeline import EXTRACTION_ERRORS, HouseInformation, extract_house_information
+from src.schema import HOUSE_SCHEMA
+from src.writer import IncrementalWriter, compact
+
+
+HOUSE_URL_PATTERN = re.compile(r"/inmueble/(\d+)")
+
+_cache: HtmlCache | None = None  # cache of each process
+
+
+def get_house_id(url: str) -> int | None:
+    """
+    Gets the id of a house from the url of its advertisement.
+
+    Parameters
+    ----------
+    url : Url of the page.
+
+    Returns
+    -------
+    Id of the house or None if the url is not of an advertisement.
+    """
+
+    match = HOUSE_URL_PATTERN.search(url)
+    return None if match is None else int(match.group(1))
+
+
+def _open_cache(directory: str) -> None:
+    """
+    Opens the cache in a process of the pool.
+
+    Parameters
+    ----------
+    directory : Directory of the cache.
+    """
+
+    global _cache
+    _cache = HtmlCache(directory)
+
+
+def _extract_cached(
+    digests: list[str], use_utag: bool, parser: str
+) -> HouseInformation | None:
+    """
+    Gets the information of a house from the last good page of it in the cache. The
+    pages of the anti-bot protection, of removed advertisements and the pages without
+    the information of the house are skipped. It is executed in the processes of the
+    pool.
+
+    Parameters
+    ----------
+    digests  : Hashes of the pages of the house, from the last fetched to the first.
+    use_utag : If True, the fields in the utag data of the page are used.
+    parser   : Parser used for the html, one of PARSERS.
+
+    Returns
+    -------
+    Dict with the information of the house or None if none of its pages is good.
+    """
+
+    assert _cache is not None
+    for digest in digests:
+        html = _cache.get(digest)
+        if classify_house_page(html) != "ok":
+            continue
+        try:
+            return extract_house_information(html, use_utag, parser)
+        except EXTRACTION_ERRORS:
+            continue
+    return None
+
+
+def reextract(
+    cache_directory: str,
+    output_path: str,
+    n_processes: int | None = None,
+    use_utag: bool = False,
+    parser: str = "lxml",
+) -> int:
+    """
+    Obtains the information of the houses from the last good page of each one in the
+    cache. The houses without any good page are skipped.
+
+    Parameters
+    ----------
+    cache_directory : Directory of the cache.
+    output_path     : Path of the csv or parquet file with the information of the
+                      houses.
+    n_processes     : Number of processes. By default, the number of cores.
+    use_utag        : If True, the fields in the utag data of the pages are used.
+    parser          : Parser used for the html, one of PARSERS.
+
+    Returns
+    -------
+    Number of houses obtained.
+    """
+
+    # Pages of each house, from the last fetched to the first
+    pages: dict[int, list[str]] = {}
+    with HtmlCache(cache_directory) as cache:
+        for url, _, digest in cache.entries(latest_only=False):
+            if (house_id := get_house_id(url)) is not None:
+                pages.setdefault(house_id, []).insert(0, digest)
+
+    journal_path = f"{os.path.splitext(output_path)[0]}.jsonl"
+    n_processes = n_processes or os.cpu_count() or 1
+    # The processes are spawned, forking is not safe if this process has threads (for
+    # example, the ones of pyarrow)
+    context = multiprocessing.get_context("spawn")
+    with (
+        ProcessPoolExecutor(
+            n_processes,
+            mp_context=context,
+            initializer=_open_cache,
+            initargs=(cache_directory,),
+        ) as executor,
+        IncrementalWriter(journal_path, fsync_every=100, overwrite=True) as writer,
+    ):
+        informations = executor.map(
+            _extract_cached,
+            list(pages.values()),
+            [use_utag] * len(pages),
+            [parser] * len(pages),
+            chunksize=max(1, len(pages) // (4 * n_processes)),
+        )
+        for house_id, information in zip(pages, informations):
+            if information is not None:
+                information["id"] = house_id
+                writer.write(information)
+
+    n_skipped = len(pages) - writer.n_records
+    if n_skipped:
+        print(f"Skipped {n_skipped} houses without a good page in the cache.")
+    compact(journal_path, output_path, schema=HOUSE_SCHEMA)
+    return writer.n_records
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(
+        description="Obtains the information of the houses from the html cache."
+    )
+    argument_parser.add_argument("--cache", default="data/cache")
+    argument_parser.add_argument("--output", default="data/results/houses_df.csv")
+    argument_parser.add_argument("--processes", type=int, default=None)
+    argument_parser.add_argument("--utag", action="store_true")
+    argument_parser.add_argument("--parser", choices=PARSERS, default="lxml")
+    args = argument_parser.parse_args()
+
+    n_houses = reextract(
+        args.cache, args.output, args.processes, args.utag, args.parser
+    )
+    print(f"Obtained the information of {n_houses} houses from the cache.")
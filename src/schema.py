@@ -0,0 +1,120 @@
+"""
+Script for the declared types of the information of the houses, so that the results
+have typed columns (nullable integers, booleans, categories and strings) instead of
+object columns, whatever the format they are read from.
+"""
+
+from typing import Any
+
+import pandas as pd
+
+
+ENERGY_CLASSES = ["A", "B", "C", "D", "E", "F", "G"]
+
+HOUSE_SCHEMA: dict[str, Any] = {
+    "id": "Int64",
+    "title": "string",
+    "location": "string",
+    "price": "Int32",
+    "m2": "Int32",
+    "type": pd.CategoricalDtype(["flat", "house"]),
+    "status": "category",
+    "floor": "Int32",
+    "description": "string",
+    "n_photos": "Int32",
+    "n_rooms": "Int32",
+    "n_bathrooms": "Int32",
+    "particular": "boolean",
+    "luxury": "boolean",
+    "video": "boolean",
+    "virtual_tour": "boolean",
+    "3d_tour": "boolean",
+    "homestaging": "boolean",
+    "plane": "boolean",
+    "air_conditioning": "boolean",
+    "heating": "category",
+    "elevator": "boolean",
+    "furnished": "boolean",
+    "terrace": "string",
+    "consume": pd.CategoricalDtype(ENERGY_CLASSES, ordered=True),
+    "emisions": pd.CategoricalDtype(ENERGY_CLASSES, ordered=True),
+}
+
+# Text of the booleans in a csv
+_BOOLEAN_TEXTS = {"True": True, "False": False, "true": True, "false": False}
+
+
+def _to_boolean(value: Any) -> Any:
+    """
+    Converts the text of a boolean read from a csv to the boolean.
+
+    Parameters
+    ----------
+    value : Value of the column.
+
+    Returns
+    -------
+    Boolean for the texts of the booleans, the same value for the rest.
+    """
+
+    return _BOOLEAN_TEXTS.get(value, value) if isinstance(value, str) else value
+
+
+def apply_schema(
+    df: pd.DataFrame, schema: dict[str, Any] | None = None
+) -> pd.DataFrame:
+    """
+    Converts the columns of a df to the types of a schema. The columns that are not in
+    the schema are kept as they are. The values are read from the json types or from
+    their text in a csv, and the missing ones become <NA>.
+
+    Parameters
+    ----------
+    df     : Df to convert.
+    schema : Type of each column. By default, HOUSE_SCHEMA.
+
+    Returns
+    -------
+    Df with the typed columns.
+    """
+
+    schema = HOUSE_SCHEMA if schema is None else schema
+    df = df.copy()
+    for column, dtype in schema.items():
+        if column not in df.columns:
+            continue
+        if pd.api.types.is_integer_dtype(dtype):
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype(dtype)
+        elif dtype == "boolean":
+            df[column] = df[column].astype(object).map(_to_boolean).astype(dtype)
+        else:
+            df[column] = df[column].astype(dtype)
+
+    return df
+
+
+def columns_to_df(
+    columns: dict[str, list[Any]], schema: dict[str, Any] | None = None
+) -> pd.DataFrame:
+    """
+    Builds a df from the values of each column, creating each column directly with the
+    type of the schema instead of converting an object column. The columns that are not
+    in the schema get the type guessed by pandas.
+
+    Parameters
+    ----------
+    columns : Values of each column, all of the same length.
+    schema  : Type of each column. By default, HOUSE_SCHEMA.
+
+    Returns
+    -------
+    Df with the typed columns.
+    """
+
+    schema = HOUSE_SCHEMA if schema is None else schema
+    return pd.DataFrame(
+        {
+            column: pd.array(values, dtype=schema.get(column))
+            for column, values in columns.items()
+        }
+    )
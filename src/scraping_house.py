@@ -2,26 +2,51 @@
 Script for scraping the information of a house.
 """
 
+import itertools
+import multiprocessing
+import os
 import re
-import numpy as np
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator
+
+import pandas as pd
 from bs4 import BeautifulSoup
 
+from src.document_index import DocumentIndex
+from src.parsers import Document, parse_html
+from src.characteristics import CharacteristicValue, parse_characteristics
+from src.schema import columns_to_df
+
+
+HouseValue = int | str | bool | None
+Columns = dict[str, list[HouseValue]]
+
+# Errors of the extractors with a page without the expected elements
+EXTRACTION_ERRORS = (AttributeError, IndexError, KeyError, TypeError, ValueError)
+
+EXTRACT_CHUNK_SIZE = 32
+
 
 class HouseScraping:
     """
     Class to obtain the information of a house given its advertisement.
     """
 
-    def __init__(self, soup: BeautifulSoup) -> None:
+    def __init__(self, soup: Document) -> None:
         """
         Constructor of the class.
 
         Parameters
         ----------
-        soup : Soup.
+        soup : Soup, of any of the parsers.
         """
 
         self.soup = soup
+        self.index = DocumentIndex(soup)
+        self.characteristics: dict[str, CharacteristicValue] | None = None
+        self.values: dict[str, HouseValue] = {}  # fields already extracted
+        self.extracted: list[str] = []  # extractors run, in order
 
     def _get_title(self) -> str:
         """
@@ -35,9 +60,7 @@ class HouseScraping:
         return re.sub(
             r"\s+",
             " ",
-            self.soup.find("span", {"class": "main-info__title-main"}).text.replace(
-                "\n", ""
-            ),
+            self.index.find("span", "main-info__title-main").text.replace("\n", ""),
         )
 
     def _get_type(self) -> str:
@@ -52,7 +75,7 @@ class HouseScraping:
         if "piso" in re.sub(
             r"\s+",
             " ",
-            self.soup.find("span", {"class": "main-info__title-main"})
+            self.index.find("span", "main-info__title-main")
             .text.replace("\n", "")
             .lower(),
         ):
@@ -72,7 +95,7 @@ class HouseScraping:
         return re.sub(
             r"\s+",
             " ",
-            self.soup.find("span", {"class": "main-info__title-minor"}).text,
+            self.index.find("span", "main-info__title-minor").text,
         )
 
     def _get_price(self) -> int:
@@ -84,7 +107,27 @@ class HouseScraping:
         Price of the house.
         """
 
-        return int(self.soup.find("span", {"class": "txt-bold"}).text.replace(".", ""))
+        return int(self.index.find("span", "txt-bold").text.replace(".", ""))
+
+    def _get_characteristics(self) -> dict[str, CharacteristicValue]:
+        """
+        Gets the fields of the basic characteristics list. The list is only walked the
+        first time, the next calls return the stored values.
+
+        Returns
+        -------
+        Dict with the value of each field of the characteristic rules.
+        """
+
+        if self.characteristics is None:
+            self.characteristics = parse_characteristics(
+                characteristic.text
+                for characteristic in self.index.find(
+                    "div", "details-property-feature-one"
+                ).find_all("li")
+            )
+
+        return self.characteristics
 
     def _get_m2(self) -> int | None:
         """
@@ -95,16 +138,7 @@ class HouseScraping:
         The m2 of the house.
         """
 
-        for characteristic in self.soup.find(
-            "div", {"class": "details-property-feature-one"}
-        ).find_all("li"):
-            if "construidos" in characteristic.text.lower():
-                words = characteristic.text.split(" ")
-                if "útiles" in characteristic.text:
-                    return int(words[-3].replace(".", ""))
-                return int(words[0].replace(".", ""))
-
-        return None
+        return self._get_characteristics()["m2"]  # type: ignore
 
     def _get_status(self) -> str | None:
         """
@@ -115,13 +149,7 @@ class HouseScraping:
         Status of the house.
         """
 
-        for characteristic in self.soup.find(
-            "div", {"class": "details-property-feature-one"}
-        ).find_all("li"):
-            if "segunda mano" in characteristic.text.lower():
-                return characteristic.text
-
-        return None
+        return self._get_characteristics()["status"]  # type: ignore
 
     def _get_floor(self) -> int | None:
         """
@@ -132,17 +160,7 @@ class HouseScraping:
         Floor of the flat.
         """
 
-        for characteristic in self.soup.find(
-            "div", {"class": "details-property-feature-one"}
-        ).find_all("li"):
-            text = characteristic.text.lower()
-            if "planta" in text:
-                numbers = ["0", "1", "2", "3", "4", "5", "6", "7", "8", "9", "10"]
-                for letter in text:
-                    if letter in numbers:
-                        return int(letter)
-
-        return None
+        return self._get_characteristics()["floor"]  # type: ignore
 
     def _get_description(self) -> str | None:
         """
@@ -157,9 +175,7 @@ class HouseScraping:
             return re.sub(
                 r"\s+",
                 " ",
-                self.soup.find(
-                    "div", {"class": "adCommentsLanguage expandable is-expandable"}
-                )
+                self.index.find("div", "adCommentsLanguage expandable is-expandable")
                 .find("p")
                 .text.replace("\n", ""),
             )
@@ -168,12 +184,10 @@ class HouseScraping:
                 return re.sub(
                     r"\s+",
                     " ",
-                    self.soup.find(
+                    self.index.find(
                         "div",
-                        {
-                            "class": "adCommentsLanguage expandable is-expandable "
-                            "with-expander-button"
-                        },
+                        "adCommentsLanguage expandable is-expandable "
+                        "with-expander-button",
                     )
                     .find("p")
                     .text.replace("\n", ""),
@@ -193,8 +207,8 @@ class HouseScraping:
         try:
             try:
                 return int(
-                    self.soup.find(
-                        "span", {"class": "multimedia-shortcuts-button-text"}
+                    self.index.find(
+                        "span", "multimedia-shortcuts-button-text"
                     ).text.split()[0]
                 )
             except AttributeError:
@@ -211,15 +225,7 @@ class HouseScraping:
         Number of rooms.
         """
 
-        for characteristic in self.soup.find(
-            "div", {"class": "details-property-feature-one"}
-        ).find_all("li"):
-            if (
-                "habitaciones" in characteristic.text.lower()
-                or "habitación" in characteristic.text.lower()
-            ):
-                return int(characteristic.text[0])
-        return None
+        return self._get_characteristics()["n_rooms"]  # type: ignore
 
     def _get_number_of_bathrooms(self) -> int | None:
         """
@@ -230,15 +236,7 @@ class HouseScraping:
         Number of bathrooms.
         """
 
-        for characteristic in self.soup.find(
-            "div", {"class": "details-property-feature-one"}
-        ).find_all("li"):
-            if (
-                "baños" in characteristic.text.lower()
-                or "baño" in characteristic.text.lower()
-            ):
-                return int(characteristic.text[0])
-        return None
+        return self._get_characteristics()["n_bathrooms"]  # type: ignore
 
     def _get_particular(self) -> bool:
         """
@@ -249,7 +247,7 @@ class HouseScraping:
         Particular or company.
         """
 
-        return "particular" in self.soup.find("div", {"class": "name"}).text.lower()
+        return "particular" in self.index.find("div", "name").text.lower()
 
     def _get_luxury(self) -> bool:
         """
@@ -262,7 +260,7 @@ class HouseScraping:
 
         try:
             return bool(
-                self.soup.find("div", {"class": "detail-info-tags"}).find(
+                self.index.find("div", "detail-info-tags").find(
                     "span", {"class": "tag"}
                 )
             )
@@ -280,9 +278,7 @@ class HouseScraping:
 
         try:
             return bool(
-                self.soup.find(
-                    "button", {"class": "multimedia-shortcuts-button btn video"}
-                )
+                self.index.find("button", "multimedia-shortcuts-button btn video")
             )
         except AttributeError:
             return False
@@ -298,12 +294,7 @@ class HouseScraping:
 
         button_str = "multimedia-shortcuts-button btn icon-virtual-tour-outline"
         try:
-            return bool(
-                self.soup.find(
-                    "button",
-                    {"class": button_str},
-                )
-            )
+            return bool(self.index.find("button", button_str))
         except AttributeError:
             return False
 
@@ -318,8 +309,8 @@ class HouseScraping:
 
         try:
             return bool(
-                self.soup.find(
-                    "button", {"class": "multimedia-shortcuts-button btn three-d-tour"}
+                self.index.find(
+                    "button", "multimedia-shortcuts-button btn three-d-tour"
                 )
             )
         except AttributeError:
@@ -334,10 +325,8 @@ class HouseScraping:
         Boolean indicator.
         """
 
-        try:
-            return bool(self.soup.find("div", {"id": "homestaging"}))
-        except AttributeError:
-            return False
+        homestaging = self.index.find_by_id("homestaging")
+        return homestaging is not None and homestaging.name == "div"
 
     def _get_plane(self) -> bool:
         """
@@ -350,9 +339,8 @@ class HouseScraping:
 
         try:
             return bool(
-                self.soup.find(
-                    "button",
-                    {"class": "multimedia-shortcuts-button btn icon-pics-outline"},
+                self.index.find(
+                    "button", "multimedia-shortcuts-button btn icon-pics-outline"
                 )
             )
         except AttributeError:
@@ -369,24 +357,11 @@ class HouseScraping:
 
         characteristics = [
             str(characteristic.text).lower()
-            for characteristic in self.soup.find(
-                "div", {"class": "details-property-feature-two"}
-            )
+            for characteristic in self.index.find("div", "details-property-feature-two")
             .find_all("div", {"class": "details-property_features"})[0]
             .find_all("li")
         ]
-        return np.min(
-            [
-                1,
-                len(
-                    [
-                        substring
-                        for substring in characteristics
-                        if "aire acondicionado" in substring
-                    ]
-                ),
-            ]
-        ).astype(bool)
+        return any("aire acondicionado" in text for text in characteristics)
 
     def _get_heating(self) -> str | None:
         """
@@ -397,13 +372,7 @@ class HouseScraping:
         Boolean indicator.
         """
 
-        for characteristic in self.soup.find(
-            "div", {"class": "details-property-feature-one"}
-        ).find_all("li"):
-            if "calefacción" in characteristic.text.lower():
-                return characteristic.text
-
-        return None
+        return self._get_characteristics()["heating"]  # type: ignore
 
     def _get_elevator(self) -> bool | None:
         """
@@ -414,15 +383,7 @@ class HouseScraping:
         Boolean indicator.
         """
 
-        for characteristic in self.soup.find(
-            "div", {"class": "details-property-feature-one"}
-        ).find_all("li"):
-            if "con ascensor" in characteristic.text.lower():
-                return True
-            if "sin ascensor" in characteristic.text.lower():
-                return False
-
-        return None
+        return self._get_characteristics()["elevator"]  # type: ignore
 
     def _get_furnished(self) -> bool | None:
         """
@@ -433,15 +394,7 @@ class HouseScraping:
         Boolean indicator.
         """
 
-        for characteristic in self.soup.find(
-            "div", {"class": "details-property-feature-one"}
-        ).find_all("li"):
-            if "amueblado" in characteristic.text.lower():
-                return True
-            if "sin amueblar" in characteristic.text.lower():
-                return False
-
-        return None
+        return self._get_characteristics()["furnished"]  # type: ignore
 
     def _get_terrace(self) -> str | None:
         """
@@ -452,16 +405,7 @@ class HouseScraping:
         Boolean indicator.
         """
 
-        for characteristic in self.soup.find(
-            "div", {"class": "details-property-feature-one"}
-        ).find_all("li"):
-            if (
-                "terraza" in characteristic.text.lower()
-                or "balcón" in characteristic.text.lower()
-            ):
-                return characteristic.text
-
-        return None
+        return self._get_characteristics()["terrace"]  # type: ignore
 
     def _get_consume(self) -> str | None:
         """
@@ -473,10 +417,8 @@ class HouseScraping:
         """
 
         for letter in ["A", "B", "C", "D", "E", "F", "G"]:
-            if self.soup.find(
-                "span",
-                {"class": f"energy-certificate-img-ticket-left left-{letter.lower()}"},
-            ):
+            consume_str = f"energy-certificate-img-ticket-left left-{letter.lower()}"
+            if self.index.find("span", consume_str):
                 return letter
         return None
 
@@ -491,57 +433,257 @@ class HouseScraping:
 
         for letter in ["A", "B", "C", "D", "E", "F", "G"]:
             emision_str = f"energy-certificate-img-ticket-right right-{letter.lower()}"
-            if self.soup.find(
-                "span",
-                {"class": emision_str},
-            ):
+            if self.index.find("span", emision_str):
                 return letter
         return None
 
-    def get_house_information(self) -> dict[str, int | str | bool | None]:
+    EXTRACTORS: dict[str, Callable[["HouseScraping"], HouseValue]] = {
+        "title": _get_title,
+        "location": _get_location,
+        "price": _get_price,
+        "m2": _get_m2,
+        "type": _get_type,
+        "status": _get_status,
+        "floor": _get_floor,
+        "description": _get_description,
+        "n_photos": _get_number_of_photos,
+        "n_rooms": _get_number_of_rooms,
+        "n_bathrooms": _get_number_of_bathrooms,
+        "particular": _get_particular,
+        "luxury": _get_luxury,
+        "video": _get_video,
+        "virtual_tour": _get_virtual_tour,
+        "3d_tour": _get_3d_tour,
+        "homestaging": _get_homestaging,
+        "plane": _get_plane,
+        "air_conditioning": _get_air_conditioning,
+        "heating": _get_heating,
+        "elevator": _get_elevator,
+        "furnished": _get_furnished,
+        "terrace": _get_terrace,
+        "consume": _get_consume,
+        "emisions": _get_emisions,
+    }
+
+    def get(self, field: str) -> HouseValue:
+        """
+        Gets a field of the house. Its extractor is only run the first time, the next
+        calls return the stored value.
+
+        Parameters
+        ----------
+        field : Field, one of EXTRACTORS.
+
+        Returns
+        -------
+        Value of the field.
+        """
+
+        if field not in self.values:
+            if field not in self.EXTRACTORS:
+                raise ValueError(
+                    f"Unknown field {field}, expected one of {list(self.EXTRACTORS)}."
+                )
+            self.values[field] = self.EXTRACTORS[field](self)
+            self.extracted.append(field)
+
+        return self.values[field]
+
+    def get_house_information(
+        self, fields: list[str] | None = None
+    ) -> dict[str, HouseValue]:
         """
-        Summarises all the information of the house.
+        Summarises the information of the house. Only the extractors of the fields
+        asked are run, and the rest can be obtained later with get.
+
+        Parameters
+        ----------
+        fields : Fields to obtain, of EXTRACTORS. By default, all of them.
 
         Returns
         -------
-        Dict with all fields of the above functions.
-        """
-
-        return {
-            "title": self._get_title(),
-            "location": self._get_location(),
-            "price": self._get_price(),
-            "m2": self._get_m2(),
-            "type": self._get_type(),
-            "status": self._get_status(),
-            "floor": self._get_floor(),
-            "description": self._get_description(),
-            "n_photos": self._get_number_of_photos(),
-            "n_rooms": self._get_number_of_rooms(),
-            "n_bathrooms": self._get_number_of_bathrooms(),
-            "particular": self._get_particular(),
-            "luxury": self._get_luxury(),
-            "video": self._get_video(),
-            "virtual_tour": self._get_virtual_tour(),
-            "3d_tour": self._get_3d_tour(),
-            "homestaging": self._get_homestaging(),
-            "plane": self._get_plane(),
-            "air_conditioning": self._get_air_conditioning(),
-            "heating": self._get_heating(),
-            "elevator": self._get_elevator(),
-            "furnished": self._get_furnished(),
-            "terrace": self._get_terrace(),
-            "consume": self._get_consume(),
-            "emisions": self._get_emisions(),
-        }
-
-    def get_html(self) -> BeautifulSoup:
+        Dict with the fields asked, in their order.
+        """
+
+        fields = list(self.EXTRACTORS) if fields is None else fields
+        return {field: self.get(field) for field in fields}
+
+    def close(self) -> None:
+        """
+        Frees the tree of the page once its information is extracted, instead of
+        waiting for the garbage collector. The fields already extracted can still be
+        obtained with get, the rest can not.
+        """
+
+        if isinstance(self.soup, BeautifulSoup):
+            self.soup.decompose()
+        self.index.clear()
+
+    def get_html(self) -> Document:
         """
         Returns the soup.
 
         Returns
         -------
-        BeautifoulSoup object of the advertisement.
+        Soup of the advertisement.
         """
 
         return self.soup
+
+    @classmethod
+    def extract_many(
+        cls,
+        htmls: Iterable[str],
+        workers: int | None = None,
+        parser: str = "lxml",
+        fields: list[str] | None = None,
+        chunk_size: int = EXTRACT_CHUNK_SIZE,
+    ) -> pd.DataFrame:
+        """
+        Obtains the information of many houses at once. The pages are split in chunks
+        that are extracted in a pool of processes, each chunk filling a list per field
+        instead of a dict per house, and the columns are built with the types of
+        HOUSE_SCHEMA. Only a few chunks are waiting at the same time, so the pages can
+        be read lazily. The pages without the expected elements do not stop the rest,
+        their rows are left with all the fields missing.
+
+        Parameters
+        ----------
+        htmls      : Html of the advertisements.
+        workers    : Number of processes. By default, the number of cores. With 1, the
+                     pages are extracted in this process.
+        parser     : Parser used for the html, one of PARSERS.
+        fields     : Fields to obtain, of EXTRACTORS. By default, all of them.
+        chunk_size : Number of pages of each chunk.
+
+        Returns
+        -------
+        Df with a row per page, in the order of the pages, and a column per field.
+        """
+
+        fields = list(cls.EXTRACTORS) if fields is None else fields
+        unknown = set(fields) - set(cls.EXTRACTORS)
+        if unknown:
+            raise ValueError(
+                f"Unknown fields {sorted(unknown)}, expected some of "
+                f"{list(cls.EXTRACTORS)}."
+            )
+
+        workers = workers or os.cpu_count() or 1
+        chunks = _split_chunks(htmls, chunk_size)
+        if workers == 1:
+            results: Iterable[Columns] = (
+                _extract_chunk(chunk, parser, fields) for chunk in chunks
+            )
+            return _concat_columns(results, fields)
+
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(workers, mp_context=context) as executor:
+            results = _map_bounded(executor, chunks, parser, fields, 2 * workers)
+            return _concat_columns(results, fields)
+
+
+def _split_chunks(htmls: Iterable[str], chunk_size: int) -> Iterator[list[str]]:
+    """
+    Splits the pages in chunks.
+
+    Parameters
+    ----------
+    htmls      : Html of the advertisements.
+    chunk_size : Number of pages of each chunk.
+
+    Returns
+    -------
+    Lists of pages, the last one may be shorter.
+    """
+
+    iterator = iter(htmls)
+    while chunk := list(itertools.islice(iterator, chunk_size)):
+        yield chunk
+
+
+def _extract_chunk(htmls: list[str], parser: str, fields: list[str]) -> Columns:
+    """
+    Gets the information of a chunk of houses filling a list per field. It is executed
+    in the processes of HouseScraping.extract_many. The row of a page without the
+    expected elements is left with all the fields missing.
+
+    Parameters
+    ----------
+    htmls  : Html of the advertisements.
+    parser : Parser used for the html, one of PARSERS.
+    fields : Fields to obtain.
+
+    Returns
+    -------
+    Values of each field, in the order of the pages.
+    """
+
+    columns: Columns = {field: [None] * len(htmls) for field in fields}
+    for row, html in enumerate(htmls):
+        scraper = HouseScraping(parse_html(html, parser))
+        try:
+            for field in fields:
+                columns[field][row] = scraper.get(field)
+        except EXTRACTION_ERRORS:  # a malformed page, without the fields got
+            for field in fields:
+                columns[field][row] = None
+        finally:
+            scraper.close()
+
+    return columns
+
+
+def _map_bounded(
+    executor: ProcessPoolExecutor,
+    chunks: Iterator[list[str]],
+    parser: str,
+    fields: list[str],
+    max_pending: int,
+) -> Iterator[Columns]:
+    """
+    Extracts the chunks in a pool of processes keeping only some of them submitted at
+    the same time, unlike executor.map, which reads all of them first.
+
+    Parameters
+    ----------
+    executor    : Pool of processes.
+    chunks      : Chunks of pages.
+    parser      : Parser used for the html, one of PARSERS.
+    fields      : Fields to obtain.
+    max_pending : Maximum number of chunks submitted and not returned.
+
+    Returns
+    -------
+    Values of each field of each chunk, in the order of the chunks.
+    """
+
+    pending: deque[Future[Columns]] = deque()
+    for chunk in chunks:
+        pending.append(executor.submit(_extract_chunk, chunk, parser, fields))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _concat_columns(results: Iterable[Columns], fields: list[str]) -> pd.DataFrame:
+    """
+    Joins the columns of the chunks in a typed df.
+
+    Parameters
+    ----------
+    results : Values of each field of each chunk.
+    fields  : Fields obtained.
+
+    Returns
+    -------
+    Df with the types of HOUSE_SCHEMA.
+    """
+
+    columns: Columns = {field: [] for field in fields}
+    for chunk_columns in results:
+        for field in fields:
+            columns[field].extend(chunk_columns[field])
+
+    return columns_to_df(columns)
@@ -2,11 +2,40 @@
 Script for scraping houses of a particular zone.
 """
 
-from bs4 import BeautifulSoup
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Generator, Iterator, NamedTuple
+
+import pandas as pd
 import undetected_chromedriver as uc
-from selenium.common.exceptions import NoSuchElementException
 
+from src.browser_pool import BrowserPool, PooledFetcher
+from src.cards import get_cards
+from src.fetchers import BrowserFetcher, Fetcher, make_browser
+from src.id_store import IdStore
+from src.parsers import Document, parse_html
+from src.scraping_house import HouseValue
+from src.pool import FetchPool
+from src.rate_limiter import RateLimiter
+from src.utag import get_listing_information, get_utag_data
 from src.utils import wait
+from src.writer import IncrementalWriter, read_journal
+
+
+# Query of the pages of a zone sorted by publication date, the newest first
+NEWEST_FIRST_QUERY = "ordenado-por=fecha-publicacion-desc"
+
+
+class ListingPage(NamedTuple):
+    """
+    Information read from a page of a zone.
+    """
+
+    page: int  # number of the page, as shown in the page
+    ids: list[int]
+    total_pages: int | None  # None if the page does not have utag data
+    cards: list[dict[str, HouseValue]]  # empty if the cards are not read
 
 
 class IdsScraping:
@@ -15,19 +44,73 @@ class IdsScraping:
     advertisements per page.
     """
 
-    def __init__(self, base_url: str) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        parser: str = "lxml",
+        checkpoint_path: str | None = None,
+        limiter: RateLimiter | None = None,
+        pool: FetchPool | None = None,
+        read_cards: bool = False,
+        newest_first: bool = False,
+        known_ids: IdStore | None = None,
+        stop_overlap: float = 1.0,
+        browser: uc.Chrome | BrowserPool | None = None,
+    ) -> None:
         """
         Constructor of the class.
 
         Parameters
         ----------
-        base_url : Url of the advertisements of the zone.
+        base_url        : Url of the advertisements of the zone.
+        parser          : Parser used for the pages without utag data, one of PARSERS.
+        checkpoint_path : If given, the ids of each page are appended to this jsonl
+                          journal, so that an interrupted run resumes after the last
+                          page obtained. The journal is removed when all the pages are
+                          obtained.
+        limiter         : Rate limiter of the requests, that can be shared with the
+                          fetchers of the houses. If None, the scraper waits a random
+                          time after each page and between pages.
+        pool            : Pool of workers that fetches the pages after the first one
+                          at the same time. If None, they are fetched one after the
+                          other with the browser of the scraper.
+        read_cards      : If True, the information of the cards of the advertisements
+                          is also read from the pages, see iter_cards.
+        newest_first    : If True, the pages of the zone are sorted by publication
+                          date, the newest advertisements first, and they are fetched
+                          one after the other. The checkpoint is not used.
+        known_ids       : Ids already obtained. With newest_first, the pages stop when
+                          a page has at least stop_overlap of its ids in it, because
+                          the next pages only have older advertisements.
+        stop_overlap    : Fraction of the ids of a page that must be known to stop.
+                          Less than 1 allows some new advertisements in the last page,
+                          for example the featured ones, which are not sorted.
+        browser         : Browser or pool of browsers that fetches the pages, which is
+                          not quit by the scraper. By default a new browser is started
+                          with make_browser and it is quit when the pages are obtained.
         """
 
+        if not 0 < stop_overlap <= 1:
+            raise ValueError(f"Expected 0 < stop_overlap <= 1, got {stop_overlap}.")
+
         self.base_url = base_url
-        self.browser = uc.Chrome()
+        self.parser = parser
+        self.checkpoint_path = None if newest_first else checkpoint_path
+        self.limiter = limiter
+        self.pool = pool
+        self.read_cards = read_cards
+        self.newest_first = newest_first
+        self.known_ids = known_ids
+        self.stop_overlap = stop_overlap
+        self.own_browser = browser is None
+        self.browser = make_browser() if browser is None else browser
+        self.fetcher: Fetcher = (
+            PooledFetcher(self.browser, limiter)
+            if isinstance(self.browser, BrowserPool)
+            else BrowserFetcher(self.browser, limiter)
+        )
 
-    def _get_new_soup(self, page: int) -> BeautifulSoup:
+    def _get_new_html(self, page: int) -> str:
         """
         Gets the html of the current page of the zone.
 
@@ -40,22 +123,9 @@ class IdsScraping:
         Html of the current page.
         """
 
-        url = f"{self.base_url}/pagina-{page}.htm"
-        self.browser.get(url)
-        wait()
-
-        try:
-            self.browser.find_element(
-                "xpath", "//*[@id='didomi-notice-disagree-button']"
-            ).click()
-        except NoSuchElementException:
-            pass
-
-        html = self.browser.page_source
-
-        return BeautifulSoup(html, "lxml")
+        return self.fetcher.fetch(self._get_page_url(page))
 
-    def _add_ids(self, ids: list[int], soup: BeautifulSoup) -> list[int]:
+    def _add_ids(self, ids: list[int], soup: Document) -> list[int]:
         """
         Updates the list of ids with the ones in the current page.
 
@@ -74,39 +144,276 @@ class IdsScraping:
         for article in articles:
             id_ = article.get("data-element-id")
             if id_ is not None:
-                ids.append(int(id_))
+                ids.append(int(str(id_)))
 
         return ids
 
-    def obtain_ids(self) -> list[int]:
+    def _get_page_url(self, page: int) -> str:
         """
-        Obtains all the house ids of a zone.
+        Gets the url of a page of the zone.
+
+        Parameters
+        ----------
+        page : Number of the page.
 
         Returns
         -------
-        List with all ids of the zone.
+        Url of the page.
         """
 
-        current_page = 1
-        ids: list[int] = []
+        url = f"{self.base_url}/pagina-{page}.htm"
+        return f"{url}?{NEWEST_FIRST_QUERY}" if self.newest_first else url
+
+    def _reached_known(self, listing_page: ListingPage) -> bool:
+        """
+        Checks if the pages of a zone sorted by publication date reached the ids
+        already known, so that the next pages do not need to be fetched.
 
-        while True:
-            soup = self._get_new_soup(current_page)
-            new_current_page = int(
-                soup.find("main", {"class": "listing-items"})
-                .find("div", {"class": "pagination"})
-                .find("li", {"class": "selected"})
-                .text
+        Parameters
+        ----------
+        listing_page : Information of the last page obtained.
+
+        Returns
+        -------
+        True if the pages can stop.
+        """
+
+        if not self.newest_first or self.known_ids is None or not listing_page.ids:
+            return False
+        known = self.known_ids.contains_many(listing_page.ids)
+        return known.mean() >= self.stop_overlap
+
+    def _read_page(self, html: str) -> ListingPage:
+        """
+        Reads the ids, the pagination and, if asked, the cards of a page of the zone.
+
+        Parameters
+        ----------
+        html : Html of the page.
+
+        Returns
+        -------
+        Information of the page.
+        """
+
+        utag_data = get_utag_data(html)
+        listing = get_listing_information(utag_data) if utag_data else None
+        if listing is not None and not self.read_cards:  # without parsing the html
+            return ListingPage(
+                listing["current_page"], listing["ids"], listing["total_pages"], []
+            )
+
+        soup = parse_html(html, self.parser, {"listing-items"})
+        cards = get_cards(soup) if self.read_cards else []
+        if listing is not None:
+            return ListingPage(
+                listing["current_page"], listing["ids"], listing["total_pages"], cards
             )
 
-            if new_current_page == current_page:
-                ids = self._add_ids(ids, soup)
-            else:  # we reach the end
+        current_page = int(
+            soup.find("main", {"class": "listing-items"})
+            .find("div", {"class": "pagination"})
+            .find("li", {"class": "selected"})
+            .text
+        )
+        return ListingPage(current_page, self._add_ids([], soup), None, cards)
+
+    def _load_checkpoint(self) -> dict[int, ListingPage]:
+        """
+        Loads the pages of the zone obtained by an interrupted run.
+
+        Returns
+        -------
+        Dict with the information of each page obtained.
+        """
+
+        if self.checkpoint_path is None or not os.path.exists(self.checkpoint_path):
+            return {}
+
+        df = read_journal(self.checkpoint_path)
+        if df.empty or not (df["url"] == self.base_url).all():  # other zone
+            return {}
+        if self.read_cards and "cards" not in df.columns:  # run without the cards
+            return {}
+
+        return {
+            int(record["page"]): ListingPage(
+                int(record["page"]),
+                record["ids"],
+                None if pd.isna(record["total_pages"]) else int(record["total_pages"]),
+                record["cards"] if self.read_cards else [],
+            )
+            for record in df.to_dict("records")
+        }
+
+    def _iter_pages(self) -> Generator[ListingPage, None, None]:
+        """
+        Obtains the pages of a zone. The number of pages is read from the utag data of
+        the first page and the rest of the pages are fetched at the same time with the
+        pool of workers, if there is one. Otherwise, the pages are fetched one after the
+        other until the page returned is not the one requested. With newest_first, the
+        pages stop at the first page made of known ids. A browser started by the
+        scraper is quit when the iteration ends or is stopped.
+
+        Returns
+        -------
+        Iterator over the information of each page, in the order they are obtained.
+        The pages of the checkpoint are given first.
+        """
+
+        pages = self._load_checkpoint()
+        checkpoint = None
+        if self.checkpoint_path is not None:
+            checkpoint = IncrementalWriter(self.checkpoint_path, overwrite=not pages)
+
+        def save(listing_page: ListingPage) -> None:
+            pages[listing_page.page] = listing_page
+            if checkpoint is not None:
+                checkpoint.write({"url": self.base_url, **listing_page._asdict()})
+
+        total_pages = next(
+            (page.total_pages for page in pages.values() if page.total_pages), None
+        )
+        complete = False
+        try:
+            yield from (pages[page] for page in sorted(pages))
+            if 1 not in pages:
+                listing_page = self._read_page(self._get_new_html(1))
+                total_pages = listing_page.total_pages
+                save(listing_page)
+                yield listing_page
+                if self._reached_known(listing_page):
+                    complete = True
+                    return
+
+            if total_pages is not None:
+                missing = [
+                    page for page in range(2, total_pages + 1) if page not in pages
+                ]
+                if self.pool is not None and len(missing) > 1 and not self.newest_first:
+                    results = self.pool.imap(
+                        missing,
+                        self._get_page_url,
+                        lambda _, html: self._read_page(html),
+                    )
+                else:
+                    results = (
+                        (page, self._read_page(self._get_new_html(page)))
+                        for page in missing
+                    )
+                for page, listing_page in results:
+                    if listing_page.page == page:  # else the zone has now less pages
+                        save(listing_page)
+                        yield listing_page
+                        if self._reached_known(listing_page):
+                            complete = True
+                            return
+                    if self.limiter is None:
+                        wait()
+                complete = all(page in pages for page in range(1, total_pages + 1))
+            else:  # without utag data, until the page returned is not the one asked
+                current_page = max(pages) + 1
+                while True:
+                    if self.limiter is None:
+                        wait()
+                    listing_page = self._read_page(self._get_new_html(current_page))
+                    if listing_page.page != current_page:  # we reach the end
+                        break
+                    save(listing_page)
+                    yield listing_page
+                    if self._reached_known(listing_page):
+                        break
+                    current_page += 1
+                complete = True
+        finally:
+            if self.own_browser:
+                assert not isinstance(self.browser, BrowserPool)
                 self.browser.quit()
-                return ids
+            if checkpoint is not None:
+                checkpoint.close()
+                if complete:
+                    os.remove(checkpoint.path)
+                else:
+                    print(
+                        f"{len(pages)}/{total_pages} pages of the zone were obtained, "
+                        "run again to obtain the rest."
+                    )
+
+    def iter_ids(self) -> Generator[int, None, None]:
+        """
+        Obtains the house ids of a zone page by page, so that they can be used while
+        the rest of the pages are fetched. An id in several pages (the advertisements
+        move between pages while they are fetched) is only given once.
+
+        Returns
+        -------
+        Iterator over the ids, in the order their pages are obtained.
+        """
+
+        seen: set[int] = set()
+        for listing_page in self._iter_pages():
+            for id_ in listing_page.ids:
+                if id_ not in seen:
+                    seen.add(id_)
+                    yield id_
+
+    def iter_cards(self) -> Iterator[dict[str, HouseValue]]:
+        """
+        Obtains the information of the cards of the advertisements of a zone page by
+        page, without loading the page of each advertisement. The scraper must be
+        created with read_cards=True.
+
+        Returns
+        -------
+        Iterator over a dict per advertisement with its id ("id") and the fields of
+        CARD_FIELDS, in the order their pages are obtained.
+        """
+
+        if not self.read_cards:
+            raise ValueError("The scraper must be created with read_cards=True.")
+
+        seen: set[int] = set()
+        for listing_page in self._iter_pages():
+            for card in listing_page.cards:
+                if card["id"] not in seen:
+                    seen.add(card["id"])  # type: ignore
+                    yield card
+
+    async def aiter_ids(self) -> AsyncIterator[int]:
+        """
+        Obtains the house ids of a zone page by page from asyncio code. The pages are
+        fetched in a thread, so the event loop is not blocked.
+
+        Returns
+        -------
+        Async iterator over the ids, in the order their pages are obtained.
+        """
+
+        ids = self.iter_ids()
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(1) as executor:  # the browser is used by one thread
+            try:
+                while (
+                    id_ := await loop.run_in_executor(executor, next, ids, None)
+                ) is not None:
+                    yield id_
+            finally:
+                await loop.run_in_executor(executor, ids.close)
+
+    def obtain_ids(self) -> list[int]:
+        """
+        Obtains all the house ids of a zone.
+
+        Returns
+        -------
+        List with all ids of the zone, in the order of the pages and without repeated
+        ids.
+        """
 
-            current_page += 1
-            wait()
+        pages = {
+            listing_page.page: listing_page.ids for listing_page in self._iter_pages()
+        }
+        return list(dict.fromkeys(id_ for page in sorted(pages) for id_ in pages[page]))
 
     def get_url(self) -> str:
         """
@@ -0,0 +1,201 @@
+"""
+Script for reading the information embedded in the "utag_data" script of the pages of
+Idealista, without traversing the html.
+"""
+
+import json
+from typing import Any, Callable
+
+from src.parsers import parse_html
+from src.scraping_house import HouseScraping, HouseValue
+
+
+UTAG_START = "utag_data = "
+
+# Fields of the house that are read from the "ad" object of the utag data. The m2 are
+# read from the html, since the utag data only has the constructed area while the html
+# gives the usable area when it is shown
+UTAG_HOUSE_FIELDS: dict[str, Callable[[dict[str, Any]], HouseValue]] = {
+    "price": lambda ad: int(ad["price"]),
+    "n_rooms": lambda ad: int(ad["characteristics"]["roomNumber"]),
+    "n_bathrooms": lambda ad: int(ad["characteristics"]["bathNumber"]),
+    "particular": lambda ad: ad["owner"]["type"] == "1",
+    "homestaging": lambda ad: ad["media"]["hasHomeStaging"] == "1",
+    "plane": lambda ad: ad["media"]["hasFloorPlan"] == "1",
+    "consume": lambda ad: ad["energyCertification"]["type"].upper() or None,
+}
+
+# Parts of the advertisement with all the fields that are not in the utag data
+DOM_CLASSES = {"detail-content-wrapper", "multimedia-shortcuts", "detail-info-tags"}
+
+
+def get_utag_data(html: str) -> dict[str, Any] | None:
+    """
+    Decodes the utag data of a page.
+
+    Parameters
+    ----------
+    html : Html of the page.
+
+    Returns
+    -------
+    Dict with the utag data or None if the page does not have it.
+    """
+
+    start = html.find(UTAG_START)
+    if start == -1:
+        return None
+
+    try:
+        data, _ = json.JSONDecoder().raw_decode(html, start + len(UTAG_START))
+    except json.JSONDecodeError:
+        return None
+
+    if not isinstance(data, dict):
+        return None
+
+    return data
+
+
+def get_house_fields(utag_data: dict[str, Any]) -> dict[str, HouseValue]:
+    """
+    Gets the fields of the house that are in the utag data of an advertisement.
+
+    Parameters
+    ----------
+    utag_data : Utag data of the advertisement.
+
+    Returns
+    -------
+    Dict with the fields found. Fields missing or with invalid values are not included.
+    """
+
+    ad = utag_data.get("ad")
+    if not isinstance(ad, dict):
+        return {}
+
+    fields = {}
+    for field, extractor in UTAG_HOUSE_FIELDS.items():
+        try:
+            fields[field] = extractor(ad)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            continue
+
+    return fields
+
+
+def get_listing_information(utag_data: dict[str, Any]) -> dict[str, Any] | None:
+    """
+    Gets the ids and the pagination of a page of a zone from its utag data.
+
+    Parameters
+    ----------
+    utag_data : Utag data of the page.
+
+    Returns
+    -------
+    Dict with the ids ("ids"), the total number of advertisements ("total_result"),
+    the current page ("current_page") and the number of pages ("total_pages"). None if
+    the utag data is not of a listing.
+    """
+
+    try:
+        listing = utag_data["list"]
+        return {
+            "ids": [int(ad["adId"]) for ad in listing["ads"]],
+            "total_result": int(listing["totalResult"]),
+            "current_page": int(listing["currentPageNumber"]),
+            "total_pages": int(listing["totalPageNumber"]),
+        }
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class UtagHouseScraping:
+    """
+    Class to obtain the information of a house reading first the utag data of the
+    advertisement. Only the fields that are not in the utag data are obtained with
+    HouseScraping, and the soup for them is restricted to the parts of the page where
+    they are.
+    """
+
+    def __init__(self, html: str, parser: str = "lxml") -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        html   : Html of the advertisement.
+        parser : Parser used for the fields not in the utag data, one of PARSERS.
+        """
+
+        self.html = html
+        self.parser = parser
+        utag_data = get_utag_data(html)
+        self.utag_fields = get_house_fields(utag_data) if utag_data else {}
+        self.scraper: HouseScraping | None = None
+
+    def _get_scraper(self) -> HouseScraping:
+        """
+        Gets the scraper for the fields that are not in the utag data. If the utag data
+        has all its fields, only the parts of the page with the remaining fields are
+        parsed. Otherwise the whole page is parsed.
+
+        Returns
+        -------
+        Scraper of the advertisement.
+        """
+
+        if self.scraper is None:
+            if len(self.utag_fields) == len(UTAG_HOUSE_FIELDS):
+                soup = parse_html(self.html, self.parser, DOM_CLASSES)
+            else:
+                soup = parse_html(self.html, self.parser)
+            self.scraper = HouseScraping(soup)
+
+        return self.scraper
+
+    def get_house_information(
+        self, fields: list[str] | None = None
+    ) -> dict[str, HouseValue]:
+        """
+        Summarises the information of the house. The page is only parsed if some field
+        asked is not in the utag data.
+
+        Parameters
+        ----------
+        fields : Fields to obtain, of HouseScraping.EXTRACTORS. By default, all of
+                 them.
+
+        Returns
+        -------
+        Dict with the fields asked, in their order, as in
+        HouseScraping.get_house_information.
+        """
+
+        fields = list(HouseScraping.EXTRACTORS) if fields is None else fields
+        information = {}
+        for field in fields:
+            if field in self.utag_fields:
+                information[field] = self.utag_fields[field]
+            else:
+                information[field] = self._get_scraper().get(field)
+
+        return information
+
+    @property
+    def extracted(self) -> list[str]:
+        """
+        Fields whose extractor was run, because they are not in the utag data.
+        """
+
+        return [] if self.scraper is None else self.scraper.extracted
+
+    def close(self) -> None:
+        """
+        Frees the tree of the page, if it was parsed, once the information is
+        extracted.
+        """
+
+        if self.scraper is not None:
+            self.scraper.close()
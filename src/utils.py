@@ -9,9 +9,21 @@ import numpy as np
 MAX_TIME_REQUEST = 30
 
 
+def random_wait_time() -> float:
+    """
+    Samples a random time to wait.
+
+    Returns
+    -------
+    Time in seconds.
+    """
+
+    return float(np.max([np.random.uniform(0.75, 1.5), np.random.normal(2, 1)]))
+
+
 def wait() -> None:
     """
     Function to wait a random time.
     """
 
-    time.sleep(np.max([np.random.uniform(0.75, 1.5), np.random.normal(2, 1)]))
+    time.sleep(random_wait_time())
@@ -0,0 +1,418 @@
+"""
+Script for writing the results incrementally. Each record is appended to a journal as
+soon as it is extracted, and the journal is compacted to the final file at the end.
+"""
+
+import csv
+import importlib.util
+import io
+import json
+import os
+from typing import Any, BinaryIO, Iterable
+
+import numpy as np
+import pandas as pd
+
+from src.schema import apply_schema
+
+
+WRITER_FORMATS = ["jsonl", "csv"]
+OUTPUT_FORMATS = ["csv", "parquet"]
+
+
+def _json_default(value: Any) -> Any:
+    """
+    Converts to a json value the values that the json module does not know.
+
+    Parameters
+    ----------
+    value : Value to convert.
+
+    Returns
+    -------
+    Value that can be written as json.
+    """
+
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def fsync_dir(path: str) -> None:
+    """
+    Flushes to disk the directory of a file, so that a rename is durable.
+
+    Parameters
+    ----------
+    path : Path of the file.
+    """
+
+    if os.name != "posix":
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_csv(df: pd.DataFrame, path: str) -> None:
+    """
+    Writes a df to a csv so that the file is either the old one or the new one, even if
+    the process crashes while writing.
+
+    Parameters
+    ----------
+    df   : Df to write.
+    path : Path of the csv.
+    """
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        df.to_csv(f, index=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_dir(path)
+
+
+def _check_parquet() -> None:
+    """
+    Checks that pyarrow, which is optional, is installed to read and write parquet.
+    """
+
+    if importlib.util.find_spec("pyarrow") is None:
+        raise ImportError("The parquet format needs pyarrow, pip install .[parquet].")
+
+
+def atomic_write_parquet(df: pd.DataFrame, path: str) -> None:
+    """
+    Writes a df to a parquet file, keeping the types of its columns, so that the file
+    is either the old one or the new one, even if the process crashes while writing.
+
+    Parameters
+    ----------
+    df   : Df to write.
+    path : Path of the parquet file.
+    """
+
+    _check_parquet()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        df.to_parquet(f, engine="pyarrow", index=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_dir(path)
+
+
+def get_output_format(path: str) -> str:
+    """
+    Gets the format of the results from the extension of their file.
+
+    Parameters
+    ----------
+    path : Path of the results.
+
+    Returns
+    -------
+    One of OUTPUT_FORMATS.
+    """
+
+    fmt = os.path.splitext(path)[1].lstrip(".")
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown format {fmt}, expected one of {OUTPUT_FORMATS}.")
+    return fmt
+
+
+def read_results(path: str, schema: dict[str, Any] | None = None) -> pd.DataFrame:
+    """
+    Reads the results written by compact, with the types of a schema. The parquet files
+    keep the types of the columns, so they are read without parsing their values.
+
+    Parameters
+    ----------
+    path   : Path of the results, a csv or a parquet file.
+    schema : Type of each column, for example HOUSE_SCHEMA. If None, the values of a
+             csv are read with the types guessed by pandas.
+
+    Returns
+    -------
+    Df of the results.
+    """
+
+    if get_output_format(path) == "parquet":
+        _check_parquet()
+        df = pd.read_parquet(path, engine="pyarrow")
+    elif schema is None:
+        return pd.read_csv(path)
+    else:
+        df = pd.read_csv(path, dtype=str)
+    return df if schema is None else apply_schema(df, schema)
+
+
+def _csv_records_end(f: BinaryIO, block_size: int = 65536) -> int:
+    """
+    Finds the end of the last complete record of a csv journal, that is, its last new
+    line that is not inside a quoted value (the descriptions can have new lines).
+
+    Parameters
+    ----------
+    f          : Journal opened in binary mode.
+    block_size : Number of bytes read each time.
+
+    Returns
+    -------
+    Number of bytes of the complete records.
+    """
+
+    f.seek(0)
+    end = 0
+    offset = 0
+    quoted = False
+    while block := f.read(block_size):
+        for i, part in enumerate(block.split(b'"')):
+            if i > 0:  # each quote opens or closes a quoted value
+                offset += 1
+                quoted = not quoted
+            newline = -1 if quoted else part.rfind(b"\n")
+            if newline >= 0:
+                end = offset + newline + 1
+            offset += len(part)
+
+    return end
+
+
+def _jsonl_records_end(f: BinaryIO, block_size: int = 65536) -> int:
+    """
+    Finds the end of the last complete record of a jsonl journal, that is, its last new
+    line, since the new lines of the values are escaped.
+
+    Parameters
+    ----------
+    f          : Journal opened in binary mode.
+    block_size : Number of bytes read each time looking for the last new line.
+
+    Returns
+    -------
+    Number of bytes of the complete records.
+    """
+
+    position = f.seek(0, os.SEEK_END)
+    while position > 0:
+        start = max(0, position - block_size)
+        f.seek(start)
+        block = f.read(position - start)
+        newline = block.rfind(b"\n")
+        if newline >= 0:
+            return start + newline + 1
+        position = start
+
+    return 0
+
+
+def _truncate_cut_record(path: str, fmt: str = "jsonl") -> None:
+    """
+    Removes a last record cut by a crash from a journal, so that the records appended
+    after it start in a new line.
+
+    Parameters
+    ----------
+    path : Path of the journal.
+    fmt  : Format of the journal, one of WRITER_FORMATS.
+    """
+
+    if not os.path.exists(path):
+        return
+
+    with open(path, "r+b") as f:
+        end = f.seek(0, os.SEEK_END)
+        position = _csv_records_end(f) if fmt == "csv" else _jsonl_records_end(f)
+        if position < end:
+            f.truncate(position)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class IncrementalWriter:
+    """
+    Class to append the records to a journal (jsonl or csv) as they are extracted, so
+    that the cost of saving a record does not depend on the number of records already
+    saved. The journal is flushed to disk every some records and a record cut by a
+    crash is ignored when the journal is read, and removed when a writer appends to
+    the journal.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fmt: str = "jsonl",
+        fsync_every: int = 1,
+        overwrite: bool = False,
+    ) -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        path        : Path of the journal.
+        fmt         : Format of the journal, one of WRITER_FORMATS.
+        fsync_every : Number of records between two flushes to disk.
+        overwrite   : If True, the journal is emptied. Otherwise the records are
+                      appended to the ones already in it.
+        """
+
+        if fmt not in WRITER_FORMATS:
+            raise ValueError(f"Unknown format {fmt}, expected one of {WRITER_FORMATS}.")
+
+        self.path = path
+        self.fmt = fmt
+        self.fsync_every = fsync_every
+        self.pending = 0  # records written but not flushed to disk
+        self.n_records = 0  # records written by this writer
+
+        if not overwrite:
+            _truncate_cut_record(path, fmt)
+        mode = "w" if overwrite else "a"
+        self.file = open(path, mode, encoding="utf-8", newline="")
+        self.columns: list[str] | None = None
+        if self.fmt == "csv" and self.file.tell() > 0:
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                self.columns = next(csv.reader(f))
+        self.csv_writer: csv.DictWriter | None = None
+
+    def write(self, record: dict[str, Any]) -> None:
+        """
+        Appends a record to the journal.
+
+        Parameters
+        ----------
+        record : Record to append.
+        """
+
+        if self.fmt == "jsonl":
+            self.file.write(
+                json.dumps(record, ensure_ascii=False, default=_json_default) + "\n"
+            )
+        else:
+            if self.csv_writer is None:
+                if self.columns is None:
+                    self.columns = list(record)
+                    self.csv_writer = csv.DictWriter(self.file, self.columns)
+                    self.csv_writer.writeheader()
+                else:
+                    self.csv_writer = csv.DictWriter(self.file, self.columns)
+            self.csv_writer.writerow(record)
+
+        self.n_records += 1
+        self.pending += 1
+        if self.pending >= self.fsync_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Flushes to disk the records written.
+        """
+
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+
+    def close(self) -> None:
+        """
+        Flushes the records and closes the journal.
+        """
+
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self) -> "IncrementalWriter":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+def read_journal(path: str, fmt: str = "jsonl") -> pd.DataFrame:
+    """
+    Reads the records of a journal. A last record cut by a crash is ignored, as well as
+    the rows of a csv journal with another number of values. The values of a csv
+    journal are read as text, since the csv does not keep their types.
+
+    Parameters
+    ----------
+    path : Path of the journal.
+    fmt  : Format of the journal, one of WRITER_FORMATS.
+
+    Returns
+    -------
+    Df with a row per record.
+    """
+
+    if fmt == "csv":
+        with open(path, "rb") as f:
+            end = _csv_records_end(f)
+            f.seek(0)
+            text = f.read(end).decode("utf-8")
+        reader = csv.reader(io.StringIO(text, newline=""))
+        columns = next(reader, [])
+        rows = [
+            [value or None for value in row]
+            for row in reader
+            if len(row) == len(columns)  # not a record merged with a cut one
+        ]
+        return pd.DataFrame(rows, columns=columns, dtype=object)
+
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+
+    return pd.DataFrame(records)
+
+
+def compact(
+    journal_path: str,
+    output_path: str,
+    fmt: str = "jsonl",
+    keep_ids: Iterable[int] | None = None,
+    schema: dict[str, Any] | None = None,
+) -> pd.DataFrame:
+    """
+    Writes the records of a journal to a csv or a parquet file (by the extension of the
+    output), with the id as first column. If an id was written more than once (a run
+    resumed after a crash or a house that changed), its last record is kept. The file
+    is replaced atomically.
+
+    Parameters
+    ----------
+    journal_path : Path of the journal.
+    output_path  : Path of the output, with one of OUTPUT_FORMATS as extension.
+    fmt          : Format of the journal, one of WRITER_FORMATS.
+    keep_ids     : If given, only the records of these ids are written.
+    schema       : If given, type of each column, for example HOUSE_SCHEMA.
+
+    Returns
+    -------
+    Df written.
+    """
+
+    df = read_journal(journal_path, fmt)
+    if "id" in df.columns:
+        df = df.drop_duplicates("id", keep="last")
+        if keep_ids is not None:
+            df = df[df["id"].astype(int).isin(set(keep_ids))]
+        df = df[["id"] + [col for col in df.columns if col != "id"]]
+    if schema is not None:
+        df = apply_schema(df, schema)
+
+    if get_output_format(output_path) == "parquet":
+        atomic_write_parquet(df, output_path)
+    else:
+        atomic_write_csv(df, output_path)
+
+    return df
@@ -0,0 +1,265 @@
+"""
+Script with a local server that replays the pages of data/tests and with fake
+fetchers and browsers, used by the tests of the fetchers and the pools.
+"""
+
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+
+
+with open("data/tests/house.html", "r", encoding="utf-8") as f:
+    HOUSE_HTML = f.read()
+with open("data/tests/ids.html", "r", encoding="utf-8") as f:
+    IDS_HTML = f.read()
+BLOCKED_HTML = (
+    "<html><body><script src='https://geo.captcha-delivery.com/captcha/'></script>"
+    "</body></html>"
+)
+
+
+class FixtureServer:
+    """
+    Class for a local server that serves the test page of a house for the urls of the
+    houses ("/inmueble/<id>/"), a page of the anti-bot protection for the urls starting
+    with "/blocked/" and the test page of a zone for the rest of urls.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor of the class.
+        """
+
+        self.requests: list[str] = []
+        self.connections = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """
+            Class to answer the requests of the server.
+            """
+
+            protocol_version = "HTTP/1.1"
+
+            def setup(self) -> None:
+                """
+                Counts the connections to the server.
+                """
+
+                super().setup()
+                with server.lock:
+                    server.connections += 1
+
+            def do_GET(self) -> None:  # pylint: disable=invalid-name
+                """
+                Answers a GET request.
+                """
+
+                with server.lock:
+                    server.requests.append(self.path)
+                status = 200
+                if self.path.startswith("/inmueble/"):
+                    html = HOUSE_HTML
+                elif self.path.startswith("/blocked/"):
+                    html, status = BLOCKED_HTML, 403
+                else:
+                    html = IDS_HTML
+                body = html.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: object) -> None:
+                """
+                Does not log the requests.
+                """
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FixtureServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class UrllibFetcher:
+    """
+    Class for a simple fetcher that gets the pages with urllib.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor of the class.
+        """
+
+        self.closed = False
+
+    def fetch(self, url: str) -> str:
+        """
+        Gets the html of a url.
+
+        Parameters
+        ----------
+        url : Url of the page.
+
+        Returns
+        -------
+        Html of the page.
+        """
+
+        with urllib.request.urlopen(url) as response:
+            return response.read().decode("utf-8")
+
+    def close(self) -> None:
+        """
+        Marks the fetcher as closed.
+        """
+
+        self.closed = True
+
+
+class FakeBrowser:
+    """
+    Class for a browser that returns the url of each page as its html. The element that
+    shows that a page is ready appears after some checks.
+    """
+
+    def __init__(self, ready_checks: int = 0, consent_banner: bool = False) -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        ready_checks   : Number of checks of each page before it is ready.
+        consent_banner : If True, the pages have the consent banner until it is
+                         answered.
+        """
+
+        self.page_source = ""
+        self.ready_checks = ready_checks
+        self.checks = 0
+        self.alive = True
+        self.crash_on_get = False  # crashes loading a page but answers the check
+        self.quit_called = False
+        self.cdp_commands: list[tuple[str, dict]] = []
+        self.consent_banner = consent_banner
+        self.cookies: dict[str, dict] = {}
+        self.consent_lookups = 0
+
+    def get(self, url: str) -> None:
+        """
+        Loads a page.
+
+        Parameters
+        ----------
+        url : Url of the page.
+        """
+
+        if not self.alive or self.crash_on_get:
+            raise WebDriverException("The browser crashed.")
+        self.page_source = f"<html>utag_data {url}</html>"
+        self.checks = 0
+
+    def find_elements(self, by: str, value: str) -> list[str]:
+        """
+        Finds the elements of a selector.
+
+        Parameters
+        ----------
+        by    : Type of the selector.
+        value : Selector.
+
+        Returns
+        -------
+        List with the selector if the page is ready, empty otherwise.
+        """
+
+        self.checks += 1
+        return [value] if self.checks > self.ready_checks else []
+
+    def find_element(self, *args: str) -> "FakeBrowser":
+        """
+        Finds the button of the consent banner.
+
+        Returns
+        -------
+        The browser itself, whose click answers the banner.
+        """
+
+        self.consent_lookups += 1
+        if not self.consent_banner or "didomi_token" in self.cookies:
+            raise NoSuchElementException()
+        return self
+
+    def click(self) -> None:
+        """
+        Answers the consent banner.
+        """
+
+        self.cookies["didomi_token"] = {"name": "didomi_token", "value": "disagree"}
+
+    def get_cookie(self, name: str) -> dict | None:
+        """
+        Gets a cookie.
+
+        Parameters
+        ----------
+        name : Name of the cookie.
+
+        Returns
+        -------
+        Cookie or None if it is not in the browser.
+        """
+
+        return self.cookies.get(name)
+
+    def execute_script(self, script: str) -> int | str:
+        """
+        Answers the health check and the state of the page, which is never completely
+        loaded.
+
+        Parameters
+        ----------
+        script : Script to execute.
+
+        Returns
+        -------
+        "interactive" for the state of the page and 1 for the rest of scripts.
+        """
+
+        if not self.alive:
+            raise WebDriverException("The browser crashed.")
+        return "interactive" if "readyState" in script else 1
+
+    def execute_cdp_cmd(self, method: str, parameters: dict) -> dict:
+        """
+        Keeps a command of the Chrome DevTools Protocol.
+
+        Parameters
+        ----------
+        method     : Method of the command.
+        parameters : Parameters of the command.
+
+        Returns
+        -------
+        Empty result.
+        """
+
+        self.cdp_commands.append((method, parameters))
+        return {}
+
+    def quit(self) -> None:
+        """
+        Quits the browser.
+        """
+
+        self.quit_called = True
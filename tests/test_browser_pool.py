@@ -0,0 +1,108 @@
+"""
+Script for testing the pool of warm browsers.
+"""
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from src.browser_pool import BrowserPool, PooledFetcher
+from src.rate_limiter import RateLimiter
+from tests.server import FakeBrowser
+
+
+@pytest.mark.run(order=1)
+def test_reuse_and_recycle() -> None:
+    """
+    Test for reusing the same warm browser and recycling it after the maximum number of
+    pages or memory.
+    """
+
+    browsers: list[FakeBrowser] = []
+
+    def factory(_: str | None) -> FakeBrowser:
+        browsers.append(FakeBrowser())
+        return browsers[-1]
+
+    memory = {"value": 100.0}
+    pool = BrowserPool(
+        2,
+        max_pages=3,
+        max_memory=500.0,
+        browser_factory=factory,  # type: ignore
+        memory=lambda _: memory["value"],
+    )
+    fetcher = PooledFetcher(pool, RateLimiter(rate=100.0, max_rate=100.0))
+    for page in range(3):
+        fetcher.fetch(f"https://host/{page}")
+    assert len(browsers) == 1, f"Expected 1 browser for 3 pages, got {len(browsers)}."
+    assert browsers[0].quit_called, "Expected the browser quit after 3 pages."
+
+    memory["value"] = 1000.0
+    fetcher.fetch("https://host/3")
+    assert len(browsers) == 2 and browsers[1].quit_called, "Expected a memory recycle."
+    assert pool.recycled == 2, f"Expected 2 recycles, got {pool.recycled}."
+    pool.close()
+
+
+@pytest.mark.run(order=2)
+def test_crash() -> None:
+    """
+    Test for starting a new browser when a browser crashes while it is idle or used,
+    fetching again the page of a crash without stopping the fetcher.
+    """
+
+    browsers: list[FakeBrowser] = []
+
+    def factory(_: str | None) -> FakeBrowser:
+        browsers.append(FakeBrowser())
+        return browsers[-1]
+
+    with BrowserPool(1, browser_factory=factory) as pool:  # type: ignore
+        fetcher = PooledFetcher(pool, RateLimiter(rate=100.0, max_rate=100.0))
+        fetcher.fetch("https://host/0")
+        browsers[0].alive = False  # crashed while idle
+        html = fetcher.fetch("https://host/1")
+        assert "https://host/1" in html, f"Expected the page 1, got {html}."
+
+        with pytest.raises(WebDriverException):
+            with pool.session() as browser:
+                browser.alive = False  # crashed while used
+                browser.get("https://host/2")
+
+        fetcher.fetch("https://host/3")
+        browsers[-1].crash_on_get = True
+        html = fetcher.fetch("https://host/4")  # fetched again with a new browser
+        assert "https://host/4" in html, f"Expected the page 4, got {html}."
+
+    assert len(browsers) == 4, f"Expected 4 browsers, got {len(browsers)}."
+    assert pool.restarted == 3, f"Expected 3 restarts, got {pool.restarted}."
+    assert all(browser.quit_called for browser in browsers), "Expected all quit."
+
+
+@pytest.mark.run(order=3)
+def test_profiles() -> None:
+    """
+    Test for giving each place of the pool its own profile, which is reused by the
+    browsers started in it.
+    """
+
+    profiles: list[str | None] = []
+
+    def factory(profile_dir: str | None) -> FakeBrowser:
+        profiles.append(profile_dir)
+        return FakeBrowser()
+
+    pool = BrowserPool(
+        2,
+        max_pages=1,
+        profiles_directory="profiles",
+        browser_factory=factory,  # type: ignore
+    )
+    with pool.session(), pool.session():
+        pass
+    with pool.session():
+        pass
+    pool.close()
+
+    expected = ["profiles/browser_0", "profiles/browser_1", "profiles/browser_0"]
+    assert profiles == expected, f"Expected profiles {expected}, got {profiles}."
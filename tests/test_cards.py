@@ -0,0 +1,68 @@
+"""
+Script for testing the information of the cards of a page of a zone.
+"""
+
+import pytest
+
+from src.cards import CARD_FIELDS, card_fingerprint, get_cards
+from src.parsers import PARSERS, parse_html
+from src.pipeline import extract_house_information
+from tests.server import HOUSE_HTML, IDS_HTML
+
+
+@pytest.mark.run(order=1)
+@pytest.mark.parametrize("parser", PARSERS)
+def test_get_cards(parser: str) -> None:
+    """
+    Test for reading the cards of the test page with each parser.
+    """
+
+    cards = get_cards(parse_html(IDS_HTML, parser, {"listing-items"}))
+
+    assert len(cards) == 30, f"Expected 30 cards, got {len(cards)}."
+    for card in cards:
+        assert list(card) == ["id"] + CARD_FIELDS, f"Got fields {list(card)}."
+        assert isinstance(card["price"], int), f"Expected int price, got {card}."
+        assert isinstance(card["n_photos"], int), f"Expected photos, got {card}."
+
+
+@pytest.mark.run(order=2)
+def test_card_as_detail() -> None:
+    """
+    Test for the fields of a card being the same as the ones of the page of the
+    advertisement (the first card of the test page is the test house).
+    """
+
+    card = get_cards(parse_html(IDS_HTML, "lxml", {"listing-items"}))[0]
+    house = extract_house_information(HOUSE_HTML)
+
+    assert card["id"] == 104824591, f"Expected the test house, got {card['id']}."
+    for field in CARD_FIELDS:
+        if field != "title":
+            assert (
+                card[field] == house[field]
+            ), f"Expected {field} {house[field]}, got {card[field]}."
+
+
+@pytest.mark.run(order=3)
+def test_card_fingerprint() -> None:
+    """
+    Test for the fingerprint of a card changing only with its price, title or number of
+    photos.
+    """
+
+    card = get_cards(parse_html(IDS_HTML, "lxml", {"listing-items"}))[0]
+    fingerprint = card_fingerprint(card)
+
+    assert fingerprint == card_fingerprint(
+        {**card, "elevator": not card["elevator"]}
+    ), "Expected the same fingerprint for another elevator."
+    changes: list[tuple[str, int | str]] = [
+        ("price", 1),
+        ("title", "Piso"),
+        ("n_photos", 0),
+    ]
+    for field, value in changes:
+        assert fingerprint != card_fingerprint(
+            {**card, field: value}
+        ), f"Expected another fingerprint for another {field}."
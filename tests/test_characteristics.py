@@ -0,0 +1,76 @@
+"""
+Script for testing the parsing of the basic characteristics of a house.
+"""
+
+import re
+import pytest
+
+from src.characteristics import CharacteristicRule, parse_characteristics
+
+
+@pytest.mark.run(order=1)
+def test_parse_flat() -> None:
+    """
+    Test for the characteristics of a flat.
+    """
+
+    texts = [
+        "90 m² construidos, 75 m² útiles",
+        "1 habitación",
+        "1 baño",
+        "Terraza y balcón",
+        "Segunda mano/buen estado",
+        "Amueblado y cocina equipada",
+        "Planta 3ª interior",
+        "Sin ascensor",
+    ]
+    result = parse_characteristics(texts)
+    expected = {
+        "m2": 75,
+        "status": "Segunda mano/buen estado",
+        "floor": 3,
+        "n_rooms": 1,
+        "n_bathrooms": 1,
+        "heating": None,
+        "elevator": False,
+        "furnished": True,
+        "terrace": "Terraza y balcón",
+    }
+    assert result == expected, f"Expected {expected}, got {result}."
+
+
+@pytest.mark.run(order=2)
+def test_parse_first_match() -> None:
+    """
+    Test for keeping the first characteristic that gives a value to a field.
+    """
+
+    texts = ["Planta baja", "Planta 2ª exterior", "Planta 4ª exterior", "Sin amueblar"]
+    result = parse_characteristics(texts)
+    assert result["floor"] == 2, f"Expected 2, got {result['floor']}."
+    assert result["furnished"] is False, f"Expected False, got {result['furnished']}."
+
+
+@pytest.mark.run(order=3)
+def test_parse_empty() -> None:
+    """
+    Test for a list without characteristics.
+    """
+
+    result = parse_characteristics([])
+    for field, value in result.items():
+        assert value is None, f"Expected None for {field}, got {value}."
+
+
+@pytest.mark.run(order=4)
+def test_parse_custom_rules() -> None:
+    """
+    Test for parsing with a custom list of rules.
+    """
+
+    rules = [
+        CharacteristicRule("garage", re.compile("garaje"), lambda text, _: True),
+    ]
+    result = parse_characteristics(["3 habitaciones", "Plaza de garaje"], rules)
+    expected = {"garage": True}
+    assert result == expected, f"Expected {expected}, got {result}."
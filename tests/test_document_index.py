@@ -0,0 +1,83 @@
+"""
+Script for testing the index of the elements of a document.
+"""
+
+import pytest
+from bs4 import BeautifulSoup
+
+from src.document_index import DocumentIndex
+
+
+with open("data/tests/house.html", "r", encoding="utf-8") as f:
+    html = f.read()
+soup = BeautifulSoup(html, "html.parser")
+index = DocumentIndex(soup)
+
+
+@pytest.mark.run(order=1)
+def test_find() -> None:
+    """
+    Test for finding the first element with a tag and a class.
+    """
+
+    result = index.find("span", "main-info__title-main")
+    expected = soup.find("span", {"class": "main-info__title-main"})
+    assert result is expected, f"Expected {expected}, got {result}."
+
+
+@pytest.mark.run(order=2)
+def test_find_full_class() -> None:
+    """
+    Test for finding an element by its full class string and by one of its classes.
+    """
+
+    for class_ in [
+        "multimedia-shortcuts-button btn icon-virtual-tour-outline",
+        "icon-virtual-tour-outline",
+    ]:
+        result = index.find("button", class_)
+        expected = soup.find("button", {"class": class_})
+        assert result is expected, f"Expected {expected}, got {result}."
+
+
+@pytest.mark.run(order=3)
+def test_find_missing() -> None:
+    """
+    Test for finding an element that does not exist.
+    """
+
+    result = index.find("span", "this-class-does-not-exist")
+    assert result is None, f"Expected None, got {result}."
+
+
+@pytest.mark.run(order=4)
+def test_find_all() -> None:
+    """
+    Test for finding all the elements with a tag and a class.
+    """
+
+    result = index.find_all("span", "txt-bold")
+    expected = soup.find_all("span", {"class": "txt-bold"})
+    assert result == expected, f"Expected {len(expected)} elements, got {len(result)}."
+
+
+@pytest.mark.run(order=5)
+def test_find_by_id() -> None:
+    """
+    Test for finding an element by its id.
+    """
+
+    result = index.find_by_id("homestaging")
+    expected = soup.find(id="homestaging")
+    assert result is expected, f"Expected {expected}, got {result}."
+
+
+@pytest.mark.run(order=6)
+def test_find_by_class() -> None:
+    """
+    Test for finding all the elements with a class whatever their tag.
+    """
+
+    result = index.find_by_class("txt-bold")
+    expected = soup.find_all(class_="txt-bold")
+    assert result == expected, f"Expected {len(expected)} elements, got {len(result)}."
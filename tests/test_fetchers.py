@@ -0,0 +1,258 @@
+"""
+Script for testing the fetchers of the pages.
+"""
+
+import time
+from fnmatch import fnmatch
+import pytest
+
+from src.fetchers import (
+    BLOCKED_URL_PATTERNS,
+    BrowserFetcher,
+    CachingFetcher,
+    HttpFetcher,
+    block_resources,
+    looks_blocked,
+    make_browser,
+    make_connection_pool,
+)
+from src.html_cache import HtmlCache
+from src.pool import FetchPool
+from src.rate_limiter import RateLimiter
+from tests.server import BLOCKED_HTML, HOUSE_HTML, IDS_HTML, FakeBrowser, FixtureServer
+
+
+class StaticFetcher:
+    """
+    Class for a fetcher that always returns the same html.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor of the class.
+        """
+
+        self.urls: list[str] = []
+        self.closed = False
+
+    def fetch(self, url: str) -> str:
+        """
+        Gets the html of the test house.
+
+        Parameters
+        ----------
+        url : Url of the page.
+
+        Returns
+        -------
+        Html of the test house.
+        """
+
+        self.urls.append(url)
+        return HOUSE_HTML
+
+    def close(self) -> None:
+        """
+        Marks the fetcher as closed.
+        """
+
+        self.closed = True
+
+
+@pytest.mark.run(order=1)
+def test_looks_blocked() -> None:
+    """
+    Test for detecting the pages of the anti-bot protection.
+    """
+
+    assert not looks_blocked(200, HOUSE_HTML), "Expected the house not blocked."
+    assert not looks_blocked(200, IDS_HTML), "Expected the zone not blocked."
+    assert looks_blocked(200, BLOCKED_HTML), "Expected the captcha page blocked."
+    assert looks_blocked(429, HOUSE_HTML), "Expected status 429 blocked."
+    assert looks_blocked(200, "<html></html>"), "Expected an empty page blocked."
+
+
+@pytest.mark.run(order=2)
+def test_http_fetcher() -> None:
+    """
+    Test for getting pages with HTTP reusing the connections.
+    """
+
+    with FixtureServer() as server:
+        fetcher = HttpFetcher()
+        for i in range(5):
+            result = fetcher.fetch(f"{server.url}/inmueble/{i}/")
+            assert result == HOUSE_HTML, "Expected the html of the test house."
+        fetcher.close()
+
+    assert server.connections == 1, f"Expected 1 connection, got {server.connections}."
+
+
+@pytest.mark.run(order=3)
+def test_http_fetcher_fallback() -> None:
+    """
+    Test for getting the blocked pages with the fallback fetcher.
+    """
+
+    fallbacks: list[StaticFetcher] = []
+
+    def factory() -> StaticFetcher:
+        fallbacks.append(StaticFetcher())
+        return fallbacks[-1]
+
+    with FixtureServer() as server:
+        fetcher = HttpFetcher(fallback_factory=factory)
+        fetcher.fetch(f"{server.url}/inmueble/1/")
+        assert not fallbacks, "Expected no fallback for a page that is not blocked."
+        result = fetcher.fetch(f"{server.url}/blocked/1/")
+        fetcher.close()
+
+    assert result == HOUSE_HTML, "Expected the html of the fallback fetcher."
+    assert fetcher.n_fallbacks == 1, f"Expected 1 fallback, got {fetcher.n_fallbacks}."
+    assert fallbacks[0].urls == [f"{server.url}/blocked/1/"], "Expected the same url."
+    assert fallbacks[0].closed, "Expected the fallback fetcher closed."
+
+
+@pytest.mark.run(order=4)
+def test_http_pool() -> None:
+    """
+    Test for getting many pages at the same time with a pool of workers sharing the
+    connections of the http fetchers.
+    """
+
+    http = make_connection_pool(4)
+    pool = FetchPool(lambda: HttpFetcher(http), n_workers=4, pace=lambda: 0.0)
+    with FixtureServer() as server:
+        urls = [f"{server.url}/inmueble/{i}/" for i in range(12)]
+        result = pool.map(urls, str, lambda _, html: html)
+
+    assert [url for url, _ in result] == urls, f"Expected all urls, got {result}."
+    assert all(html == HOUSE_HTML for _, html in result), "Expected the houses."
+    assert (
+        server.connections <= 4
+    ), f"Expected <= 4 connections, got {server.connections}."
+
+
+@pytest.mark.run(order=5)
+def test_caching_fetcher(tmp_path) -> None:
+    """
+    Test for keeping in the cache the pages got by another fetcher.
+    """
+
+    with HtmlCache(str(tmp_path)) as cache:
+        static_fetcher = StaticFetcher()
+        fetcher = CachingFetcher(static_fetcher, cache)
+        result = fetcher.fetch("https://www.idealista.com/inmueble/1/")
+        fetcher.close()
+
+        assert result == HOUSE_HTML, "Expected the html of the fetcher."
+        assert (
+            cache.latest("https://www.idealista.com/inmueble/1/") == HOUSE_HTML
+        ), "Expected the page in the cache."
+        assert static_fetcher.closed, "Expected the fetcher closed."
+
+
+@pytest.mark.run(order=6)
+def test_http_fetcher_limiter() -> None:
+    """
+    Test for the HTTP fetcher reporting the fine and the blocked pages to the rate
+    limiter.
+    """
+
+    limiter = RateLimiter(rate=1.0, max_rate=10.0, increase=1.0, jitter=0.0)
+    with FixtureServer() as server:
+        fetcher = HttpFetcher(limiter=limiter)
+        fetcher.fetch(f"{server.url}/inmueble/1/")
+        rate = limiter.rate(server.url)
+        fetcher.fetch(f"{server.url}/blocked/1/")
+        blocked_rate = limiter.rate(server.url)
+
+    assert rate == 2.0, f"Expected the rate increased, got {rate}."
+    assert blocked_rate == 1.0, f"Expected the rate decreased, got {blocked_rate}."
+    assert limiter.sleep_time > 0, "Expected a wait before the second request."
+
+
+@pytest.mark.run(order=7)
+def test_browser_ready() -> None:
+    """
+    Test for reading a page as soon as it is ready, and after the timeout if it is
+    never ready.
+    """
+
+    browser = FakeBrowser(ready_checks=3)
+    limiter = RateLimiter(rate=100.0, max_rate=100.0)
+    fetcher = BrowserFetcher(browser, limiter)  # type: ignore
+    start = time.monotonic()
+    fetcher.fetch("https://host/inmueble/1/")
+    elapsed = time.monotonic() - start
+
+    assert browser.checks == 4, f"Expected 4 checks, got {browser.checks}."
+    assert elapsed < 1, f"Expected the page without fixed waits, got {elapsed:.2f} s."
+
+    browser = FakeBrowser(ready_checks=10**9)
+    fetcher = BrowserFetcher(browser, limiter, ready_timeout=0.3)  # type: ignore
+    start = time.monotonic()
+    html = fetcher.fetch("https://host/inmueble/2/")
+    elapsed = time.monotonic() - start
+
+    assert "inmueble/2" in html, f"Expected the page after the timeout, got {html}."
+    assert 0.3 <= elapsed < 1, f"Expected the timeout of 0.3 s, got {elapsed:.2f} s."
+
+
+@pytest.mark.run(order=8)
+def test_block_resources() -> None:
+    """
+    Test for blocking the images and the third party scripts but not the pages, the
+    styles or the scripts of the anti-bot protection and of the cookies.
+    """
+
+    browser = FakeBrowser()
+    block_resources(browser)  # type: ignore
+    methods = [method for method, _ in browser.cdp_commands]
+    assert methods == [
+        "Network.enable",
+        "Network.setBlockedURLs",
+    ], f"Expected the network commands, got {methods}."
+
+    blocked = [
+        "https://img4.idealista.com/blur/WEB_DETAIL/0/id.pro.es.image.master/1.jpg",
+        "https://st3.idealista.com/static/common/icons/32x32.png?20241212-1546",
+        "https://st3.idealista.com/static/fonts/font.woff2",
+        "https://www.googletagmanager.com/gtm.js?id=GTM",
+        "https://cdn.taboola.com/libtrc/loader.js",
+    ]
+    allowed = [
+        "https://www.idealista.com/inmueble/104824591/",
+        "https://st3.idealista.com/static/css/styles.css?20241212-1546",
+        "https://dd.idealista.com/tags.js",
+        "https://sdk.privacy-center.org/loader.js",
+    ]
+    for url in blocked + allowed:
+        result = any(fnmatch(url, pattern) for pattern in BLOCKED_URL_PATTERNS)
+        assert result == (url in blocked), f"Expected {url} blocked: {url in blocked}."
+
+
+@pytest.mark.run(order=9)
+def test_consent_once() -> None:
+    """
+    Test for looking for the consent banner only until it is answered.
+    """
+
+    browser = FakeBrowser(consent_banner=True)
+    limiter = RateLimiter(rate=100.0, max_rate=100.0)
+    for page in range(3):
+        BrowserFetcher(browser, limiter).fetch(f"https://host/inmueble/{page}/")
+
+    assert "didomi_token" in browser.cookies, "Expected the banner answered."
+    assert browser.consent_lookups == 1, f"Got {browser.consent_lookups} lookups."
+
+
+@pytest.mark.run(order=10)
+def test_page_load_strategy() -> None:
+    """
+    Test for not accepting the "none" page load strategy, which returns before the
+    navigation starts.
+    """
+
+    with pytest.raises(ValueError):
+        make_browser("none")
@@ -2,9 +2,11 @@
 Script for testing the scrapping of the html of a house.
 """
 
+import pandas as pd
 import pytest
 from bs4 import BeautifulSoup
 
+from src.schema import apply_schema
 from src.scraping_house import HouseScraping
 
 
@@ -223,7 +225,7 @@ def test_air_conditioning() -> None:
 
     result = scraper._get_air_conditioning()
     expected = True
-    assert result == expected, f"Expected {expected}, got {result}."
+    assert result is expected, f"Expected {expected}, got {result!r}."
 
 
 @pytest.mark.run(order=20)
@@ -311,3 +313,74 @@ def test_get_html() -> None:
     assert isinstance(
         result, BeautifulSoup
     ), f"Expected type BeautifoulSoup, got {type(result)}."
+
+
+@pytest.mark.run(order=28)
+def test_get_house_info_fields() -> None:
+    """
+    Test for only running the extractors of the fields asked, the rest being run on
+    their first access and stored.
+    """
+
+    lazy_scraper = HouseScraping(soup)
+    result = lazy_scraper.get_house_information(["price", "m2"])
+    expected = {"price": 304900, "m2": 120}
+    assert result == expected, f"Expected {expected}, got {result}."
+    assert lazy_scraper.extracted == ["price", "m2"], "Expected only 2 extractors."
+
+    lazy_scraper.get("price")
+    lazy_scraper.get("consume")
+    extracted = lazy_scraper.extracted
+    assert extracted == [
+        "price",
+        "m2",
+        "consume",
+    ], f"Expected one more, got {extracted}."
+
+    with pytest.raises(ValueError):
+        lazy_scraper.get("garden")
+
+
+@pytest.mark.run(order=29)
+@pytest.mark.parametrize("workers", [1, 2])
+def test_extract_many(workers: int) -> None:
+    """
+    Test for the typed df of many houses being the same as the one built from the
+    information of each house.
+    """
+
+    result = HouseScraping.extract_many(
+        [html] * 5, workers=workers, parser="html.parser", chunk_size=2
+    )
+    expected = apply_schema(pd.DataFrame([scraper.get_house_information()] * 5))
+    assert result.equals(expected), f"Expected {expected}, got {result}."
+
+    result = HouseScraping.extract_many([], workers=workers)
+    assert result.shape == (0, 25), f"Expected an empty df, got {result.shape}."
+
+    malformed = "<html><body></body></html>"
+    result = HouseScraping.extract_many(
+        [html, malformed, html], workers=workers, parser="html.parser", chunk_size=2
+    )
+    assert result.iloc[1].isna().all(), f"Expected a missing row, got {result.iloc[1]}."
+    expected = apply_schema(pd.DataFrame([scraper.get_house_information()] * 2))
+    assert (
+        result.iloc[[0, 2]].reset_index(drop=True).equals(expected)
+    ), f"Expected the other pages extracted, got {result}."
+
+
+@pytest.mark.run(order=30)
+def test_close() -> None:
+    """
+    Test for freeing the tree of the page, keeping the fields already extracted.
+    """
+
+    closed_scraper = HouseScraping(BeautifulSoup(html, "html.parser"))
+    price = closed_scraper.get("price")
+    closed_scraper.close()
+
+    assert closed_scraper.get("price") == price, "Expected the price kept."
+    assert isinstance(closed_scraper.soup, BeautifulSoup), "Expected a soup."
+    assert not closed_scraper.soup.contents, "Expected the tree decomposed."
+    with pytest.raises(AttributeError):
+        closed_scraper.get("title")
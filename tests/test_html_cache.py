@@ -0,0 +1,113 @@
+"""
+Script for testing the cache of raw html pages and the extraction from it.
+"""
+
+import os
+import pandas as pd
+import pytest
+
+from src.html_cache import HtmlCache
+from src.pipeline import extract_house_information
+from src.reextract import get_house_id, reextract
+from tests.server import BLOCKED_HTML, HOUSE_HTML, IDS_HTML
+
+
+@pytest.mark.run(order=1)
+@pytest.mark.parametrize("codec", ["lzma", "zlib"])
+def test_put_get(tmp_path, codec: str) -> None:
+    """
+    Test for storing a page compressed and getting it back.
+    """
+
+    with HtmlCache(str(tmp_path), codec) as cache:
+        digest = cache.put("https://www.idealista.com/inmueble/1/", HOUSE_HTML)
+        result = cache.get(digest)
+        size = os.path.getsize(cache._path(digest))
+
+    assert result == HOUSE_HTML, "Expected the same html."
+    assert size < len(HOUSE_HTML) / 5, f"Expected a compressed page, got {size} bytes."
+
+
+@pytest.mark.run(order=2)
+def test_entries(tmp_path) -> None:
+    """
+    Test for the index of the pages by url and crawl time, storing once the pages with
+    the same content.
+    """
+
+    url = "https://www.idealista.com/inmueble/1/"
+    with HtmlCache(str(tmp_path)) as cache:
+        first = cache.put(url, HOUSE_HTML, fetched_at=1.0)
+        cache.put(url, IDS_HTML, fetched_at=3.0)
+        cache.put(url, HOUSE_HTML, fetched_at=2.0)
+        cache.put("https://www.idealista.com/inmueble/2/", HOUSE_HTML, fetched_at=1.0)
+
+        all_entries = cache.entries(latest_only=False)
+        latest_entries = cache.entries()
+        latest = cache.latest(url)
+
+    n_files = sum(len(files) for _, _, files in os.walk(tmp_path / "objects"))
+    assert n_files == 2, f"Expected 2 stored pages, got {n_files}."
+    assert len(all_entries) == 4, f"Expected 4 entries, got {all_entries}."
+    assert [entry[1] for entry in latest_entries] == [3.0, 1.0], "Expected last pages."
+    assert latest == IDS_HTML, "Expected the last page of the url."
+    assert latest_entries[1][2] == first, "Expected the same hash for the same html."
+
+
+@pytest.mark.run(order=3)
+def test_get_house_id() -> None:
+    """
+    Test for getting the id of a house from its url.
+    """
+
+    result = get_house_id("https://www.idealista.com/inmueble/12345/")
+    assert result == 12345, f"Expected 12345, got {result}."
+    result = get_house_id("https://www.idealista.com/venta-viviendas/pagina-2.htm")
+    assert result is None, f"Expected None, got {result}."
+
+
+@pytest.mark.run(order=4)
+def test_reextract(tmp_path) -> None:
+    """
+    Test for obtaining the information of the houses from the cache.
+    """
+
+    cache_directory = str(tmp_path / "cache")
+    with HtmlCache(cache_directory) as cache:
+        for house_id in [3, 1, 2]:
+            cache.put(f"https://www.idealista.com/inmueble/{house_id}/", HOUSE_HTML)
+        cache.put("https://www.idealista.com/venta-viviendas/pagina-1.htm", IDS_HTML)
+
+    output_path = str(tmp_path / "houses_df.csv")
+    n_houses = reextract(cache_directory, output_path, n_processes=2)
+    df = pd.read_csv(output_path)
+
+    expected = extract_house_information(HOUSE_HTML)
+    assert n_houses == 3, f"Expected 3 houses, got {n_houses}."
+    assert df["id"].tolist() == [1, 2, 3], f"Expected ids 1 to 3, got {df['id']}."
+    assert (
+        df["title"] == expected["title"]
+    ).all(), f"Expected title {expected['title']}, got {df['title']}."
+
+
+@pytest.mark.run(order=5)
+def test_reextract_bad_pages(tmp_path) -> None:
+    """
+    Test for obtaining the information of each house from its last good page, skipping
+    the houses whose pages are all blocked or without the information.
+    """
+
+    broken_html = HOUSE_HTML.replace("details-property", "removed")  # extraction fails
+    cache_directory = str(tmp_path / "cache")
+    with HtmlCache(cache_directory) as cache:
+        cache.put("https://www.idealista.com/inmueble/1/", HOUSE_HTML)
+        cache.put("https://www.idealista.com/inmueble/1/", BLOCKED_HTML)
+        cache.put("https://www.idealista.com/inmueble/2/", BLOCKED_HTML)
+        cache.put("https://www.idealista.com/inmueble/3/", broken_html)
+
+    output_path = str(tmp_path / "houses_df.csv")
+    n_houses = reextract(cache_directory, output_path, n_processes=1)
+    df = pd.read_csv(output_path)
+
+    assert n_houses == 1, f"Expected 1 house, got {n_houses}."
+    assert df["id"].tolist() == [1], f"Expected only the house 1, got {df['id']}."
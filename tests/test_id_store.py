@@ -0,0 +1,133 @@
+"""
+Script for testing the persistent stores of the ids already scraped and of their
+fingerprints.
+"""
+
+import pytest
+
+from src.id_store import FingerprintStore, IdStore
+
+
+@pytest.mark.run(order=1)
+def test_contains(tmp_path) -> None:
+    """
+    Test for the lookups of the ids, before and after merging the log into the array.
+    """
+
+    store = IdStore(str(tmp_path / "ids"), merge_every=3)
+    for id_ in [50, 10, 30]:
+        store.add(id_)
+    assert 10 in store and 20 not in store, "Expected 10 and not 20 before the merge."
+
+    store.flush()  # the log reaches merge_every
+    store.add(20)
+    assert len(store.new_ids) == 1, f"Expected a merged log, got {store.new_ids}."
+    assert len(store) == 4, f"Expected 4 ids, got {len(store)}."
+
+    result = store.contains_many([5, 10, 20, 40, 50, 60]).tolist()
+    expected = [False, True, True, False, True, False]
+    assert result == expected, f"Expected {expected}, got {result}."
+    assert store.filter_new([60, 10, 5]) == [60, 5], "Expected the new ids in order."
+    store.close()
+
+
+@pytest.mark.run(order=2)
+def test_resume(tmp_path) -> None:
+    """
+    Test for a new store having the ids flushed by the previous one, ignoring an id cut
+    by a crash.
+    """
+
+    path = str(tmp_path / "ids")
+    with IdStore(path, merge_every=2) as store:
+        for id_ in [1, 2, 3]:
+            store.add(id_)
+            store.flush()
+        store.add(4)  # never flushed
+
+    with open(f"{path}.log", "ab") as f:
+        f.write(b"\x05\x00\x00")
+
+    store = IdStore(path)
+    result = sorted(id_ for id_ in range(10) if id_ in store)
+    assert result == [1, 2, 3, 4], f"Expected ids 1 to 4, got {result}."
+    store.close()
+
+
+@pytest.mark.run(order=3)
+def test_clear(tmp_path) -> None:
+    """
+    Test for removing all the ids of the store.
+    """
+
+    path = str(tmp_path / "ids")
+    with IdStore(path, merge_every=1) as store:
+        store.add(1)
+        store.flush()
+        store.add(2)
+        store.clear()
+
+    store = IdStore(path)
+    assert len(store) == 0, f"Expected an empty store, got {len(store)} ids."
+    store.close()
+
+
+@pytest.mark.run(order=4)
+def test_fingerprints(tmp_path) -> None:
+    """
+    Test for setting and getting fingerprints before and after a merge and in a new
+    store.
+    """
+
+    path = str(tmp_path / "fingerprints")
+    with FingerprintStore(path, merge_every=2) as store:
+        store.set(30, -1)
+        store.set(10, 2**62)
+        store.flush()  # the log reaches merge_every
+        store.set(10, 5)  # changed after the merge
+        store.set(20, 7)
+
+    store = FingerprintStore(path)
+    result = [store.get(id_) for id_ in [10, 20, 30, 40]]
+    assert result == [5, 7, -1, None], f"Expected [5, 7, -1, None], got {result}."
+    assert len(store) == 3, f"Expected 3 ids, got {len(store)}."
+
+    store.merge()
+    result = [store.get(id_) for id_ in [10, 20, 30, 40]]
+    assert result == [5, 7, -1, None], f"Expected the same after merge, got {result}."
+    store.close()
+
+
+@pytest.mark.run(order=5)
+def test_add_after_cut_log(tmp_path) -> None:
+    """
+    Test for the ids and fingerprints added after a record cut by a crash being read
+    back, instead of being misaligned by the cut record.
+    """
+
+    path = str(tmp_path / "ids")
+    with IdStore(path) as store:
+        store.add(1)
+    with open(f"{path}.log", "ab") as f:
+        f.write(b"\x05\x00\x00")
+    with IdStore(path) as store:
+        store.add(2)
+        store.add(3)
+
+    store = IdStore(path)
+    result = sorted(store.new_ids)
+    assert result == [1, 2, 3], f"Expected ids 1 to 3, got {result}."
+    store.close()
+
+    path = str(tmp_path / "fingerprints")
+    with FingerprintStore(path) as fingerprints:
+        fingerprints.set(1, 10)
+    with open(f"{path}.log", "ab") as f:
+        f.write(b"\x05\x00\x00")
+    with FingerprintStore(path) as fingerprints:
+        fingerprints.set(2, 20)
+
+    fingerprints = FingerprintStore(path)
+    records = dict(fingerprints.new_records)
+    assert records == {1: 10, 2: 20}, f"Expected ids 1 and 2, got {records}."
+    fingerprints.close()
@@ -2,13 +2,19 @@
 Script for testing the scrapping of the ids html.
 """
 
+import asyncio
+import json
 import pytest
 from bs4 import BeautifulSoup
 
-from src.scraping_ids import IdsScraping
+from src.id_store import IdStore
+from src.pool import FetchPool
+from src.rate_limiter import RateLimiter
+from src.scraping_ids import NEWEST_FIRST_QUERY, IdsScraping
+from tests.server import FakeBrowser
 
 
-scraper = IdsScraping("")
+scraper = IdsScraping("", browser=FakeBrowser())  # type: ignore
 
 
 @pytest.mark.run(order=1)
@@ -39,3 +45,169 @@ def test_get_url() -> None:
     result = scraper.get_url()
     assert isinstance(result, str), f"Expected str, got {type(result)}."
     assert result == "", f"Expected '', got {result}."
+
+
+@pytest.mark.run(order=3)
+def test_read_page() -> None:
+    """
+    Test for reading the ids and the pagination of a page of the zone.
+    """
+
+    with open("data/tests/ids.html", "r", encoding="utf-8") as f:
+        html = f.read()
+    result = scraper._read_page(html)
+
+    assert result.page == 1, f"Expected page 1, got {result.page}."
+    assert len(result.ids) == 30, f"Expected 30 ids, got {len(result.ids)}."
+    assert result.total_pages == 2, f"Expected 2 pages, got {result.total_pages}."
+    assert result.cards == [], f"Expected no cards, got {result.cards}."
+
+
+@pytest.mark.run(order=4)
+def test_get_page_url() -> None:
+    """
+    Test for the url of a page of the zone.
+    """
+
+    result = scraper._get_page_url(3)
+    assert result == "/pagina-3.htm", f"Expected '/pagina-3.htm', got {result}."
+
+
+class ListingFetcher:
+    """
+    Class for a fetcher of the pages of a zone of 3 pages, with an advertisement that
+    moved from the first page to the second one.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor of the class.
+        """
+
+        self.urls: list[str] = []
+
+    def fetch(self, url: str) -> str:
+        """
+        Gets the html of a page of the zone.
+
+        Parameters
+        ----------
+        url : Url of the page.
+
+        Returns
+        -------
+        Html with the utag data of the page.
+        """
+
+        self.urls.append(url)
+        page = min(int(url.split("pagina-")[1].split(".")[0]), 3)
+        ids = [10 * page, 10 * page + 1] + ([11] if page == 2 else [])
+        listing = {
+            "ads": [{"adId": str(id_)} for id_ in ids],
+            "totalResult": "7",
+            "currentPageNumber": str(page),
+            "totalPageNumber": "3",
+        }
+        return f"<script>utag_data = {json.dumps({'list': listing})};</script>"
+
+    def close(self) -> None:
+        """
+        Releases the resources of the fetcher.
+        """
+
+
+@pytest.mark.run(order=5)
+def test_iter_ids() -> None:
+    """
+    Test for obtaining the ids page by page without repeated ids.
+    """
+
+    scraper.fetcher = ListingFetcher()
+    scraper.limiter = RateLimiter(rate=100.0, max_rate=100.0)
+    result = list(scraper.iter_ids())
+    expected = [10, 11, 20, 21, 30, 31]
+
+    assert result == expected, f"Expected {expected}, got {result}."
+
+
+@pytest.mark.run(order=6)
+def test_newest_first(tmp_path) -> None:
+    """
+    Test for stopping the pages sorted by publication date at the first page with only
+    known ids.
+    """
+
+    fetcher = ListingFetcher()
+    scraper.fetcher = fetcher
+    scraper.newest_first = True
+    scraper.known_ids = IdStore(str(tmp_path / "ids"))
+    for id_ in [11, 20, 21, 30, 31]:
+        scraper.known_ids.add(id_)
+    result = list(scraper.iter_ids())
+    expected = [10, 11, 20, 21]
+
+    assert result == expected, f"Expected {expected}, got {result}."
+    assert len(fetcher.urls) == 2, f"Expected 2 pages, got {fetcher.urls}."
+    assert fetcher.urls[0].endswith(
+        f"?{NEWEST_FIRST_QUERY}"
+    ), f"Expected sorted pages, got {fetcher.urls[0]}."
+    scraper.known_ids.close()
+
+
+@pytest.mark.run(order=7)
+def test_iter_ids_pool() -> None:
+    """
+    Test for fetching the pages after the first one at the same time with a pool of
+    workers, without repeated ids.
+    """
+
+    pool = FetchPool(ListingFetcher, n_workers=2, pace=lambda: 0.0)
+    pool_scraper = IdsScraping(
+        "",
+        limiter=RateLimiter(rate=100.0, max_rate=100.0),
+        pool=pool,
+        browser=FakeBrowser(),  # type: ignore
+    )
+    fetcher = ListingFetcher()
+    pool_scraper.fetcher = fetcher
+    result = list(pool_scraper.iter_ids())
+    expected = [10, 11, 20, 21, 30, 31]
+
+    assert result[:2] == [10, 11], f"Expected the first page first, got {result}."
+    assert sorted(result) == expected, f"Expected {expected}, got {result}."
+    assert fetcher.urls == [
+        "/pagina-1.htm"
+    ], f"Expected only page 1 fetched, got {fetcher.urls}."
+
+
+@pytest.mark.run(order=8)
+def test_aiter_ids() -> None:
+    """
+    Test for obtaining the ids from asyncio code, stopping the pages when the
+    iteration is stopped.
+    """
+
+    async_scraper = IdsScraping(
+        "",
+        limiter=RateLimiter(rate=100.0, max_rate=100.0),
+        browser=FakeBrowser(),  # type: ignore
+    )
+    fetcher = ListingFetcher()
+    async_scraper.fetcher = fetcher
+
+    async def collect(n_ids: int | None) -> list[int]:
+        ids = []
+        async for id_ in async_scraper.aiter_ids():
+            ids.append(id_)
+            if len(ids) == n_ids:
+                break
+        return ids
+
+    result = asyncio.run(collect(None))
+    expected = [10, 11, 20, 21, 30, 31]
+    assert result == expected, f"Expected {expected}, got {result}."
+
+    fetcher.urls = []
+    result = asyncio.run(collect(2))
+    assert result == [10, 11], f"Expected [10, 11], got {result}."
+    assert len(fetcher.urls) == 1, f"Expected only page 1, got {fetcher.urls}."
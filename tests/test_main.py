@@ -0,0 +1,39 @@
+"""
+Script for testing the choice of the houses scraped by a run.
+"""
+
+import pytest
+
+from src.id_store import FingerprintStore, IdStore
+from src.main import skip_house
+
+
+@pytest.mark.run(order=1)
+def test_skip_house(tmp_path) -> None:
+    """
+    Test for the full runs skipping the houses already scraped or whose card did not
+    change, and the runs of some fields skipping only the houses in their results.
+    """
+
+    with (
+        IdStore(str(tmp_path / "ids")) as scraped_ids,
+        FingerprintStore(str(tmp_path / "fingerprints")) as fingerprints,
+    ):
+        for house_id in [1, 2]:
+            scraped_ids.add(house_id)
+            fingerprints.set(house_id, 10 * house_id)
+
+        cases = [(1, 10), (2, 30), (3, 30), (1, None), (3, None)]
+        result = [
+            skip_house(house_id, fingerprint, scraped_ids, fingerprints)
+            for house_id, fingerprint in cases
+        ]
+        expected = [True, False, False, True, False]
+        assert result == expected, f"Expected {expected} in a full run, got {result}."
+
+        result = [
+            skip_house(house_id, fingerprint, scraped_ids, fingerprints, {3})
+            for house_id, fingerprint in cases
+        ]
+        expected = [False, False, True, False, True]
+        assert result == expected, f"Expected {expected} for some fields, got {result}."
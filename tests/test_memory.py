@@ -0,0 +1,36 @@
+"""
+Script for testing the measure of the peak of memory of the stages.
+"""
+
+import tracemalloc
+import pytest
+
+from src.memory import MB, MemoryTracker
+
+
+@pytest.mark.run(order=1)
+def test_memory_tracker() -> None:
+    """
+    Test for the peak of each stage, measured only while the stage runs and joined
+    with the peaks measured elsewhere keeping the maximum.
+    """
+
+    tracker = MemoryTracker()
+    with tracker.stage("small"):
+        data = bytearray(MB)
+    del data
+    with tracker.stage("large"):
+        data = bytearray(8 * MB)
+    del data
+    tracker.add("small", 0.5 * MB)
+
+    small, large = tracker.peaks["small"], tracker.peaks["large"]
+    assert MB <= small < 2 * MB, f"Expected a peak of about 1 MB, got {small}."
+    assert 8 * MB <= large < 9 * MB, f"Expected a peak of about 8 MB, got {large}."
+    assert not tracemalloc.is_tracing(), "Expected the tracing stopped."
+    assert tracker.report().startswith("Peak memory small: 1.0 MB"), "Got a report."
+
+    tracker = MemoryTracker(enabled=False)
+    with tracker.stage("small"):
+        data = bytearray(MB)
+    assert not tracker.peaks, f"Expected nothing measured, got {tracker.peaks}."
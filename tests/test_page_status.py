@@ -0,0 +1,82 @@
+"""
+Script for testing the classification of the pages of the houses and the circuit
+breaker.
+"""
+
+import pytest
+
+from src.page_status import CircuitBreaker, classify_house_page
+from tests.server import BLOCKED_HTML, HOUSE_HTML, IDS_HTML
+
+
+class FakeClock:
+    """
+    Class for a clock that only advances when the breaker sleeps.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor of the class.
+        """
+
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Advances the clock.
+
+        Parameters
+        ----------
+        seconds : Seconds to advance.
+        """
+
+        self.now += seconds
+
+
+@pytest.mark.run(order=1)
+def test_classify_house_page() -> None:
+    """
+    Test for the status of the test pages and of modified test pages.
+    """
+
+    pages = {
+        "ok": HOUSE_HTML,
+        "blocked": BLOCKED_HTML,
+        "gone": HOUSE_HTML.replace('statusCode":"200', 'statusCode":"410'),
+        "malformed": HOUSE_HTML[: len(HOUSE_HTML) // 20],  # loaded by halves
+    }
+    for expected, html in pages.items():
+        result = classify_house_page(html)
+        assert result == expected, f"Expected {expected}, got {result}."
+
+    result = classify_house_page(IDS_HTML)
+    assert result == "malformed", f"Expected a zone page malformed, got {result}."
+
+
+@pytest.mark.run(order=2)
+def test_circuit_breaker() -> None:
+    """
+    Test for pausing when the window has too many blocked pages, doubling the pause
+    while the pages are still blocked.
+    """
+
+    clock = FakeClock()
+    breaker = CircuitBreaker(
+        threshold=0.5, window=4, pause=10.0, clock=clock, sleep=clock.sleep
+    )
+    for blocked in [True, False, False, True]:
+        breaker.record(blocked)
+    assert breaker.wait() == 0, "Expected no pause with half of the pages blocked."
+
+    for blocked in [True, True, True, False]:
+        breaker.record(blocked)
+    assert breaker.wait() == 10, "Expected a pause of 10 s."
+    assert breaker.wait() == 0, "Expected the pause over."
+
+    for _ in range(4):
+        breaker.record(True)
+    assert breaker.wait() == 20, "Expected the pause doubled."
+    assert breaker.trips == 2, f"Expected 2 pauses, got {breaker.trips}."
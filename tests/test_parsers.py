@@ -0,0 +1,84 @@
+"""
+Script for testing the parsers of the html.
+"""
+
+import pytest
+from bs4 import BeautifulSoup
+
+from src.parsers import PARSERS, LxmlDocument, parse_html
+from src.scraping_house import HouseScraping
+
+
+with open("data/tests/house.html", "r", encoding="utf-8") as f:
+    house_html = f.read()
+with open("data/tests/ids.html", "r", encoding="utf-8") as f:
+    ids_html = f.read()
+expected_house = HouseScraping(
+    BeautifulSoup(house_html, "html.parser")
+).get_house_information()
+
+
+@pytest.mark.run(order=1)
+def test_parse_html_types() -> None:
+    """
+    Test for the type of the document of each parser.
+    """
+
+    for parser in PARSERS:
+        result = parse_html("<html><body><p>Hi</p></body></html>", parser)
+        expected = LxmlDocument if parser == "lxml-native" else BeautifulSoup
+        assert isinstance(result, expected), f"Expected {expected}, got {type(result)}."
+
+
+@pytest.mark.run(order=2)
+def test_parse_html_unknown() -> None:
+    """
+    Test for an unknown parser.
+    """
+
+    with pytest.raises(ValueError):
+        parse_html(house_html, "unknown")
+
+
+@pytest.mark.run(order=3)
+def test_house_information() -> None:
+    """
+    Test for the information of a house with each parser.
+    """
+
+    for parser in PARSERS:
+        result = HouseScraping(parse_html(house_html, parser)).get_house_information()
+        assert result == expected_house, f"Got {result} with {parser}."
+
+
+@pytest.mark.run(order=4)
+def test_only_classes() -> None:
+    """
+    Test for parsing only the subtrees with some classes.
+    """
+
+    for parser in PARSERS:
+        soup = parse_html(house_html, parser, {"detail-content-wrapper"})
+        title = soup.find("span", {"class": "main-info__title-main"})
+        assert title is not None, f"Expected the title with {parser}, got None."
+        assert (
+            soup.find("div", {"class": "name"}) is None
+        ), f"Expected only the details with {parser}."
+
+
+@pytest.mark.run(order=5)
+def test_lxml_find() -> None:
+    """
+    Test for the searches of the lxml-native documents.
+    """
+
+    soup = parse_html(ids_html, "lxml-native")
+    articles = soup.find("main", {"class": "listing-items"}).find_all(  # type: ignore
+        "article"
+    )
+    ids = [article.get("data-element-id") for article in articles]
+    ids = [id_ for id_ in ids if id_ is not None]
+    assert len(ids) == 30, f"Expected 30 ids, got {len(ids)}."
+    selected = soup.find("li", {"class": "selected"})
+    assert selected is not None, "Expected the selected page, got None."
+    assert selected.text == "1", f"Expected '1', got {selected.text}."
@@ -0,0 +1,271 @@
+"""
+Script for testing the pipeline of stages of the scraping.
+"""
+
+import threading
+import time
+import pytest
+
+from src.pipeline import Pipeline, extract_house_information
+from src.pool import FetchPool
+from tests.server import BLOCKED_HTML, HOUSE_HTML, FixtureServer, UrllibFetcher
+
+
+expected_house = extract_house_information(HOUSE_HTML, parser="html.parser")
+
+
+@pytest.mark.run(order=1)
+def test_extract_house_information() -> None:
+    """
+    Test for the information of a house with and without the utag data.
+    """
+
+    result = extract_house_information(HOUSE_HTML, use_utag=True, parser="lxml")
+    assert result == expected_house, f"Expected {expected_house}, got {result}."
+
+
+@pytest.mark.run(order=2)
+def test_run() -> None:
+    """
+    Test for scraping some houses with the pipeline.
+    """
+
+    results = {}
+
+    def write(key: int, information: dict) -> None:
+        results[key] = information
+
+    with FixtureServer() as server:
+        pool = FetchPool(UrllibFetcher, n_workers=2, pace=lambda: 0.0)
+        pipeline = Pipeline(pool, n_processes=2, max_html=2)
+        pipeline.run(range(8), lambda key: f"{server.url}/inmueble/{key}/", write)
+
+    assert sorted(results) == list(range(8)), f"Expected 8 houses, got {results}."
+    for information in results.values():
+        assert information == expected_house, f"Got {information}."
+    items = [stats.items for stats in pipeline.stats]
+    assert items == [8, 8, 8], f"Expected 8 items per stage, got {items}."
+    assert len(pipeline.report().split("\n")) == 3, "Expected one line per stage."
+
+
+@pytest.mark.run(order=3)
+def test_run_error() -> None:
+    """
+    Test for pages without the information of a house, which are fetched again and not
+    written instead of stopping the run.
+    """
+
+    results = {}
+
+    def write(key: int, information: dict) -> None:
+        results[key] = information
+
+    with FixtureServer() as server:
+        pool = FetchPool(UrllibFetcher, n_workers=2, pace=lambda: 0.0)
+        pipeline = Pipeline(pool, n_processes=1, max_retries=1, backoff=0.0)
+        pipeline.run(range(8), lambda key: f"{server.url}/zone/{key}/", write)
+
+    assert not results, f"Expected no houses, got {results}."
+    expected = dict.fromkeys(range(8), "malformed")
+    assert pipeline.failed == expected, f"Expected {expected}, got {pipeline.failed}."
+    assert pipeline.statuses["malformed"] == 16, f"Got {pipeline.statuses}."
+    assert pipeline.retried == 8, f"Expected 8 retries, got {pipeline.retried}."
+
+
+class ScriptedFetcher:
+    """
+    Class for a fetcher that gives, for each url, the pages of a script one after the
+    other, raising the errors of the script. The script is shared by all the fetchers.
+    """
+
+    scripts: dict[str, list[str | Exception]] = {}
+    lock = threading.Lock()
+
+    def fetch(self, url: str) -> str:
+        """
+        Gets the next page of a url.
+
+        Parameters
+        ----------
+        url : Url of the page.
+
+        Returns
+        -------
+        Html of the page, the last one of the script once all were given.
+        """
+
+        with self.lock:
+            pages = self.scripts[url]
+            page = pages.pop(0) if len(pages) > 1 else pages[0]
+        if isinstance(page, Exception):
+            raise page
+        return page
+
+    def close(self) -> None:
+        """
+        Does nothing.
+        """
+
+
+@pytest.mark.run(order=4)
+def test_retries() -> None:
+    """
+    Test for fetching again the blocked and malformed pages and skipping the removed
+    advertisements.
+    """
+
+    gone_html = HOUSE_HTML.replace('statusCode":"200', 'statusCode":"404')
+    broken_html = HOUSE_HTML.replace("details-property", "removed")  # extraction fails
+    ScriptedFetcher.scripts = {
+        "0": [HOUSE_HTML],
+        "1": [BLOCKED_HTML, HOUSE_HTML],
+        "2": [gone_html],
+        "3": [broken_html],
+    }
+    results = {}
+
+    def write(key: int, information: dict) -> None:
+        results[key] = information
+
+    pool = FetchPool(ScriptedFetcher, n_workers=2, pace=lambda: 0.0)
+    pipeline = Pipeline(pool, n_processes=1, max_retries=2, backoff=0.0)
+    pipeline.run(range(4), str, write)
+
+    assert sorted(results) == [0, 1], f"Expected houses 0 and 1, got {list(results)}."
+    assert pipeline.gone == [2], f"Expected house 2 removed, got {pipeline.gone}."
+    assert pipeline.failed == {3: "malformed"}, f"Got failures {pipeline.failed}."
+    expected = {"ok": 2, "blocked": 1, "gone": 1, "malformed": 3}
+    assert (
+        pipeline.statuses == expected
+    ), f"Expected {expected}, got {pipeline.statuses}."
+    assert pipeline.retried == 3, f"Expected 3 retries, got {pipeline.retried}."
+
+
+@pytest.mark.run(order=5)
+def test_trace_memory() -> None:
+    """
+    Test for measuring the peak of memory of the extraction of the pages in the
+    processes.
+    """
+
+    ScriptedFetcher.scripts = {"0": [HOUSE_HTML], "1": [HOUSE_HTML]}
+    pool = FetchPool(ScriptedFetcher, n_workers=1, pace=lambda: 0.0)
+    pipeline = Pipeline(pool, n_processes=1, trace_memory=True)
+    pipeline.run(range(2), str, lambda *_: None)
+
+    peak = pipeline.stats[1].peak_memory
+    assert peak > len(HOUSE_HTML), f"Expected a peak above the html, got {peak}."
+    assert "peak memory" in pipeline.report(), "Expected the peak in the report."
+
+
+@pytest.mark.run(order=6)
+def test_fields() -> None:
+    """
+    Test for obtaining only some fields of the houses, counting the extractors run.
+    """
+
+    ScriptedFetcher.scripts = {"0": [HOUSE_HTML], "1": [HOUSE_HTML]}
+    results = {}
+
+    def write(key: int, information: dict) -> None:
+        results[key] = information
+
+    pool = FetchPool(ScriptedFetcher, n_workers=1, pace=lambda: 0.0)
+    pipeline = Pipeline(pool, n_processes=1, fields=["price", "m2"])
+    pipeline.run(range(2), str, write)
+
+    expected = {field: expected_house[field] for field in ["price", "m2"]}
+    assert results == {0: expected, 1: expected}, f"Got {results}."
+    report = pipeline.extractors_report()
+    assert report == "Extractors run price: 2, m2: 2", f"Got report {report}."
+
+    with pytest.raises(ValueError):
+        Pipeline(pool, n_processes=1, fields=["garden"])
+
+
+@pytest.mark.run(order=7)
+def test_slow_writer() -> None:
+    """
+    Test for a slow writer slowing down the fetch and the extraction instead of the
+    results piling up, and for the time waited between requests being reported.
+    """
+
+    fetched: list[str] = []
+
+    class CountingFetcher(ScriptedFetcher):
+        def fetch(self, url: str) -> str:
+            fetched.append(url)
+            return super().fetch(url)
+
+    ScriptedFetcher.scripts = {str(key): [HOUSE_HTML] for key in range(12)}
+    ahead: list[int] = []
+
+    def write(key: int, information: dict) -> None:
+        ahead.append(len(fetched) - len(ahead))
+        time.sleep(0.4)
+
+    pool = FetchPool(CountingFetcher, n_workers=1, pace=lambda: 0.01)
+    pipeline = Pipeline(pool, n_processes=1, max_html=1)
+    pipeline.run(range(12), str, write)
+
+    # Page being written, page waiting to be written, page being extracted, page in
+    # the queue of html and page being fetched
+    assert len(ahead) == 12, f"Expected 12 houses written, got {len(ahead)}."
+    assert max(ahead) <= 5, f"Expected at most 5 pages ahead, got {ahead}."
+    assert "paced" in pipeline.report(), "Expected the pace in the report."
+
+
+@pytest.mark.run(order=8)
+def test_fetch_error() -> None:
+    """
+    Test for the pages whose fetch fails, which are fetched again instead of stopping
+    the run.
+    """
+
+    ScriptedFetcher.scripts = {
+        "0": [HOUSE_HTML],
+        "1": [ConnectionError("Unreachable."), HOUSE_HTML],
+        "2": [ConnectionError("Unreachable.")],
+        "3": [HOUSE_HTML],
+    }
+    results = {}
+
+    def write(key: int, information: dict) -> None:
+        results[key] = information
+
+    pool = FetchPool(ScriptedFetcher, n_workers=1, pace=lambda: 0.0)
+    pipeline = Pipeline(pool, n_processes=1, max_retries=2, backoff=0.0)
+    pipeline.run(range(4), str, write)
+
+    assert sorted(results) == [0, 1, 3], f"Expected 3 houses, got {list(results)}."
+    assert pipeline.failed == {2: "unfetched"}, f"Got failures {pipeline.failed}."
+    assert pipeline.unfetched == 4, f"Expected 4 errors, got {pipeline.unfetched}."
+    assert pipeline.retried == 3, f"Expected 3 retries, got {pipeline.retried}."
+
+
+@pytest.mark.run(order=9)
+def test_crashed_workers() -> None:
+    """
+    Test for the pages not fetched because the workers crashed, which are fetched
+    again with new workers, the page that crashed them after the rest.
+    """
+
+    ScriptedFetcher.scripts = {str(key): [HOUSE_HTML] for key in range(4)}
+    ScriptedFetcher.scripts["0"] = [ConnectionError("Crashed."), HOUSE_HTML]
+    results = []
+
+    def write(key: int, information: dict) -> None:
+        results.append(key)
+
+    pool = FetchPool(
+        ScriptedFetcher,
+        n_workers=1,
+        pace=lambda: 0.0,
+        crash_exceptions=(ConnectionError,),
+    )
+    pipeline = Pipeline(pool, n_processes=1, max_retries=1, backoff=0.0)
+    pipeline.run(range(4), str, write)
+
+    assert results == [1, 2, 3, 0], f"Expected all the houses, got {results}."
+    assert not pipeline.failed, f"Expected no failures, got {pipeline.failed}."
+    assert pipeline.retried == 4, f"Expected 4 retries, got {pipeline.retried}."
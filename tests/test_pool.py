@@ -0,0 +1,165 @@
+"""
+Script for testing the pool of workers.
+"""
+
+import time
+import pytest
+
+from src.pool import FetchPool
+from tests.server import FixtureServer, UrllibFetcher
+
+
+class CrashError(Exception):
+    """
+    Exception of a fetcher that crashed.
+    """
+
+
+class CrashingFetcher(UrllibFetcher):
+    """
+    Class for a fetcher that crashes after some pages.
+    """
+
+    def __init__(self, pages: int) -> None:
+        """
+        Constructor of the class.
+
+        Parameters
+        ----------
+        pages : Number of pages fetched before crashing.
+        """
+
+        super().__init__()
+        self.pages = pages
+
+    def fetch(self, url: str) -> str:
+        """
+        Gets the html of a url or crashes.
+
+        Parameters
+        ----------
+        url : Url of the page.
+
+        Returns
+        -------
+        Html of the page.
+        """
+
+        if self.pages == 0:
+            raise CrashError("The browser crashed.")
+        self.pages -= 1
+        return super().fetch(url)
+
+
+def _title(_: int, html: str) -> str:
+    """
+    Gets the title of a page.
+
+    Parameters
+    ----------
+    _    : Key of the page.
+    html : Html of the page.
+
+    Returns
+    -------
+    Title of the page.
+    """
+
+    return html[html.index("<title>") + 7 : html.index("</title>")]
+
+
+@pytest.mark.run(order=1)
+def test_map() -> None:
+    """
+    Test for getting the results of the pages in the order of the keys.
+    """
+
+    with FixtureServer() as server:
+        pool = FetchPool(UrllibFetcher, n_workers=3, pace=lambda: 0.0)
+        result = pool.map(
+            range(10), lambda key: f"{server.url}/inmueble/{key}/", _title
+        )
+
+    keys = [key for key, _ in result]
+    assert keys == list(range(10)), f"Expected keys in order, got {keys}."
+    assert all("Piso" in title for _, title in result), f"Got titles {result}."
+    assert len(server.requests) == 10, f"Expected 10 requests, got {server.requests}."
+
+
+@pytest.mark.run(order=2)
+def test_scaling() -> None:
+    """
+    Test for the time of the run decreasing with the number of workers.
+    """
+
+    times = []
+    with FixtureServer() as server:
+        for n_workers in [1, 4]:
+            pool = FetchPool(UrllibFetcher, n_workers=n_workers, pace=lambda: 0.1)
+            start = time.perf_counter()
+            pool.map(range(12), lambda key: f"{server.url}/inmueble/{key}/", _title)
+            times.append(time.perf_counter() - start)
+
+    assert times[1] < times[0] / 2, f"Expected a speed up with 4 workers, got {times}."
+
+
+@pytest.mark.run(order=3)
+def test_crash() -> None:
+    """
+    Test for the workers going on when the fetcher of one of them crashes.
+    """
+
+    fetchers: list[CrashingFetcher] = []
+
+    def factory() -> CrashingFetcher:
+        fetchers.append(CrashingFetcher(2 if not fetchers else 100))
+        return fetchers[-1]
+
+    with FixtureServer() as server:
+        pool = FetchPool(
+            factory, n_workers=2, pace=lambda: 0.01, crash_exceptions=(CrashError,)
+        )
+        result = pool.map(
+            range(10), lambda key: f"{server.url}/inmueble/{key}/", _title
+        )
+
+    keys = [key for key, _ in result]
+    assert keys == list(range(10)), f"Expected all keys, got {keys}."
+    assert pool.crashed == 1, f"Expected 1 crashed worker, got {pool.crashed}."
+    assert all(fetcher.closed for fetcher in fetchers), "Expected closed fetchers."
+
+
+@pytest.mark.run(order=4)
+def test_all_crash() -> None:
+    """
+    Test for the run when the fetchers of all workers crash.
+    """
+
+    with FixtureServer() as server:
+        pool = FetchPool(
+            lambda: CrashingFetcher(1),
+            n_workers=2,
+            pace=lambda: 0.0,
+            crash_exceptions=(CrashError,),
+        )
+        result = pool.map(
+            range(10), lambda key: f"{server.url}/inmueble/{key}/", _title
+        )
+
+    assert len(result) == 2, f"Expected 2 results, got {len(result)}."
+    assert len(pool.failed) == 8, f"Expected 8 failed keys, got {pool.failed}."
+
+
+@pytest.mark.run(order=5)
+def test_process_error() -> None:
+    """
+    Test for an error when processing a page.
+    """
+
+    def process(_: int, __: str) -> None:
+        raise AttributeError("Malformed page.")
+
+    with FixtureServer() as server:
+        pool = FetchPool(UrllibFetcher, n_workers=2, pace=lambda: 0.0)
+        with pytest.raises(AttributeError):
+            pool.map(range(5), lambda key: f"{server.url}/inmueble/{key}/", process)
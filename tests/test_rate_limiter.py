@@ -0,0 +1,120 @@
+"""
+Script for testing the rate limiter of the requests.
+"""
+
+import threading
+import time
+import pytest
+
+from src.rate_limiter import RateLimiter
+
+
+class FakeClock:
+    """
+    Class for a clock that only moves when the limiter sleeps.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor of the class.
+        """
+
+        self.now = 0.0
+
+    def time(self) -> float:
+        """
+        Gets the current time.
+
+        Returns
+        -------
+        Time in seconds.
+        """
+
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Moves the clock.
+
+        Parameters
+        ----------
+        seconds : Seconds to move.
+        """
+
+        self.now += seconds
+
+
+URL = "https://www.idealista.com/inmueble/1/"
+
+
+@pytest.mark.run(order=1)
+def test_token_bucket() -> None:
+    """
+    Test for the requests to a host being spaced by the inverse of the rate, and the
+    requests to another host not waiting.
+    """
+
+    clock = FakeClock()
+    limiter = RateLimiter(rate=2.0, jitter=0.0, clock=clock.time, sleep=clock.sleep)
+
+    waits = [limiter.acquire(URL) for _ in range(5)]
+    assert waits == [0.0, 0.5, 0.5, 0.5, 0.5], f"Expected 0.5 s between, got {waits}."
+
+    result = limiter.acquire("https://img4.idealista.com/photo.jpg")
+    assert result == 0.0, f"Expected no wait for another host, got {result}."
+
+    clock.now += 10
+    result = limiter.acquire(URL)
+    assert result == 0.0, f"Expected no wait after being idle, got {result}."
+    assert limiter.sleep_time == 2.0, f"Expected 2 s waited, got {limiter.sleep_time}."
+
+
+@pytest.mark.run(order=2)
+def test_aimd() -> None:
+    """
+    Test for the rate growing additively with the fine responses and decreasing
+    multiplicatively with the failures, between its limits.
+    """
+
+    limiter = RateLimiter(rate=1.0, min_rate=0.2, max_rate=1.5, increase=0.1)
+    for _ in range(3):
+        limiter.success(URL)
+    assert limiter.rate(URL) == pytest.approx(1.3), f"Got {limiter.rate(URL)}."
+
+    for _ in range(10):
+        limiter.success(URL)
+    assert limiter.rate(URL) == 1.5, f"Expected the maximum, got {limiter.rate(URL)}."
+
+    limiter.failure(URL)
+    assert (
+        limiter.rate(URL) == 0.75
+    ), f"Expected half the rate, got {limiter.rate(URL)}."
+    for _ in range(10):
+        limiter.failure(URL)
+    assert limiter.rate(URL) == 0.2, f"Expected the minimum, got {limiter.rate(URL)}."
+
+    metrics = limiter.metrics()["www.idealista.com"]
+    assert metrics["failures"] == 11, f"Expected 11 failures, got {metrics}."
+
+
+@pytest.mark.run(order=3)
+def test_shared() -> None:
+    """
+    Test for the rate being shared by the threads using the same limiter.
+    """
+
+    limiter = RateLimiter(rate=20.0, max_rate=20.0, jitter=0.0)
+
+    def work() -> None:
+        for _ in range(5):
+            limiter.acquire(URL)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    assert elapsed >= 0.9, f"Expected 19 waits of 0.05 s, got {elapsed} s."
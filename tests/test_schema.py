@@ -0,0 +1,48 @@
+"""
+Script for testing the declared types of the information of the houses.
+"""
+
+import pandas as pd
+import pytest
+from bs4 import BeautifulSoup
+
+from src.schema import HOUSE_SCHEMA, apply_schema
+from src.scraping_house import HouseScraping
+
+
+with open("data/tests/house.html", "r", encoding="utf-8") as f:
+    html = f.read()
+information = HouseScraping(BeautifulSoup(html, "html.parser")).get_house_information()
+
+
+@pytest.mark.run(order=1)
+def test_schema_fields() -> None:
+    """
+    Test for the schema declaring the type of every field of a house.
+    """
+
+    missing = set(information) - set(HOUSE_SCHEMA)
+    assert not missing, f"Expected a type for every field, missing {missing}."
+
+
+@pytest.mark.run(order=2)
+def test_apply_schema() -> None:
+    """
+    Test for the columns having the types of the schema, whether the values come from
+    the extraction or from the text of a csv, with the missing values as <NA>.
+    """
+
+    records = [dict(information, id=1), dict(information, id=2, floor=None)]
+    df = apply_schema(pd.DataFrame(records))
+    text_df = apply_schema(pd.DataFrame(records).astype(str).replace("None", None))
+
+    for column, dtype in HOUSE_SCHEMA.items():
+        assert df[column].dtype == dtype, f"Expected {dtype} for {column}."
+        assert text_df[column].dtype == dtype, f"Expected {dtype} for text {column}."
+    assert df.equals(text_df), f"Expected the same df from the text, got {text_df}."
+
+    result = df["floor"].tolist()
+    assert result[0] == information["floor"], f"Expected the floor, got {result}."
+    assert result[1] is pd.NA, f"Expected a missing floor, got {result}."
+    result = df["air_conditioning"].tolist()
+    assert result == [True, True], f"Expected air conditioning, got {result}."
@@ -0,0 +1,140 @@
+"""
+Script for testing the reading of the utag data of the pages.
+"""
+
+import pytest
+from bs4 import BeautifulSoup
+
+from src.scraping_house import HouseScraping
+from src.utag import (
+    UtagHouseScraping,
+    get_house_fields,
+    get_listing_information,
+    get_utag_data,
+)
+
+
+with open("data/tests/house.html", "r", encoding="utf-8") as f:
+    house_html = f.read()
+with open("data/tests/ids.html", "r", encoding="utf-8") as f:
+    ids_html = f.read()
+
+
+@pytest.mark.run(order=1)
+def test_get_utag_data() -> None:
+    """
+    Test for decoding the utag data of a page.
+    """
+
+    result = get_utag_data(house_html)
+    assert isinstance(result, dict), f"Expected dict, got {type(result)}."
+    assert result["ad"]["id"] == "104824591", f"Got id {result['ad']['id']}."
+
+
+@pytest.mark.run(order=2)
+def test_get_utag_data_missing() -> None:
+    """
+    Test for a page without utag data.
+    """
+
+    result = get_utag_data("<html><body></body></html>")
+    assert result is None, f"Expected None, got {result}."
+
+
+@pytest.mark.run(order=3)
+def test_get_house_fields() -> None:
+    """
+    Test for the fields of a house in the utag data.
+    """
+
+    result = get_house_fields(get_utag_data(house_html))  # type: ignore
+    expected = {
+        "price": 304900,
+        "n_rooms": 3,
+        "n_bathrooms": 2,
+        "particular": False,
+        "homestaging": True,
+        "plane": True,
+        "consume": "D",
+    }
+    assert result == expected, f"Expected {expected}, got {result}."
+
+
+@pytest.mark.run(order=4)
+def test_get_listing_information() -> None:
+    """
+    Test for the ids and the pagination of a page of a zone.
+    """
+
+    result = get_listing_information(get_utag_data(ids_html))  # type: ignore
+    assert result is not None, "Expected dict, got None."
+    assert len(result["ids"]) == 30, f"Expected 30 ids, got {len(result['ids'])}."
+    assert result["total_result"] == 53, f"Expected 53, got {result['total_result']}."
+    assert result["current_page"] == 1, f"Expected 1, got {result['current_page']}."
+    assert result["total_pages"] == 2, f"Expected 2, got {result['total_pages']}."
+
+
+@pytest.mark.run(order=5)
+def test_get_listing_information_of_house() -> None:
+    """
+    Test for the listing information of a page that is not a listing.
+    """
+
+    result = get_listing_information(get_utag_data(house_html))  # type: ignore
+    assert result is None, f"Expected None, got {result}."
+
+
+@pytest.mark.run(order=6)
+def test_utag_house_information() -> None:
+    """
+    Test for the information of a house read from the utag data and the html.
+    """
+
+    result = UtagHouseScraping(house_html, "html.parser").get_house_information()
+    expected = HouseScraping(
+        BeautifulSoup(house_html, "html.parser")
+    ).get_house_information()
+    assert result == expected, f"Expected {expected}, got {result}."
+
+
+@pytest.mark.run(order=7)
+def test_utag_house_information_without_utag() -> None:
+    """
+    Test for the information of a house whose page does not have utag data.
+    """
+
+    html = house_html.replace("utag_data = ", "utag_removed = ")
+    result = UtagHouseScraping(html, "html.parser").get_house_information()
+    expected = HouseScraping(
+        BeautifulSoup(house_html, "html.parser")
+    ).get_house_information()
+    assert result == expected, f"Expected {expected}, got {result}."
+
+
+@pytest.mark.run(order=8)
+def test_utag_house_information_fields() -> None:
+    """
+    Test for not parsing the page when all the fields asked are in the utag data.
+    """
+
+    scraper = UtagHouseScraping(house_html, "html.parser")
+    result = scraper.get_house_information(["price", "consume"])
+    house = HouseScraping(BeautifulSoup(house_html, "html.parser"))
+    expected = house.get_house_information(["price", "consume"])
+    assert result == expected, f"Expected {expected}, got {result}."
+    assert scraper.scraper is None, "Expected the page not parsed."
+
+
+@pytest.mark.run(order=9)
+def test_utag_house_information_usable_m2() -> None:
+    """
+    Test for the same m2 with and without the utag data when the page shows the usable
+    area.
+    """
+
+    html = house_html.replace(
+        "<li>120 m² construidos</li>", "<li>120 m² construidos, 100 m² útiles</li>"
+    )
+    result = UtagHouseScraping(html, "html.parser").get_house_information()["m2"]
+    expected = HouseScraping(BeautifulSoup(html, "html.parser")).get("m2")
+    assert result == expected == 100, f"Expected 100 m2, got {result} and {expected}."
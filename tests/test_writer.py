@@ -0,0 +1,173 @@
+"""
+Script for testing the incremental writer of the results.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.schema import HOUSE_SCHEMA
+from src.writer import IncrementalWriter, compact, read_journal, read_results
+
+
+RECORDS = [
+    {"title": "Piso", "price": 100000, "elevator": True, "floor": None, "id": 1},
+    {"title": "Chalet", "price": 250000, "elevator": False, "floor": "2", "id": 2},
+]
+
+
+@pytest.mark.run(order=1)
+@pytest.mark.parametrize("fmt", ["jsonl", "csv"])
+def test_compact(tmp_path, fmt: str) -> None:
+    """
+    Test for the csv compacted from the journal being the same as the one written from
+    all the records at once.
+    """
+
+    journal_path = tmp_path / f"houses.{fmt}"
+    with IncrementalWriter(str(journal_path), fmt) as writer:
+        for record in RECORDS:
+            writer.write(record)
+
+    df = compact(str(journal_path), str(tmp_path / "houses.csv"), fmt)
+
+    expected = pd.DataFrame(RECORDS)
+    expected = expected[["id"] + [col for col in expected.columns if col != "id"]]
+    expected.to_csv(tmp_path / "expected.csv", index=False)
+    result = (tmp_path / "houses.csv").read_text()
+    assert result == (tmp_path / "expected.csv").read_text(), f"Got csv {result}."
+    assert list(df.columns)[0] == "id", f"Expected id first, got {list(df.columns)}."
+    assert not list(tmp_path.glob("*.tmp")), "Expected no temporary files."
+
+
+@pytest.mark.run(order=2)
+@pytest.mark.parametrize("fmt", ["jsonl", "csv"])
+def test_append(tmp_path, fmt: str) -> None:
+    """
+    Test for a new writer appending to the records of the journal unless it is asked
+    to overwrite them.
+    """
+
+    journal_path = str(tmp_path / f"houses.{fmt}")
+    for record in RECORDS:
+        with IncrementalWriter(journal_path, fmt) as writer:
+            writer.write(record)
+
+    ids = read_journal(journal_path, fmt)["id"].astype(int).tolist()
+    assert ids == [1, 2], f"Expected the records of both writers, got {ids}."
+
+    with IncrementalWriter(journal_path, fmt, overwrite=True) as writer:
+        writer.write(RECORDS[0])
+
+    ids = read_journal(journal_path, fmt)["id"].astype(int).tolist()
+    assert ids == [1], f"Expected only the new record, got {ids}."
+
+
+@pytest.mark.run(order=3)
+@pytest.mark.parametrize(
+    "fmt, cut", [("jsonl", '{"title": "Chal'), ("csv", '"Chalet\ncon piscina",25')]
+)
+def test_cut_record(tmp_path, fmt: str, cut: str) -> None:
+    """
+    Test for a record cut by a crash being ignored when the journal is read, and not
+    merged with the records appended after it, also when it is cut after a new line of
+    one of its values.
+    """
+
+    journal_path = tmp_path / f"houses.{fmt}"
+    with IncrementalWriter(str(journal_path), fmt) as writer:
+        writer.write(RECORDS[0])
+    with open(journal_path, "a", encoding="utf-8", newline="") as f:
+        f.write(cut)
+
+    df = read_journal(str(journal_path), fmt)
+    ids = df["id"].astype(int).tolist()
+    assert ids == [1], f"Expected only the full record, got {df}."
+
+    with IncrementalWriter(str(journal_path), fmt) as writer:
+        writer.write(dict(RECORDS[1], id=3, title="Chalet\ncon piscina"))
+        writer.write(dict(RECORDS[1], id=4))
+
+    df = read_journal(str(journal_path), fmt)
+    ids = df["id"].astype(int).tolist()
+    assert ids == [1, 3, 4], f"Expected the records after the cut, got {ids}."
+    title = df["title"].iloc[1]
+    assert title == "Chalet\ncon piscina", f"Expected the whole title, got {title}."
+
+
+@pytest.mark.run(order=4)
+def test_numpy_values(tmp_path) -> None:
+    """
+    Test for the numpy values being written as json values.
+    """
+
+    journal_path = tmp_path / "houses.jsonl"
+    with IncrementalWriter(str(journal_path)) as writer:
+        writer.write({"id": np.int64(1), "air_conditioning": np.bool_(True)})
+
+    result = journal_path.read_text()
+    assert result == '{"id": 1, "air_conditioning": true}\n', f"Got line {result}."
+
+
+@pytest.mark.run(order=5)
+def test_compact_duplicates(tmp_path) -> None:
+    """
+    Test for the compaction keeping the last record of an id written twice.
+    """
+
+    journal_path = tmp_path / "houses.jsonl"
+    with IncrementalWriter(str(journal_path)) as writer:
+        for record in RECORDS + [dict(RECORDS[0], price=90000)]:
+            writer.write(record)
+
+    df = compact(str(journal_path), str(tmp_path / "houses.csv"))
+    result = dict(zip(df["id"], df["price"]))
+    assert result == {1: 90000, 2: 250000}, f"Expected the last prices, got {result}."
+
+
+@pytest.mark.run(order=6)
+@pytest.mark.parametrize("extension", ["csv", "parquet"])
+def test_compact_schema(tmp_path, extension: str) -> None:
+    """
+    Test for the results compacted with a schema being read back with its types.
+    """
+
+    journal_path = tmp_path / "houses.jsonl"
+    with IncrementalWriter(str(journal_path)) as writer:
+        writer.write(dict(RECORDS[0], type="flat", consume="B"))
+        writer.write(dict(RECORDS[1], type="house", consume=None))
+
+    output_path = str(tmp_path / f"houses.{extension}")
+    df = compact(str(journal_path), output_path, schema=HOUSE_SCHEMA)
+    result = read_results(output_path, HOUSE_SCHEMA)
+    assert result.equals(df), f"Expected the compacted df, got {result}."
+
+    dtypes = result.dtypes.astype(str).to_dict()
+    expected = {
+        "id": "Int64",
+        "title": "string",
+        "price": "Int32",
+        "elevator": "boolean",
+        "floor": "Int32",
+        "type": "category",
+        "consume": "category",
+    }
+    assert dtypes == expected, f"Expected dtypes {expected}, got {dtypes}."
+    consume = result["consume"]
+    assert consume.cat.ordered, "Expected the ordered energy classes."
+    assert consume.isna().tolist() == [False, True], f"Expected a missing, {consume}."
+
+
+@pytest.mark.run(order=7)
+def test_merged_csv_record(tmp_path) -> None:
+    """
+    Test for the rows of a csv journal with another number of values, such as a cut
+    record merged with the next one, being ignored.
+    """
+
+    journal_path = tmp_path / "houses.csv"
+    journal_path.write_text("id,title,price\n1,Casa,100\n2,Chal3,Piso,300\n4,Piso")
+
+    df = read_journal(str(journal_path), "csv")
+    expected = [["1", "Casa", "100"]]
+    assert df.values.tolist() == expected, f"Expected {expected}, got {df}."